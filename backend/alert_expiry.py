@@ -0,0 +1,278 @@
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from alert_store import _index_fields
+
+logger = logging.getLogger(__name__)
+
+# Default lifetimes by alert level; collector severities map onto the same scale
+DEFAULT_LEVEL_TTLS = {
+    'critical': timedelta(hours=24),
+    'extreme': timedelta(hours=24),
+    'high': timedelta(hours=12),
+    'severe': timedelta(hours=12),
+    'medium': timedelta(hours=6),
+    'moderate': timedelta(hours=6),
+    'low': timedelta(hours=3),
+    'minor': timedelta(hours=3),
+}
+
+
+def _epoch_seconds(timestamp: str, default: float) -> float:
+    """Seconds since the epoch of a utc_timestamp string, or default if it has none"""
+    try:
+        return datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return default
+
+
+class ExpiryPolicy:
+    """Resolves the time-to-live of an alert from its disaster type and level"""
+
+    def __init__(self,
+                 default_ttl: timedelta = timedelta(hours=6),
+                 level_ttls: Optional[Dict[str, timedelta]] = None,
+                 overrides: Optional[Dict[Tuple[Optional[str], Optional[str]], timedelta]] = None):
+        """
+        Args:
+            default_ttl: Lifetime for alerts no other rule matches
+            level_ttls: Lifetime per alert level or severity
+            overrides: Lifetime per (disaster type, level); use None as the
+                level to cover every level of a disaster type
+        """
+        self.default_ttl = default_ttl
+        self.level_ttls = {k.lower(): v for k, v in (level_ttls or DEFAULT_LEVEL_TTLS).items()}
+        self.overrides = {
+            (disaster_type, level.lower() if level else None): ttl
+            for (disaster_type, level), ttl in (overrides or {}).items()
+        }
+
+    def ttl_for(self, disaster_type: Optional[str], level: str) -> timedelta:
+        """
+        Get the lifetime for an alert
+
+        Args:
+            disaster_type: Disaster type, if the alert has one
+            level: Alert level or collector severity
+
+        Returns:
+            Time the alert stays in the store after its last update
+        """
+        level = (level or '').lower()
+        for key in ((disaster_type, level), (disaster_type, None)):
+            if key in self.overrides:
+                return self.overrides[key]
+        return self.level_ttls.get(level, self.default_ttl)
+
+
+class ExpiringAlertStore:
+    """
+    Alert store wrapper that evicts alerts when their TTL runs out
+
+    Deadlines live in a min-heap, so ``expire`` only touches alerts that are
+    actually due instead of scanning the whole store. Re-adding an alert
+    pushes its deadline back; the old heap entry is skipped when it surfaces.
+    A hard ``max_alerts`` cap evicts the alerts closest to expiry first.
+
+    Listeners registered with ``add_listener`` receive ``(alert, reason)``
+    for every eviction, where reason is ``'expired'`` or ``'capacity'``, so
+    indexes built on top of the store can drop the alert too.
+    """
+
+    def __init__(self,
+                 store,
+                 policy: Optional[ExpiryPolicy] = None,
+                 max_alerts: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            store: Underlying alert store
+            policy: TTL rules, defaults to ExpiryPolicy()
+            max_alerts: Hard cap on stored alerts, unlimited if None
+            clock: Time source in seconds, injectable for tests
+        """
+        self.store = store
+        self.policy = policy or ExpiryPolicy()
+        self.max_alerts = max_alerts
+        self.clock = clock
+        self.listeners: List[Callable[[Dict, str], None]] = []
+        self.status_listeners: List[Callable[[Dict, str], None]] = []
+        self._heap: List[Tuple[float, int, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._counter = itertools.count()
+
+        # Alerts restored from disk keep the deadline they had before the
+        # restart; those already past it are evicted straight away
+        now = self.clock()
+        for alert in store.iter_query():
+            alert_id, timestamp, level, _ = _index_fields(alert)
+            ttl = self.policy.ttl_for(alert.get('disaster_type'), level).total_seconds()
+            self._schedule(alert_id, _epoch_seconds(timestamp, now) + ttl)
+        self.expire(now)
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    @property
+    def version(self) -> int:
+        return self.store.version
+
+    @property
+    def epoch(self) -> str:
+        return self.store.epoch
+
+    @property
+    def queue_depth(self) -> int:
+        """Entries in the expiry heap, including stale ones awaiting a rebuild"""
+        return len(self._heap)
+
+    def add_listener(self, callback: Callable[[Dict, str], None]):
+        """Register a callback for evicted alerts"""
+        self.listeners.append(callback)
+
+    def add_status_listener(self, callback: Callable[[Dict, str], None]):
+        """Register a callback for alerts whose status was updated"""
+        self.status_listeners.append(callback)
+
+    def _schedule(self, alert_id: str, deadline: float):
+        self._deadlines[alert_id] = deadline
+        heapq.heappush(self._heap, (deadline, next(self._counter), alert_id))
+
+        # Re-adds leave stale entries behind; rebuild once they dominate
+        if len(self._heap) > 2 * len(self._deadlines) + 1024:
+            self._heap = [
+                (deadline, next(self._counter), alert_id)
+                for alert_id, deadline in self._deadlines.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def add(self, alert: Dict):
+        """Insert an alert and (re)start its TTL"""
+        self.add_many([alert])
+
+    def add_many(self, alerts: Iterable[Dict]) -> int:
+        """
+        Insert a batch of alerts and (re)start their TTLs
+
+        Args:
+            alerts: Alerts with an ``id`` field
+
+        Returns:
+            Number of alerts written
+        """
+        alerts = list(alerts)
+        now = self.clock()
+        self.expire(now)
+
+        count = self.store.add_many(alerts)
+        for alert in alerts:
+            level = _index_fields(alert)[2]
+            ttl = self.policy.ttl_for(alert.get('disaster_type'), level)
+            self._schedule(alert['id'], now + ttl.total_seconds())
+
+        self._enforce_cap()
+        return count
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        return self.store.get(alert_id)
+
+    def update_status(self, alert_id: str, status: str) -> bool:
+        if not self.store.update_status(alert_id, status):
+            return False
+        if self.status_listeners:
+            alert = self.store.get(alert_id)
+            for callback in self.status_listeners:
+                callback(alert, status)
+        return True
+
+    def index_rows(self):
+        return self.store.index_rows()
+
+    def query(self, **filters) -> List[Dict]:
+        return self.store.query(**filters)
+
+    def iter_query(self, **filters) -> Iterator[Dict]:
+        return self.store.iter_query(**filters)
+
+    def iter_encoded(self, **filters) -> Iterator[Tuple[Dict, bytes]]:
+        return self.store.iter_encoded(**filters)
+
+    def fragment(self, alert_id: str) -> Optional[bytes]:
+        return self.store.fragment(alert_id)
+
+    def remove_many(self, alert_ids: Iterable[str]) -> int:
+        alert_ids = list(alert_ids)
+        for alert_id in alert_ids:
+            self._deadlines.pop(alert_id, None)
+        return self.store.remove_many(alert_ids)
+
+    def _pop_live(self) -> Optional[Tuple[float, str]]:
+        """Pop the earliest heap entry that still matches its alert's deadline"""
+        while self._heap:
+            deadline, _, alert_id = heapq.heappop(self._heap)
+            if self._deadlines.get(alert_id) == deadline:
+                del self._deadlines[alert_id]
+                return deadline, alert_id
+        return None
+
+    def _evict(self, alert_ids: List[str], reason: str):
+        if not alert_ids:
+            return
+        evicted = []
+        for alert_id in alert_ids:
+            alert = self.store.get(alert_id)
+            if alert is not None:
+                evicted.append(alert)
+        self.store.remove_many(alert_ids)
+
+        for alert in evicted:
+            for callback in self.listeners:
+                try:
+                    callback(alert, reason)
+                except Exception as e:
+                    logger.error(f"Expiry listener failed: {str(e)}")
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Evict every alert whose deadline has passed
+
+        Args:
+            now: Current time in seconds, defaults to the clock
+
+        Returns:
+            Number of alerts evicted
+        """
+        now = self.clock() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = self._pop_live()
+            if entry is None:
+                break
+            if entry[0] > now:
+                # Stale entries hid a live one that isn't due yet
+                self._schedule(entry[1], entry[0])
+                break
+            due.append(entry[1])
+
+        self._evict(due, 'expired')
+        return len(due)
+
+    def _enforce_cap(self):
+        if self.max_alerts is None:
+            return
+        overflow = len(self._deadlines) - self.max_alerts
+        victims = []
+        while overflow > 0:
+            entry = self._pop_live()
+            if entry is None:
+                break
+            victims.append(entry[1])
+            overflow -= 1
+        self._evict(victims, 'capacity')
+
+    def close(self):
+        self.store.close()
@@ -1,8 +1,15 @@
-from datetime import datetime
-from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from types import MappingProxyType
 import uuid
 import json
 from enum import Enum
+from incident_clusterer import IncidentClusterer
+from alert_store import MemoryAlertStore
+from alert_expiry import ExpiringAlertStore
+from alert_record import DetectionAlert
+from geo_polygons import PolygonIndex
+from surge_detector import SurgeDetector
 
 class AlertLevel(str, Enum):
     CRITICAL = "critical"    # Immediate action required
@@ -10,13 +17,187 @@ class AlertLevel(str, Enum):
     MEDIUM = "medium"       # Monitor closely
     LOW = "low"            # General awareness
 
+LEVEL_RANK = {
+    AlertLevel.LOW: 0,
+    AlertLevel.MEDIUM: 1,
+    AlertLevel.HIGH: 2,
+    AlertLevel.CRITICAL: 3
+}
+
+# Basic recommendations by disaster type
+DISASTER_RECOMMENDATIONS = MappingProxyType({
+    'earthquake': (
+        "Drop, Cover, and Hold On",
+        "Stay away from windows and exterior walls",
+        "If inside, stay inside; if outside, move to open area"
+    ),
+    'flood': (
+        "Move to higher ground immediately",
+        "Avoid walking or driving through flood waters",
+        "Follow evacuation orders from local authorities"
+    ),
+    'hurricane': (
+        "Board up windows and secure loose outdoor items",
+        "Prepare emergency supplies and evacuation plan",
+        "Follow local authority evacuation orders"
+    ),
+    'tornado': (
+        "Seek shelter in basement or interior room",
+        "Stay away from windows and exterior walls",
+        "Keep monitoring local weather updates"
+    ),
+    'wildfire': (
+        "Follow evacuation orders immediately",
+        "Prepare emergency supplies",
+        "Close all windows and doors"
+    ),
+    'tsunami': (
+        "Move to higher ground immediately",
+        "Follow evacuation routes",
+        "Stay away from coastal areas"
+    )
+})
+
+# General recommendations added by alert level
+LEVEL_RECOMMENDATIONS = MappingProxyType({
+    AlertLevel.CRITICAL: (
+        "Take immediate action",
+        "Follow all emergency instructions",
+        "Contact emergency services if in immediate danger"
+    ),
+    AlertLevel.HIGH: (
+        "Prepare for immediate action",
+        "Monitor official communications",
+        "Review evacuation plans"
+    ),
+    AlertLevel.MEDIUM: (),
+    AlertLevel.LOW: ()
+})
+
+# Every (disaster type, level) combination, built once and shared by all alerts
+RECOMMENDATIONS = MappingProxyType({
+    (disaster_type, level): type_recs + level_recs
+    for disaster_type, type_recs in DISASTER_RECOMMENDATIONS.items()
+    for level, level_recs in LEVEL_RECOMMENDATIONS.items()
+})
+
 class AlertGenerator:
-    def __init__(self):
-        pass
+    def __init__(self,
+                 confidence_threshold: Optional[float] = None,
+                 critical_threshold: float = 0.9,
+                 cluster_radius_km: float = 25.0,
+                 cluster_window_minutes: int = 120,
+                 store=None,
+                 surge_detector: Optional[SurgeDetector] = None):
+        """
+        Args:
+            confidence_threshold: If given, detections below this confidence
+                raise no alert; by default every detection does
+            critical_threshold: Confidence needed for a critical alert
+            cluster_radius_km: Distance within which reports form one incident
+            cluster_window_minutes: Time gap after which an incident is closed
+            store: Alert store backend, an expiring in-memory store unless given
+            surge_detector: Report rate tracker, a default SurgeDetector unless given
+        """
+        self.confidence_threshold = confidence_threshold
+        self.critical_threshold = critical_threshold
+        self.severity_levels = {
+            'extreme': AlertLevel.CRITICAL,
+            'severe': AlertLevel.HIGH,
+            'high': AlertLevel.HIGH,
+            'medium': AlertLevel.MEDIUM,
+            'low': AlertLevel.LOW
+        }
+        self.store = store or ExpiringAlertStore(MemoryAlertStore())
+        self.clusterer = IncidentClusterer(
+            radius_km=cluster_radius_km,
+            window=timedelta(minutes=cluster_window_minutes)
+        )
+        # Warning areas of alerts that carry polygon geometry
+        self.areas = PolygonIndex()
+        # Every detection counts towards report rates, merged or not
+        self.surges = surge_detector or SurgeDetector()
+        if hasattr(self.store, 'add_listener'):
+            # An expired incident must not absorb new reports
+            self.store.add_listener(lambda alert, reason: self.clusterer.discard(alert['id']))
+            self.store.add_listener(lambda alert, reason: self.areas.remove(alert['id']))
+    
+    def generate_alerts(self, detection_results: List[Dict]) -> List[DetectionAlert]:
+        """
+        Create alerts for a batch of detection results
+        
+        The batch shares one timestamp and writes every new or updated
+        incident to the store in a single call; levels and recommendations
+        are the same as _create_alert gives for each result on its own.
+        
+        Args:
+            detection_results: Results from the disaster detector
+            
+        Returns:
+            New incident alerts; results merged into existing incidents or
+            below the confidence threshold produce none
+        """
+        timestamp = datetime.now(timezone.utc).isoformat()
+        created = []
+        changed: Dict[str, DetectionAlert] = {}
+        for result in detection_results:
+            confidence = result['confidence_score']
+            if self.confidence_threshold is not None and confidence < self.confidence_threshold:
+                continue
+            probability = result['probabilities']['disaster']
+            alert_level = self._determine_alert_level(
+                self._base_level(result['severity']),
+                confidence,
+                probability
+            )
+            alert = self._build_alert(result, alert_level, confidence, probability, timestamp)
+            self.surges.observe_alert(alert)
+            incident, is_new = self.clusterer.add(alert)
+            if is_new:
+                created.append(alert)
+            else:
+                self._escalate_incident(incident)
+            changed[incident['id']] = incident
+        
+        self._save_alerts(changed.values())
+        return created
+    
+    def _save_alerts(self, alerts):
+        """Write alerts to the store and index their warning areas"""
+        alerts = list(alerts)
+        self.store.add_many(alerts)
+        for alert in alerts:
+            if alert.get('geometry'):
+                self.areas.add(alert['id'], alert['geometry'])
     
-    def generate_alerts(self, predictions, posts):
-        """Dummy alert generation method for sample implementation"""
-        return []
+    def _base_level(self, severity: Optional[str]) -> AlertLevel:
+        """Initial alert level for a detector severity"""
+        return self.severity_levels.get((severity or '').lower(), AlertLevel.LOW)
+    
+    def _build_alert(self,
+                     detection_result: Dict,
+                     alert_level: AlertLevel,
+                     confidence: float,
+                     probability: float,
+                     timestamp: str) -> DetectionAlert:
+        """Build the alert record for a single detection result"""
+        return DetectionAlert(
+            id=str(uuid.uuid4()),
+            timestamp=timestamp,
+            alert_level=alert_level,
+            disaster_type=detection_result['disaster_type'],
+            confidence_score=confidence,
+            probability=probability,
+            locations=detection_result['locations'],
+            geometry=detection_result.get('geometry'),
+            keywords=detection_result['keywords'],
+            entities=detection_result['entities'],
+            recommendations=self._generate_recommendations(
+                detection_result['disaster_type'],
+                alert_level
+            ),
+            status='active'
+        )
     
     def _create_alert(self, detection_result: Dict) -> Optional[Dict]:
         """
@@ -26,17 +207,17 @@ class AlertGenerator:
             detection_result: Single result from disaster detector
             
         Returns:
-            Structured alert dictionary or None if alert should not be generated
+            Structured alert dictionary, or None if the detection was merged
+            into an existing incident or should not be alerted on
         """
         # Extract base information
         disaster_prob = detection_result['probabilities']['disaster']
         confidence = detection_result['confidence_score']
+        if self.confidence_threshold is not None and confidence < self.confidence_threshold:
+            return None
         
         # Determine alert level
-        base_level = self.severity_levels.get(
-            detection_result['severity'],
-            AlertLevel.LOW
-        )
+        base_level = self._base_level(detection_result['severity'])
         
         # Adjust level based on confidence
         alert_level = self._determine_alert_level(
@@ -46,24 +227,43 @@ class AlertGenerator:
         )
         
         # Create alert structure
-        alert = {
-            'id': str(uuid.uuid4()),
-            'timestamp': datetime.utcnow().isoformat(),
-            'alert_level': alert_level,
-            'disaster_type': detection_result['disaster_type'],
-            'confidence_score': confidence,
-            'probability': disaster_prob,
-            'locations': detection_result['locations'],
-            'keywords': detection_result['keywords'],
-            'entities': detection_result['entities'],
-            'recommendations': self._generate_recommendations(
-                detection_result['disaster_type'],
-                alert_level
-            ),
-            'status': 'active'
-        }
+        alert = self._build_alert(
+            detection_result,
+            alert_level,
+            confidence,
+            disaster_prob,
+            datetime.now(timezone.utc).isoformat()
+        )
+        
+        # Reports about the same event fold into one incident alert
+        self.surges.observe_alert(alert)
+        incident, is_new = self.clusterer.add(alert)
+        if is_new:
+            self._save_alerts([alert])
+            return alert
         
-        return alert
+        self._escalate_incident(incident)
+        self._save_alerts([incident])
+        return None
+    
+    def _escalate_incident(self, incident: Dict):
+        """
+        Raise an incident's level if its aggregated confidence now warrants it
+        
+        Args:
+            incident: Incident alert whose confidence was just updated
+        """
+        level = self._determine_alert_level(
+            incident['alert_level'],
+            incident['confidence_score'],
+            incident['probability']
+        )
+        if LEVEL_RANK[level] > LEVEL_RANK[incident['alert_level']]:
+            incident['alert_level'] = level
+            incident['recommendations'] = self._generate_recommendations(
+                incident['disaster_type'],
+                level
+            )
     
     def _determine_alert_level(self,
                              base_level: AlertLevel,
@@ -91,7 +291,7 @@ class AlertGenerator:
     
     def _generate_recommendations(self,
                                 disaster_type: str,
-                                alert_level: AlertLevel) -> List[str]:
+                                alert_level: AlertLevel) -> Tuple[str, ...]:
         """
         Generate specific recommendations based on disaster type and alert level
         
@@ -100,96 +300,58 @@ class AlertGenerator:
             alert_level: Determined alert level
             
         Returns:
-            List of recommendations
+            Shared, immutable tuple of recommendations
         """
-        recommendations = []
-        
-        # Basic recommendations by disaster type
-        disaster_recommendations = {
-            'earthquake': [
-                "Drop, Cover, and Hold On",
-                "Stay away from windows and exterior walls",
-                "If inside, stay inside; if outside, move to open area"
-            ],
-            'flood': [
-                "Move to higher ground immediately",
-                "Avoid walking or driving through flood waters",
-                "Follow evacuation orders from local authorities"
-            ],
-            'hurricane': [
-                "Board up windows and secure loose outdoor items",
-                "Prepare emergency supplies and evacuation plan",
-                "Follow local authority evacuation orders"
-            ],
-            'tornado': [
-                "Seek shelter in basement or interior room",
-                "Stay away from windows and exterior walls",
-                "Keep monitoring local weather updates"
-            ],
-            'wildfire': [
-                "Follow evacuation orders immediately",
-                "Prepare emergency supplies",
-                "Close all windows and doors"
-            ],
-            'tsunami': [
-                "Move to higher ground immediately",
-                "Follow evacuation routes",
-                "Stay away from coastal areas"
-            ]
-        }
-        
-        # Get basic recommendations for disaster type
-        if disaster_type in disaster_recommendations:
-            recommendations.extend(disaster_recommendations[disaster_type])
-        
-        # Add general recommendations based on alert level
-        if alert_level == AlertLevel.CRITICAL:
-            recommendations.extend([
-                "Take immediate action",
-                "Follow all emergency instructions",
-                "Contact emergency services if in immediate danger"
-            ])
-        elif alert_level == AlertLevel.HIGH:
-            recommendations.extend([
-                "Prepare for immediate action",
-                "Monitor official communications",
-                "Review evacuation plans"
-            ])
-        
+        alert_level = AlertLevel(alert_level)
+        recommendations = RECOMMENDATIONS.get((disaster_type, alert_level))
+        if recommendations is None:
+            # Unknown disaster type: general advice for the level only
+            recommendations = LEVEL_RECOMMENDATIONS[alert_level]
         return recommendations
     
     def get_active_alerts(self) -> List[Dict]:
         """Get all active alerts"""
-        return [alert for alert in self.alerts if alert['status'] == 'active']
+        return self.store.query(status='active')
     
     def get_alert_by_id(self, alert_id: str) -> Optional[Dict]:
         """Get specific alert by ID"""
-        for alert in self.alerts:
-            if alert['id'] == alert_id:
-                return alert
-        return None
+        return self.store.get(alert_id)
     
     def update_alert_status(self, alert_id: str, status: str) -> bool:
         """Update the status of an alert"""
-        for alert in self.alerts:
-            if alert['id'] == alert_id:
-                alert['status'] = status
-                return True
-        return False
+        return self.store.update_status(alert_id, status)
     
     def get_alerts_by_level(self, level: AlertLevel) -> List[Dict]:
         """Get all alerts of a specific level"""
-        return [
-            alert for alert in self.alerts 
-            if alert['alert_level'] == level and alert['status'] == 'active'
-        ]
+        return self.store.query(status='active', level=level)
     
     def get_alerts_by_location(self, lat: float, lon: float, radius_km: float = 50) -> List[Dict]:
-        """Get alerts within a radius of a location"""
+        """
+        Get alerts relevant to a location
+        
+        Alerts with a warning area (polygon geometry) match when the point
+        lies inside the area, found through the polygon index. Other alerts
+        match when one of their locations is within the radius.
+        
+        Args:
+            lat: Latitude of the location
+            lon: Longitude of the location
+            radius_km: Search radius for alerts without a warning area
+            
+        Returns:
+            Matching active alerts
+        """
         from geopy.distance import geodesic
         
         nearby_alerts = []
+        for alert_id in self.areas.covering(lat, lon):
+            alert = self.store.get(alert_id)
+            if alert is not None and alert.get('status') == 'active':
+                nearby_alerts.append(alert)
+        
         for alert in self.get_active_alerts():
+            if alert['id'] in self.areas:
+                continue
             for location in alert['locations']:
                 distance = geodesic(
                     (lat, lon),
@@ -199,4 +361,4 @@ class AlertGenerator:
                     nearby_alerts.append(alert)
                     break
         
-        return nearby_alerts 
\ No newline at end of file
+        return nearby_alerts
@@ -0,0 +1,185 @@
+import copy
+import sys
+from enum import Enum
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+
+class WireEnum(str, Enum):
+    """String enum that formats as its plain value"""
+
+    def __str__(self) -> str:
+        return self.value
+
+    def __format__(self, spec: str) -> str:
+        return self.value.__format__(spec)
+
+
+class Source(WireEnum):
+    TWITTER = "twitter"
+    REDDIT = "reddit"
+    WEATHER = "weather"
+
+
+class Severity(WireEnum):
+    EXTREME = "Extreme"
+    SEVERE = "Severe"
+    HIGH = "High"
+    MEDIUM = "Medium"
+    MODERATE = "Moderate"
+    LOW = "Low"
+    MINOR = "Minor"
+
+
+def intern_value(enum_cls, value):
+    """
+    Map a string to its shared enum member, or intern it if unknown
+
+    Either way every alert with the same value points at one object.
+    """
+    if value is None or isinstance(value, enum_cls):
+        return value
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return sys.intern(value)
+
+
+class AlertRecord:
+    """
+    Base for compact alert records
+
+    Subclasses declare their fields in ``__slots__``, so a record holds one
+    pointer per field instead of a per-instance dict with repeated keys.
+    Records also behave like the dicts they replace (``alert['source']``,
+    ``alert.get(...)``, item assignment), so existing code keeps working.
+    Fields left as None are omitted from the wire format.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown {type(self).__name__} fields: {', '.join(fields)}")
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            value = getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AlertRecord):
+            return type(self) is type(other) and self.to_wire() == other.to_wire()
+        if isinstance(other, dict):
+            return self.to_wire() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_wire()!r})"
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is not None:
+                yield name, value
+
+    def keys(self) -> Iterator[str]:
+        return (name for name, _ in self.items())
+
+    def copy(self) -> 'AlertRecord':
+        """Shallow copy, like dict.copy()"""
+        return copy.copy(self)
+
+    def to_wire(self) -> Dict[str, Any]:
+        """Plain dict for JSON encoding, nested records included"""
+        wire = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            if isinstance(value, AlertRecord):
+                value = value.to_wire()
+            wire[name] = value
+        return wire
+
+
+class GeoPoint(AlertRecord):
+    """Latitude/longitude pair, encoded as {"lat": ..., "lon": ...}"""
+
+    __slots__ = ('lat', 'lon')
+
+    def __init__(self, lat: float, lon: float):
+        self.lat = float(lat)
+        self.lon = float(lon)
+
+    @classmethod
+    def from_value(cls, value) -> Optional['GeoPoint']:
+        """Build from a {"lat", "lon"} dict, an existing point, or None"""
+        if value is None or isinstance(value, GeoPoint):
+            return value
+        return cls(value['lat'], value['lon'])
+
+
+class FeedAlert(AlertRecord):
+    """
+    Alert fetched from a source feed (Twitter, Reddit, NWS, samples)
+
+    NWS warnings also carry their ``event`` type and full ``description``.
+    """
+
+    __slots__ = (
+        'id', 'source', 'text', 'description', 'event', 'severity', 'created_at',
+        'location', 'coordinates', 'geometry', 'details', 'engagement', 'status'
+    )
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        self.source = intern_value(Source, self.source)
+        self.severity = intern_value(Severity, self.severity)
+        if self.event is not None:
+            self.event = sys.intern(self.event)
+        self.description = self.description or None
+        self.coordinates = GeoPoint.from_value(self.coordinates)
+        # Empty nested data costs a dict per alert; keep it unset instead
+        self.details = self.details or None
+        self.engagement = self.engagement or None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FeedAlert':
+        """Build a record from a collector dict, ignoring unknown keys"""
+        return cls(**{k: v for k, v in data.items() if k in cls.__slots__})
+
+
+class DetectionAlert(AlertRecord):
+    """Alert generated from a disaster detection result"""
+
+    __slots__ = (
+        'id', 'timestamp', 'alert_level', 'disaster_type', 'confidence_score',
+        'probability', 'locations', 'geometry', 'keywords', 'entities',
+        'recommendations', 'status', 'report_count', 'last_report_at'
+    )
+
+    def __init__(self, **fields):
+        super().__init__(**fields)
+        if self.disaster_type is not None:
+            self.disaster_type = sys.intern(self.disaster_type)
+        self.entities = self.entities or None
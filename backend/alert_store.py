@@ -0,0 +1,588 @@
+import fcntl
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from serialization import dumps, loads
+
+
+def utc_timestamp(value: Union[str, datetime, None]) -> str:
+    """
+    Normalise a timestamp to the UTC form the store indexes and compares
+
+    Feeds mix naive local times, UTC ``Z`` times and ``-05:00`` style
+    offsets (NWS); as raw strings these do not sort in time order. Naive
+    times are read as local time. Microseconds are always written so the
+    strings compare lexicographically.
+
+    Args:
+        value: ISO 8601 string or datetime
+
+    Returns:
+        ``YYYY-MM-DDTHH:MM:SS.ffffffZ``, or the value unchanged if it is
+        empty or not an ISO timestamp
+    """
+    if not value:
+        return ''
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _index_fields(alert: Dict) -> Tuple[str, str, str, str]:
+    """
+    Pull the indexed columns out of an alert
+
+    Detection alerts carry ``timestamp``/``alert_level``; feed alerts from
+    the collectors carry ``created_at``/``severity`` instead. The timestamp
+    is indexed in UTC, see utc_timestamp.
+
+    Returns:
+        Tuple of (id, timestamp, level, status)
+    """
+    return (
+        alert['id'],
+        utc_timestamp(alert.get('timestamp') or alert.get('created_at')),
+        *_level_and_status(alert)
+    )
+
+
+def _level_and_status(alert: Dict) -> Tuple[str, str]:
+    """The (level, status) columns of _index_fields"""
+    level = alert.get('alert_level') or alert.get('severity') or ''
+    return getattr(level, 'value', level), alert.get('status', 'active')
+
+
+class MemoryAlertStore:
+    """
+    Alert store kept in process memory
+
+    The default backend; contents are lost on restart. ``version`` is bumped
+    on every change so callers can tell whether their snapshot is stale; it
+    restarts at 0, so ``epoch`` tells this instance apart from earlier ones.
+    Each alert remembers the version it was last written at, and its JSON
+    encoding is cached until that changes. Responses may read it from a
+    threadpool while the event loop writes, so reads work on a snapshot
+    taken under the store's lock.
+    """
+
+    def __init__(self):
+        self.alerts: Dict[str, Dict] = {}
+        self.revisions: Dict[str, int] = {}
+        # Indexed UTC timestamps, normalised once per write
+        self.timestamps: Dict[str, str] = {}
+        self._fragments: Dict[str, Tuple[int, bytes]] = {}
+        self.version = 0
+        self.epoch = os.urandom(4).hex()
+        self.fragment_hits = 0
+        self.fragment_misses = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.alerts)
+
+    def add(self, alert: Dict):
+        """Insert an alert, replacing any stored alert with the same id"""
+        self.add_many([alert])
+
+    def add_many(self, alerts: Iterable[Dict]) -> int:
+        """
+        Insert or replace a batch of alerts
+
+        Args:
+            alerts: Alerts with an ``id`` field
+
+        Returns:
+            Number of alerts written
+        """
+        rows = [(_index_fields(alert), alert) for alert in alerts]
+        with self._lock:
+            revision = self.version + 1
+            for (alert_id, timestamp, _, _), alert in rows:
+                self.alerts[alert_id] = alert
+                self.revisions[alert_id] = revision
+                self.timestamps[alert_id] = timestamp
+            if rows:
+                self.version = revision
+        return len(rows)
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        """Get a stored alert by id"""
+        return self.alerts.get(alert_id)
+
+    def update_status(self, alert_id: str, status: str) -> bool:
+        """Update the status of a stored alert"""
+        with self._lock:
+            alert = self.alerts.get(alert_id)
+            if alert is None:
+                return False
+            alert['status'] = status
+            self.version += 1
+            self.revisions[alert_id] = self.version
+        return True
+
+    def fragment(self, alert_id: str) -> Optional[bytes]:
+        """
+        Get the JSON encoding of a stored alert
+
+        Encoded once per alert revision and reused by every response and
+        broadcast until the alert changes.
+        """
+        with self._lock:
+            alert = self.alerts.get(alert_id)
+            if alert is None:
+                return None
+            revision = self.revisions[alert_id]
+            cached = self._fragments.get(alert_id)
+            if cached is None or cached[0] != revision:
+                self.fragment_misses += 1
+                cached = (revision, dumps(alert))
+                self._fragments[alert_id] = cached
+            else:
+                self.fragment_hits += 1
+        return cached[1]
+
+    def remove_many(self, alert_ids: Iterable[str]) -> int:
+        """
+        Delete alerts by id
+
+        Args:
+            alert_ids: Ids of the alerts to delete
+
+        Returns:
+            Number of alerts deleted
+        """
+        count = 0
+        with self._lock:
+            for alert_id in alert_ids:
+                if self.alerts.pop(alert_id, None) is not None:
+                    del self.revisions[alert_id]
+                    del self.timestamps[alert_id]
+                    self._fragments.pop(alert_id, None)
+                    count += 1
+            if count:
+                self.version += 1
+        return count
+
+    def index_rows(self) -> Iterable[Tuple[str, str, str, str]]:
+        """Iterate (id, timestamp, level, status) for every stored alert"""
+        with self._lock:
+            alerts = list(self.alerts.values())
+        return [_index_fields(alert) for alert in alerts]
+
+    def _sorted_keys(self, status, level, since, after) -> List[Tuple[str, str]]:
+        level = getattr(level, 'value', level)
+        since = utc_timestamp(since)
+        after = (utc_timestamp(after[0]), after[1]) if after else None
+        with self._lock:
+            rows = [(alert_id, alert, self.timestamps[alert_id]) for alert_id, alert in self.alerts.items()]
+        keys = []
+        for alert_id, alert, timestamp in rows:
+            alert_level, alert_status = _level_and_status(alert)
+            if status and alert_status != status:
+                continue
+            if level and alert_level != level:
+                continue
+            if since and timestamp <= since:
+                continue
+            if after and (timestamp, alert_id) >= tuple(after):
+                continue
+            keys.append((timestamp, alert_id))
+
+        keys.sort(reverse=True)
+        return keys
+
+    def query(self,
+              status: Optional[str] = None,
+              level: Optional[str] = None,
+              since: Optional[str] = None,
+              limit: Optional[int] = None,
+              after: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        Get alerts matching the filters, newest first
+
+        Args:
+            status: Only alerts with this status
+            level: Only alerts with this level or severity
+            since: Only alerts with an ISO timestamp after this one; naive
+                times are local time
+            limit: Maximum number of alerts returned
+            after: (timestamp, id) keyset cursor; only alerts ordered after it
+
+        Returns:
+            List of matching alerts
+        """
+        keys = self._sorted_keys(status, level, since, after)[:limit]
+        alerts = (self.alerts.get(alert_id) for _, alert_id in keys)
+        return [alert for alert in alerts if alert is not None]
+
+    def iter_query(self,
+                   status: Optional[str] = None,
+                   level: Optional[str] = None,
+                   since: Optional[str] = None,
+                   after: Optional[Tuple[str, str]] = None,
+                   chunk_size: int = 500) -> Iterator[Dict]:
+        """
+        Iterate alerts matching the filters, newest first, in bounded chunks
+
+        Ordering is by (timestamp, id) descending. Resuming from the cursor
+        of the last alert seen is stable while new alerts arrive: they sort
+        ahead of the cursor and never shift the remaining pages.
+
+        Args:
+            status: Only alerts with this status
+            level: Only alerts with this level or severity
+            since: Only alerts with an ISO timestamp after this one; naive
+                times are local time
+            after: (timestamp, id) cursor of the last alert already seen
+            chunk_size: Alerts fetched from the backend per round trip
+
+        Yields:
+            Matching alerts
+        """
+        # Only the sort keys are materialised; alerts are looked up lazily
+        for _, alert_id in self._sorted_keys(status, level, since, after):
+            alert = self.alerts.get(alert_id)
+            if alert is not None:
+                yield alert
+
+    def iter_encoded(self, **filters) -> Iterator[Tuple[Dict, bytes]]:
+        """Like iter_query, but yields (alert, cached JSON encoding) pairs"""
+        for alert in self.iter_query(**filters):
+            fragment = self.fragment(alert['id'])
+            # Removed since the keys were taken
+            if fragment is not None:
+                yield alert, fragment
+
+    def close(self):
+        pass
+
+
+class SQLiteAlertStore:
+    """
+    Durable alert store on SQLite in write-ahead-log mode
+
+    Alerts are kept as JSON payloads next to indexed time, level and status
+    columns, so filtered queries are served from the indexes and a restarted
+    worker can answer requests straight from disk without re-polling sources.
+    ``version`` is persisted, but each worker has its own file and counter,
+    so ``epoch`` identifies this instance as well.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file, created if missing
+        """
+        self.path = path
+        self.epoch = os.urandom(4).hex()
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs at checkpoints; commits stay durable
+        # against process crashes, which is what a restart needs
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                id TEXT NOT NULL UNIQUE,
+                timestamp TEXT NOT NULL,
+                alert_level TEXT NOT NULL,
+                status TEXT NOT NULL,
+                payload BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp, id);
+            CREATE INDEX IF NOT EXISTS idx_alerts_level ON alerts (alert_level, status, timestamp, id);
+            CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts (status, timestamp, id);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+        """)
+        self.version = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()[0]
+        self._normalise_timestamps()
+
+    def _normalise_timestamps(self):
+        """Rewrite timestamps indexed before they were normalised to UTC"""
+        rows = [
+            (utc_timestamp(timestamp), alert_id)
+            for alert_id, timestamp in self.conn.execute("SELECT id, timestamp FROM alerts")
+            if utc_timestamp(timestamp) != timestamp
+        ]
+        if rows:
+            with self._lock:
+                self.conn.execute("BEGIN")
+                self.conn.executemany("UPDATE alerts SET timestamp = ? WHERE id = ?", rows)
+                self.conn.execute("COMMIT")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM alerts").fetchone()[0]
+
+    def _bump_version(self):
+        self.version += 1
+        self.conn.execute("UPDATE meta SET value = ? WHERE key = 'version'", (self.version,))
+
+    def add(self, alert: Dict):
+        """Insert an alert, replacing any stored alert with the same id"""
+        self.add_many([alert])
+
+    def add_many(self, alerts: Iterable[Dict]) -> int:
+        """
+        Insert or replace a batch of alerts in a single transaction
+
+        Args:
+            alerts: Alerts with an ``id`` field
+
+        Returns:
+            Number of alerts written
+        """
+        rows = [
+            (*_index_fields(alert), dumps(alert))
+            for alert in alerts
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                # Upsert keeps the original seq so ordering stays stable
+                self.conn.executemany("""
+                    INSERT INTO alerts (id, timestamp, alert_level, status, payload)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        timestamp = excluded.timestamp,
+                        alert_level = excluded.alert_level,
+                        status = excluded.status,
+                        payload = excluded.payload
+                """, rows)
+                self._bump_version()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def get(self, alert_id: str) -> Optional[Dict]:
+        """Get a stored alert by id"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT payload FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+        return loads(row[0]) if row else None
+
+    def fragment(self, alert_id: str) -> Optional[bytes]:
+        """Get the JSON encoding of a stored alert, as written to disk"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT payload FROM alerts WHERE id = ?", (alert_id,)
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def update_status(self, alert_id: str, status: str) -> bool:
+        """Update the status of a stored alert"""
+        with self._lock:
+            alert = self.get(alert_id)
+            if alert is None:
+                return False
+            alert['status'] = status
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "UPDATE alerts SET status = ?, payload = ? WHERE id = ?",
+                (status, dumps(alert), alert_id)
+            )
+            self._bump_version()
+            self.conn.execute("COMMIT")
+        return True
+
+    def remove_many(self, alert_ids: Iterable[str]) -> int:
+        """
+        Delete alerts by id in a single transaction
+
+        Args:
+            alert_ids: Ids of the alerts to delete
+
+        Returns:
+            Number of alerts deleted
+        """
+        rows = [(alert_id,) for alert_id in alert_ids]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self.conn.execute("BEGIN")
+            try:
+                before = self.conn.total_changes
+                self.conn.executemany("DELETE FROM alerts WHERE id = ?", rows)
+                count = self.conn.total_changes - before
+                if count:
+                    self._bump_version()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def index_rows(self) -> Iterable[Tuple[str, str, str, str]]:
+        """Iterate (id, timestamp, level, status) for every stored alert"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, timestamp, alert_level, status FROM alerts"
+            ).fetchall()
+
+    def _select(self, status, level, since, after, limit) -> List[Tuple[str, str, str]]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if level:
+            clauses.append("alert_level = ?")
+            params.append(getattr(level, 'value', level))
+        if since:
+            clauses.append("timestamp > ?")
+            params.append(utc_timestamp(since))
+        if after:
+            clauses.append("(timestamp, id) < (?, ?)")
+            params.extend((utc_timestamp(after[0]), after[1]))
+
+        sql = "SELECT timestamp, id, payload FROM alerts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query(self,
+              status: Optional[str] = None,
+              level: Optional[str] = None,
+              since: Optional[str] = None,
+              limit: Optional[int] = None,
+              after: Optional[Tuple[str, str]] = None) -> List[Dict]:
+        """
+        Get alerts matching the filters, newest first
+
+        Args:
+            status: Only alerts with this status
+            level: Only alerts with this level or severity
+            since: Only alerts with an ISO timestamp after this one; naive
+                times are local time
+            limit: Maximum number of alerts returned
+            after: (timestamp, id) keyset cursor; only alerts ordered after it
+
+        Returns:
+            List of matching alerts
+        """
+        rows = self._select(status, level, since, after, limit)
+        return [loads(payload) for _, _, payload in rows]
+
+    def iter_query(self,
+                   status: Optional[str] = None,
+                   level: Optional[str] = None,
+                   since: Optional[str] = None,
+                   after: Optional[Tuple[str, str]] = None,
+                   chunk_size: int = 500) -> Iterator[Dict]:
+        """
+        Iterate alerts matching the filters, newest first, in bounded chunks
+
+        Ordering is by (timestamp, id) descending. Resuming from the cursor
+        of the last alert seen is stable while new alerts arrive: they sort
+        ahead of the cursor and never shift the remaining pages.
+
+        Args:
+            status: Only alerts with this status
+            level: Only alerts with this level or severity
+            since: Only alerts with an ISO timestamp after this one; naive
+                times are local time
+            after: (timestamp, id) cursor of the last alert already seen
+            chunk_size: Alerts fetched from the backend per round trip
+
+        Yields:
+            Matching alerts
+        """
+        for alert, _ in self.iter_encoded(status, level, since, after, chunk_size):
+            yield alert
+
+    def iter_encoded(self,
+                     status: Optional[str] = None,
+                     level: Optional[str] = None,
+                     since: Optional[str] = None,
+                     after: Optional[Tuple[str, str]] = None,
+                     chunk_size: int = 500) -> Iterator[Tuple[Dict, bytes]]:
+        """
+        Like iter_query, but yields (alert, JSON encoding) pairs
+
+        The stored payload is the encoding, so nothing is re-serialised.
+        """
+        while True:
+            rows = self._select(status, level, since, after, chunk_size)
+            for _, _, payload in rows:
+                yield loads(payload), bytes(payload)
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1][:2]
+
+    def close(self):
+        self.conn.close()
+
+
+# Lock files of the database slots claimed by this process, held until exit
+_claimed_slots: List = []
+
+
+def claim_worker_path(path: str, max_workers: int = 64) -> str:
+    """
+    This worker's database file for a configured ALERT_DB_PATH
+
+    Every uvicorn worker applies the same fan-out updates to its own store,
+    so workers must not share one SQLite file: they would upsert the same
+    rows and overwrite each other's version. Each worker claims a numbered
+    slot with an exclusive lock on ``<path>.<n>.lock``. Slot 0 keeps the
+    configured path and slot n uses ``<root>.<n><ext>``, so a single worker
+    is unaffected and a restarted worker warm-starts from a free slot's file.
+
+    Args:
+        path: Configured database path
+        max_workers: Number of slots to try
+
+    Returns:
+        Database path for this process
+    """
+    root, ext = os.path.splitext(path)
+    for slot in range(max_workers):
+        lock_file = open(f"{path}.{slot}.lock", 'a+')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            continue
+        _claimed_slots.append(lock_file)
+        return path if slot == 0 else f"{root}.{slot}{ext}"
+    raise RuntimeError(f"No free alert database slot for {path}")
+
+
+def create_alert_store(path: Optional[str] = None):
+    """
+    Create the configured alert store
+
+    Args:
+        path: SQLite database path; defaults to the ALERT_DB_PATH environment
+            variable. Without a path the in-memory store is used. Each
+            worker process gets its own file, see claim_worker_path.
+
+    Returns:
+        An alert store instance
+    """
+    path = path or os.getenv('ALERT_DB_PATH')
+    if path:
+        return SQLiteAlertStore(claim_worker_path(path))
+    return MemoryAlertStore()
@@ -0,0 +1,140 @@
+import asyncio
+import os
+from collections import deque
+from typing import Deque, List, Optional
+
+
+class Frame:
+    """One broadcast message, encoded once and shared by every client"""
+
+    __slots__ = ('id', 'epoch', 'event', 'data', '_sse', '_text')
+
+    def __init__(self, frame_id: int, epoch: str, event: str, data: bytes):
+        self.id = frame_id
+        self.epoch = epoch
+        self.event = event
+        self.data = data
+        self._sse: Optional[bytes] = None
+        self._text: Optional[str] = None
+
+    @property
+    def sse(self) -> bytes:
+        """Server-Sent Events encoding, built on first use"""
+        if self._sse is None:
+            self._sse = format_sse(self.data, self.event, f"{self.epoch}-{self.id}")
+        return self._sse
+
+    @property
+    def text(self) -> str:
+        """WebSocket text frame payload, built on first use"""
+        if self._text is None:
+            self._text = self.data.decode('utf-8')
+        return self._text
+
+
+def format_sse(data: bytes, event: Optional[str] = None, event_id: Optional[str] = None) -> bytes:
+    """
+    Encode a Server-Sent Events message
+
+    Args:
+        data: Single-line payload (compact JSON never contains newlines)
+        event: Event name, if any
+        event_id: Event id clients send back as Last-Event-ID
+
+    Returns:
+        Bytes of the complete event, terminated by a blank line
+    """
+    parts = []
+    if event_id is not None:
+        parts.append(b'id: ' + event_id.encode('utf-8') + b'\n')
+    if event is not None:
+        parts.append(b'event: ' + event.encode('utf-8') + b'\n')
+    parts.append(b'data: ' + data + b'\n\n')
+    return b''.join(parts)
+
+
+class FrameRing:
+    """
+    Bounded history of broadcast frames with numbered ids
+
+    The WebSocket broadcast and the SSE stream both read from the ring, so
+    each message is encoded once no matter how many clients or protocols
+    receive it. SSE clients resume from ``Last-Event-ID`` by replaying the
+    frames after it while they are still in the ring.
+
+    Waiting clients share a single future per append instead of holding a
+    queue each, which keeps the per-connection footprint small.
+
+    Event ids carry a per-process epoch, so an id issued by another worker
+    or before a restart is recognised as foreign and answered with a
+    snapshot instead of a wrong replay.
+    """
+
+    def __init__(self, capacity: int = 256):
+        """
+        Args:
+            capacity: Number of recent frames kept for resuming clients
+        """
+        self.frames: Deque[Frame] = deque(maxlen=capacity)
+        self.epoch = os.urandom(4).hex()
+        self.last_id = 0
+        self._waiter: Optional[asyncio.Future] = None
+
+    def append(self, event: str, data: bytes) -> Frame:
+        """Add a frame and wake every waiting client"""
+        self.last_id += 1
+        frame = Frame(self.last_id, self.epoch, event, data)
+        self.frames.append(frame)
+        if self._waiter is not None:
+            if not self._waiter.done():
+                self._waiter.set_result(None)
+            self._waiter = None
+        return frame
+
+    def event_id(self, frame_id: Optional[int] = None) -> str:
+        """SSE event id for a frame id, defaulting to the latest frame"""
+        return f"{self.epoch}-{self.last_id if frame_id is None else frame_id}"
+
+    def parse_event_id(self, value: Optional[str]) -> Optional[int]:
+        """
+        Frame id from a client's Last-Event-ID
+
+        Returns:
+            The frame id, or None if the value is missing, malformed or from
+            another epoch
+        """
+        epoch, _, frame_id = (value or '').partition('-')
+        if epoch != self.epoch or not frame_id.isdigit():
+            return None
+        return int(frame_id)
+
+    def since(self, last_id: int) -> Optional[List[Frame]]:
+        """
+        Frames newer than ``last_id``
+
+        Returns:
+            Frames in order, or None if some of them already fell out of the
+            ring and the client needs a fresh snapshot
+        """
+        if last_id >= self.last_id:
+            return []
+        if not self.frames or self.frames[0].id > last_id + 1:
+            return None
+        return [frame for frame in self.frames if frame.id > last_id]
+
+    async def wait(self, last_id: int, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until a frame newer than ``last_id`` is appended
+
+        Returns:
+            True if a new frame is available, False on timeout
+        """
+        if self.last_id > last_id:
+            return True
+        if self._waiter is None:
+            self._waiter = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._waiter), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
@@ -0,0 +1,64 @@
+"""
+Compare alert generation throughput: one _create_alert call per detection
+against a single batch generate_alerts call.
+
+Run from the backend directory:
+    python -m benchmarks.bench_alert_generation --detections 100000
+"""
+import argparse
+import random
+import time
+
+from alert_generator import AlertGenerator
+
+TYPES = ['earthquake', 'flood', 'hurricane', 'tornado', 'wildfire', 'tsunami', 'landslide']
+SEVERITIES = ['low', 'medium', 'high', 'extreme']
+
+
+def make_detections(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    detections = []
+    for _ in range(count):
+        detections.append({
+            'probabilities': {'disaster': rng.random()},
+            'confidence_score': rng.random(),
+            'severity': rng.choice(SEVERITIES),
+            'disaster_type': rng.choice(TYPES),
+            'locations': [{
+                'name': 'Somewhere',
+                'lat': rng.uniform(25, 49),
+                'lon': rng.uniform(-124, -67)
+            }],
+            'keywords': ['evacuation'],
+            'entities': {}
+        })
+    return detections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--detections', type=int, default=100_000)
+    args = parser.parse_args()
+
+    detections = make_detections(args.detections)
+
+    generator = AlertGenerator()
+    start = time.perf_counter()
+    single = [generator._create_alert(d) for d in detections]
+    single_elapsed = time.perf_counter() - start
+    single_count = sum(alert is not None for alert in single)
+
+    generator = AlertGenerator()
+    start = time.perf_counter()
+    batch = generator.generate_alerts(detections)
+    batch_elapsed = time.perf_counter() - start
+
+    print(f"{args.detections:,} detections")
+    print(f"  _create_alert loop: {single_elapsed:6.2f}s  "
+          f"{args.detections / single_elapsed:>10,.0f} detections/s  {single_count:,} alerts")
+    print(f"  generate_alerts:    {batch_elapsed:6.2f}s  "
+          f"{args.detections / batch_elapsed:>10,.0f} detections/s  {len(batch):,} alerts")
+
+
+if __name__ == '__main__':
+    main()
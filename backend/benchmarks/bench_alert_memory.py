@@ -0,0 +1,65 @@
+"""
+Measure memory per alert for plain dicts versus FeedAlert records.
+
+Run from the backend directory:
+    python -m benchmarks.bench_alert_memory --counts 100000 1000000
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from alert_record import FeedAlert
+
+SOURCES = ['twitter', 'reddit', 'weather']
+SEVERITIES = ['Extreme', 'Severe', 'Medium']
+
+
+def raw_alert(i: int, rng: random.Random, start: datetime):
+    # Build values the way a collector does: fresh strings per alert
+    alert = {
+        'id': f'{i:024x}',
+        'source': ''.join(rng.choice(SOURCES)),
+        'text': f'Flooding reported near exit {i}, avoid the area',
+        'severity': ''.join(rng.choice(SEVERITIES)),
+        'created_at': (start - timedelta(seconds=i)).isoformat(),
+        'location': None,
+        'coordinates': {'lat': rng.uniform(25, 49), 'lon': rng.uniform(-124, -67)},
+        'engagement': {
+            'shares': rng.randint(10, 1000),
+            'comments': rng.randint(5, 500),
+            'verified_reports': rng.randint(1, 50)
+        },
+        'details': {'reported_by': 'Local PD'} if i % 3 == 0 else {},
+        'status': 'active'
+    }
+    return alert
+
+
+def measure(count: int, build) -> float:
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    gc.collect()
+    tracemalloc.start()
+    alerts = [build(raw_alert(i, rng, start)) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del alerts
+    return current / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--counts', type=int, nargs='+', default=[100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'alerts':>10}{'dict B/alert':>16}{'record B/alert':>16}{'saving':>10}")
+    for count in args.counts:
+        as_dict = measure(count, lambda alert: alert)
+        as_record = measure(count, FeedAlert.from_dict)
+        print(f"{count:>10,}{as_dict:>16.0f}{as_record:>16.0f}{1 - as_record / as_dict:>10.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Measure SQLiteAlertStore insert throughput, query latency and warm-start
+time at a large alert count.
+
+Run from the backend directory:
+    python -m benchmarks.bench_alert_store --alerts 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from alert_store import SQLiteAlertStore
+
+LEVELS = ['critical', 'high', 'medium', 'low']
+TYPES = ['earthquake', 'flood', 'hurricane', 'tornado', 'wildfire', 'tsunami']
+
+
+def make_alerts(count: int, start: datetime, rng: random.Random):
+    for i in range(count):
+        yield {
+            'id': str(uuid.UUID(int=rng.getrandbits(128))),
+            'timestamp': (start + timedelta(seconds=i)).isoformat(),
+            'alert_level': rng.choice(LEVELS),
+            'disaster_type': rng.choice(TYPES),
+            'confidence_score': rng.random(),
+            'probability': rng.random(),
+            'locations': [{'name': 'Somewhere', 'lat': rng.uniform(25, 49), 'lon': rng.uniform(-124, -67)}],
+            'keywords': ['evacuation'],
+            'entities': {},
+            'recommendations': [],
+            'status': 'active' if rng.random() < 0.2 else 'resolved'
+        }
+
+
+def time_queries(label: str, fn, repeat: int = 50):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"  {label:<36} p50 {statistics.median(samples):8.2f} ms   p99 {p99:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--alerts', type=int, default=1_000_000)
+    parser.add_argument('--batch', type=int, default=10_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start_time = datetime(2024, 1, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'alerts.db')
+        store = SQLiteAlertStore(path)
+
+        batch, ids = [], []
+        start = time.perf_counter()
+        for alert in make_alerts(args.alerts, start_time, rng):
+            batch.append(alert)
+            if len(ids) < 1000:
+                ids.append(alert['id'])
+            if len(batch) >= args.batch:
+                store.add_many(batch)
+                batch = []
+        store.add_many(batch)
+        elapsed = time.perf_counter() - start
+        print(f"Inserted {args.alerts:,} alerts in {elapsed:.1f}s "
+              f"({args.alerts / elapsed:,.0f} alerts/s, batch {args.batch})")
+        store.close()
+
+        start = time.perf_counter()
+        store = SQLiteAlertStore(path)
+        recent = store.query(status='active', limit=100)
+        print(f"Warm start (open + first query): {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{len(recent)} alerts")
+
+        last_hour = (start_time + timedelta(seconds=args.alerts) - timedelta(hours=1)).isoformat()
+        print("Query latency:")
+        time_queries("get by id", lambda: store.get(rng.choice(ids)))
+        time_queries("active, newest 100", lambda: store.query(status='active', limit=100))
+        time_queries("critical active, newest 100",
+                     lambda: store.query(status='active', level='critical', limit=100))
+        time_queries("last hour", lambda: store.query(since=last_hour), repeat=20)
+        time_queries("update status", lambda: store.update_status(rng.choice(ids), 'resolved'))
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Measure "which warnings cover this point" lookups over many NWS-like
+polygons: the grid-indexed vectorized PolygonIndex against testing every
+polygon in Python.
+
+Run from the backend directory:
+    python -m benchmarks.bench_area_lookup --polygons 5000 --points 2000
+"""
+import argparse
+import math
+import random
+import time
+
+from geo_polygons import PolygonIndex
+
+
+def random_area(rng: random.Random):
+    # Warning areas a few tens of km across with ~40 vertices, over the US
+    cx, cy = rng.uniform(-124, -67), rng.uniform(25, 49)
+    radius = rng.uniform(0.1, 1.0)
+    points = []
+    for k in range(40):
+        angle = 2 * math.pi * k / 40
+        r = radius * rng.uniform(0.6, 1.0)
+        points.append([cx + r * math.cos(angle), cy + r * math.sin(angle)])
+    points.append(points[0])
+    return points
+
+
+def inside(points, lon, lat):
+    result = False
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            result = not result
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--polygons', type=int, default=5000)
+    parser.add_argument('--points', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    areas = {f'area-{i}': random_area(rng) for i in range(args.polygons)}
+    points = [(rng.uniform(25, 49), rng.uniform(-124, -67)) for _ in range(args.points)]
+
+    start = time.perf_counter()
+    index = PolygonIndex()
+    for area_id, ring in areas.items():
+        index.add(area_id, {'type': 'Polygon', 'coordinates': [ring]})
+    build = time.perf_counter() - start
+
+    index.covering(*points[0])  # build the first cell pack outside the timing
+    start = time.perf_counter()
+    indexed = [sorted(index.covering(lat, lon)) for lat, lon in points]
+    indexed_time = time.perf_counter() - start
+
+    scan_points = points[:max(1, args.points // 20)]
+    start = time.perf_counter()
+    scanned = [sorted(a for a, ring in areas.items() if inside(ring, lon, lat)) for lat, lon in scan_points]
+    scan_time = (time.perf_counter() - start) / len(scan_points) * len(points)
+
+    assert scanned == indexed[:len(scan_points)]
+    print(f"{args.polygons} polygons, index built in {build * 1000:.0f} ms")
+    print(f"{'method':<28}{'us/lookup':>12}")
+    print(f"{'python scan (extrapolated)':<28}{scan_time / len(points) * 1e6:>12.1f}")
+    print(f"{'grid + vectorized':<28}{indexed_time / len(points) * 1e6:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+"""
+End-to-end load test of the API against local upstream stubs.
+
+Starts benchmarks.stub_upstreams and the API in uvicorn subprocesses, with
+the API's Twitter client pointed at the stubs and polling every couple of
+seconds, then:
+
+  1. drives /api/alerts with concurrent HTTP clients for a fixed time
+     (latency percentiles, throughput, error count), and
+  2. connects thousands of /ws clients and times the initial snapshot and
+     every live broadcast, from the broadcast's server timestamp to its
+     arrival (fan-out latency), along with the server's memory per client.
+
+Results are compared with a stored baseline and every metric that got
+worse by more than the tolerance is flagged; the exit status is 1 if any
+did. Use --save-baseline to record a new baseline after an intended change.
+With --replay the API ingests a recorded or synthetic feed log instead of
+polling the stubs, for heavier and reproducible update streams.
+Client and server share the machine, so compare runs on the same host and
+with the same options.
+
+Run from the backend directory:
+    python -m benchmarks.bench_end_to_end --http-clients 50 --ws-clients 2000
+    python -m benchmarks.bench_end_to_end --upstream-latency-ms 300 --upstream-error-rate 0.2
+    python -m benchmarks.bench_end_to_end --replay synthetic.feed --replay-speed 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+import orjson
+import websockets
+
+from benchmarks.bench_stream_memory import free_port, rss_kib, start_server
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'baseline_end_to_end.json')
+
+# Metric -> whether larger values are better
+METRICS = {
+    'http_p50_ms': False,
+    'http_p99_ms': False,
+    'http_requests_per_sec': True,
+    'ws_connect_p50_ms': False,
+    'ws_connect_p99_ms': False,
+    'ws_broadcast_p50_ms': False,
+    'ws_broadcast_p99_ms': False,
+    'ws_kib_per_client': False,
+    'server_peak_rss_mib': False,
+}
+# Differences below this are noise whatever the ratio (ms, req/s, KiB, MiB)
+ABSOLUTE_SLACK = 2.0
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def peak_rss_kib(pid: int) -> int:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    raise RuntimeError('VmHWM not found')
+
+
+def start_stubs(port: int, args) -> subprocess.Popen:
+    stubs = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.stub_upstreams', '--port', str(port),
+        '--latency-ms', str(args.upstream_latency_ms),
+        '--jitter-ms', str(args.upstream_jitter_ms),
+        '--error-rate', str(args.upstream_error_rate),
+        '--seed', str(args.seed),
+    ])
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/_stub/stats', timeout=0.5)
+            return stubs
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    stubs.kill()
+    raise RuntimeError('stub upstreams did not start')
+
+
+def stop(process: subprocess.Popen):
+    # Open WebSockets hold up a graceful shutdown
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def drive_http(base: str, clients: int, duration: float) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                response = await client.get('/api/alerts', params={'limit': 100})
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        'http_requests': len(latencies),
+        'http_errors': errors,
+        'http_p50_ms': percentile(latencies, 0.5),
+        'http_p99_ms': percentile(latencies, 0.99),
+        'http_requests_per_sec': len(latencies) / elapsed,
+    }
+
+
+async def drive_ws(port: int, server_pid: int, clients: int, broadcasts: int, timeout: float) -> Dict:
+    semaphore = asyncio.Semaphore(200)
+    connect_ms: List[float] = []
+    broadcast_ms: List[float] = []
+    failures = 0
+
+    async def connect():
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                connection = await websockets.connect(f'ws://127.0.0.1:{port}/ws', max_size=None)
+                await connection.recv()
+            except (OSError, websockets.WebSocketException, asyncio.TimeoutError):
+                failures += 1
+                return None
+            connect_ms.append((time.perf_counter() - start) * 1000)
+            return connection
+
+    async def listen(connection):
+        received = 0
+        while received < broadcasts:
+            message = orjson.loads(await connection.recv())
+            if message.get('type') != 'alerts':
+                continue
+            sent = datetime.fromisoformat(message['timestamp'])
+            broadcast_ms.append((datetime.now() - sent).total_seconds() * 1000)
+            received += 1
+
+    before = rss_kib(server_pid)
+    connections = [c for c in await asyncio.gather(*(connect() for _ in range(clients))) if c is not None]
+    await asyncio.sleep(1.0)
+    loaded = rss_kib(server_pid)
+
+    listeners = [asyncio.ensure_future(listen(c)) for c in connections]
+    done, pending = await asyncio.wait(listeners, timeout=timeout)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*(c.close() for c in connections), return_exceptions=True)
+
+    return {
+        'ws_clients': len(connections),
+        'ws_failures': failures,
+        'ws_incomplete': len(pending),
+        'ws_connect_p50_ms': percentile(connect_ms, 0.5),
+        'ws_connect_p99_ms': percentile(connect_ms, 0.99),
+        'ws_broadcast_p50_ms': percentile(broadcast_ms, 0.5),
+        'ws_broadcast_p99_ms': percentile(broadcast_ms, 0.99),
+        'ws_kib_per_client': (loaded - before) / max(len(connections), 1),
+    }
+
+
+async def run(args) -> Dict:
+    stub_port, api_port = free_port(), free_port()
+    stubs = start_stubs(stub_port, args)
+    stub_url = f'http://127.0.0.1:{stub_port}'
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            server = start_server(api_port, workdir, {
+                'TWITTER_API_BASE_URL': stub_url,
+                'REDDIT_BASE_URL': stub_url,
+                'REDDIT_OAUTH_BASE_URL': stub_url,
+                'NWS_API_BASE_URL': stub_url,
+                'NOMINATIM_BASE_URL': stub_url,
+                'TWITTER_BEARER_TOKEN': 'stub',
+                'DISASTER_KEYWORDS': 'earthquake,flood,wildfire,tornado,hurricane',
+                'ALERT_REFRESH_INTERVAL': str(args.poll_interval),
+                'ALERT_MIN_REFRESH_INTERVAL': str(args.poll_interval),
+                'ALERT_MAX_REFRESH_INTERVAL': str(args.poll_interval),
+                'TWITTER_RATE_LIMIT': '100000',
+                **({'FEED_REPLAY_PATH': os.path.abspath(args.replay),
+                    'FEED_REPLAY_SPEED': str(args.replay_speed)} if args.replay else {}),
+            })
+            try:
+                base = f'http://127.0.0.1:{api_port}'
+                # The first request loads the store; let a few polls land
+                httpx.get(f'{base}/api/alerts', timeout=30)
+                await asyncio.sleep(args.poll_interval * 2)
+
+                results = await drive_http(base, args.http_clients, args.duration)
+                results.update(await drive_ws(
+                    api_port, server.pid, args.ws_clients, args.broadcasts,
+                    timeout=args.poll_interval * (args.broadcasts + 2) * 4
+                ))
+                results['server_peak_rss_mib'] = peak_rss_kib(server.pid) / 1024
+                stats = httpx.get(f'{stub_url}/_stub/stats', timeout=5).json()['stats']
+                results['upstream_requests'] = sum(s['requests'] for s in stats.values())
+                results['upstream_errors'] = sum(s['errors'] for s in stats.values())
+            finally:
+                stop(server)
+    finally:
+        stop(stubs)
+    return results
+
+
+def run_config(args) -> Dict:
+    return {
+        'http_clients': args.http_clients,
+        'duration': args.duration,
+        'ws_clients': args.ws_clients,
+        'broadcasts': args.broadcasts,
+        'poll_interval': args.poll_interval,
+        'upstream_latency_ms': args.upstream_latency_ms,
+        'upstream_jitter_ms': args.upstream_jitter_ms,
+        'upstream_error_rate': args.upstream_error_rate,
+        'replay': os.path.basename(args.replay) if args.replay else None,
+        'replay_speed': args.replay_speed if args.replay else None,
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics worse than the baseline by more than the tolerance"""
+    regressions = []
+    for name, higher_is_better in METRICS.items():
+        old, new = baseline.get(name), results.get(name)
+        if old is None or new is None or new != new:
+            continue
+        worse = old - new if higher_is_better else new - old
+        if worse > ABSOLUTE_SLACK and worse > tolerance * abs(old):
+            regressions.append(f'{name}: {old:.1f} -> {new:.1f} ({worse / abs(old) * 100:+.0f}% worse)'
+                               if old else f'{name}: {old:.1f} -> {new:.1f}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--http-clients', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of /api/alerts load')
+    parser.add_argument('--ws-clients', type=int, default=2000)
+    parser.add_argument('--broadcasts', type=int, default=3, help='Live broadcasts timed per WebSocket client')
+    parser.add_argument('--poll-interval', type=int, default=2, help='Seconds between upstream polls')
+    parser.add_argument('--upstream-latency-ms', type=float, default=50.0)
+    parser.add_argument('--upstream-jitter-ms', type=float, default=20.0)
+    parser.add_argument('--upstream-error-rate', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--replay', help='Feed log (benchmarks.generate_feed) to replay instead of polling the stubs')
+    parser.add_argument('--replay-speed', type=float, default=60.0)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative slowdown per metric')
+    parser.add_argument('--save-baseline', action='store_true')
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.ws_clients * 2 + args.http_clients * 2 + 256))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    results = asyncio.run(run(args))
+    for name, value in results.items():
+        print(f'{name:<24}{value:>14.2f}' if isinstance(value, float) else f'{name:<24}{value:>14}')
+
+    config = run_config(args)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as out:
+            json.dump({
+                'recorded_at': datetime.now().isoformat(timespec='seconds'),
+                'host': platform.node(),
+                'python': platform.python_version(),
+                'config': config,
+                'metrics': {name: round(results[name], 3) for name in METRICS},
+            }, out, indent=2)
+            out.write('\n')
+        print(f'Saved baseline to {args.baseline}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare with; record one with --save-baseline')
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('config') != config:
+        print('Warning: baseline was recorded with different options; comparison may be meaningless')
+    regressions = compare(results, baseline['metrics'], args.tolerance)
+    if regressions:
+        print(f'Regressions against the baseline (tolerance {args.tolerance:.0%}):')
+        for line in regressions:
+            print(f'  {line}')
+        sys.exit(1)
+    print(f'No regressions against the baseline (tolerance {args.tolerance:.0%})')
+
+
+if __name__ == '__main__':
+    main()
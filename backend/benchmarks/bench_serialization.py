@@ -0,0 +1,91 @@
+"""
+Compare bytes on the wire and CPU per payload for alert list responses:
+stdlib json vs the serialization layer vs cached alert fragments, each
+uncompressed, gzip, brotli (if installed) and WebSocket permessage-deflate.
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization --alerts 5000
+"""
+import argparse
+import json
+import time
+import zlib
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from alert_store import MemoryAlertStore
+from sample_data import SampleDataProvider
+from serialization import brotli, dumps, encode_alerts_message, orjson
+
+
+def make_alerts(count: int):
+    events = SampleDataProvider().get_all_alerts()
+    alerts = []
+    for i in range(count):
+        alert = dict(events[i % len(events)])
+        alert['id'] = f'alert-{i}'
+        alerts.append(alert)
+    return alerts
+
+
+def timed(fn, repeat: int):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.process_time() - start) / repeat * 1000
+
+
+def deflate_raw(data: bytes) -> bytes:
+    # permessage-deflate uses raw deflate with the trailing 4 bytes stripped
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return (compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--alerts', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    alerts = make_alerts(args.alerts)
+    store = MemoryAlertStore()
+    store.add_many(alerts)
+    for alert in alerts:
+        store.fragment(alert['id'])  # warm the fragment cache
+    timestamp = datetime.now().isoformat()
+    message = {'type': 'alerts', 'data': alerts, 'timestamp': timestamp}
+
+    encoders = {
+        'fastapi default (jsonable_encoder + json)':
+            lambda: json.dumps(jsonable_encoder(message)).encode('utf-8'),
+        f"serialization.dumps ({'orjson' if orjson else 'stdlib json'})":
+            lambda: dumps(message),
+        'cached fragments':
+            lambda: encode_alerts_message(
+                'alerts', [store.fragment(a['id']) for a in alerts], timestamp
+            ),
+    }
+
+    print(f"{args.alerts:,} alerts, mean of {args.repeat} runs (CPU ms)")
+    print(f"{'encoder':<44}{'bytes':>12}{'encode ms':>12}")
+    payload = None
+    for name, fn in encoders.items():
+        payload, ms = timed(fn, args.repeat)
+        print(f"{name:<44}{len(payload):>12,}{ms:>12.2f}")
+
+    compressions = {
+        'gzip (level 6)': lambda: zlib.compress(payload, 6),
+        'permessage-deflate': lambda: deflate_raw(payload),
+    }
+    if brotli is not None:
+        compressions['brotli (quality 4)'] = lambda: brotli.compress(payload, quality=4)
+
+    print(f"\n{'compression of fragment payload':<44}{'bytes':>12}{'compress ms':>12}")
+    for name, fn in compressions.items():
+        compressed, ms = timed(fn, args.repeat)
+        print(f"{name:<44}{len(compressed):>12,}{ms:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Compare server memory per connected client for the SSE stream
+(/api/alerts/stream) and the WebSocket endpoint (/ws).
+
+Starts the API in a uvicorn subprocess for each protocol, opens the given
+number of idle clients that have received their initial snapshot, and
+reports the server's resident memory growth per client.
+
+Run from the backend directory:
+    python -m benchmarks.bench_stream_memory --clients 1000
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, Optional
+
+import websockets
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def rss_kib(pid: int) -> int:
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    raise RuntimeError('VmRSS not found')
+
+
+def start_server(port: int, workdir: str, extra_env: Optional[Dict[str, str]] = None) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        LOG_FILE=os.path.join(workdir, 'bench.log'),
+        FANOUT_SOCKET_PATH=os.path.join(workdir, 'fanout.sock'),
+        ALERT_DB_PATH='',
+        **(extra_env or {})
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port),
+         '--ws', 'websockets', '--log-level', 'warning'],
+        env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError('server did not start')
+
+
+async def open_sse(port: int):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        b'GET /api/alerts/stream HTTP/1.1\r\nHost: localhost\r\n'
+        b'Accept: text/event-stream\r\n\r\n'
+    )
+    await writer.drain()
+    await reader.readuntil(b'event: initial')
+    return writer
+
+
+async def open_ws(port: int):
+    connection = await websockets.connect(f'ws://127.0.0.1:{port}/ws')
+    await connection.recv()
+    return connection
+
+
+async def connect_all(opener, port: int, count: int, concurrency: int = 100):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await opener(port)
+
+    return await asyncio.gather(*(one() for _ in range(count)))
+
+
+async def measure(protocol: str, clients: int) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(port, workdir)
+        try:
+            # One client warms up the store and code paths before the baseline
+            opener = open_sse if protocol == 'sse' else open_ws
+            warm = await opener(port)
+            await asyncio.sleep(0.5)
+            baseline = rss_kib(server.pid)
+
+            start = time.perf_counter()
+            connections = await connect_all(opener, port, clients)
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(1.0)
+            loaded = rss_kib(server.pid)
+
+            for connection in connections + [warm]:
+                if protocol == 'ws':
+                    await connection.close()
+                else:
+                    connection.close()
+        finally:
+            # Open event streams hold up a graceful shutdown
+            server.terminate()
+            try:
+                server.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+
+    return {
+        'protocol': protocol,
+        'clients': clients,
+        'rss_growth_mib': (loaded - baseline) / 1024,
+        'kib_per_client': (loaded - baseline) / clients,
+        'connect_per_sec': clients / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=1000)
+    args = parser.parse_args()
+
+    # Each client holds a socket on both ends
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.clients * 2 + 256))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    print(f"{'protocol':<10}{'clients':>10}{'RSS growth MiB':>16}{'KiB/client':>12}{'connects/s':>12}")
+    for protocol in ('sse', 'ws'):
+        result = asyncio.run(measure(protocol, args.clients))
+        print(f"{result['protocol']:<10}{result['clients']:>10}{result['rss_growth_mib']:>16.1f}"
+              f"{result['kib_per_client']:>12.1f}{result['connect_per_sec']:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
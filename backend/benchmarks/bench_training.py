@@ -0,0 +1,115 @@
+"""
+Compare training steps per second for DisasterDetector.train (tokenize
+everything up front, pad to the longest example) against train_streaming
+(streamed from disk, cached tokenization, length-bucketed batches).
+
+Run from the backend directory:
+    python -m benchmarks.bench_training --examples 20000 --steps 200
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+import tensorflow as tf
+from transformers import BertTokenizer, TFBertForSequenceClassification
+
+from disaster_detector import DisasterDetector
+
+DISASTER_TEMPLATES = [
+    "Flash flood warning for {place}, water rising on {street}",
+    "Earthquake felt across {place}! Buildings shaking",
+    "Wildfire spreading fast near {place}, evacuations ordered for {street} and surrounding neighbourhoods",
+    "Tornado touched down outside {place}",
+]
+OTHER_TEMPLATES = [
+    "Great coffee on {street} this morning",
+    "Traffic is terrible in {place} again",
+    "Anyone know a good dentist in {place}? Mine retired and I have been putting off finding a new one for months",
+    "Game night at {street}",
+]
+PLACES = ["Miami", "Houston", "Los Angeles", "Denver", "San Francisco", "Phoenix"]
+STREETS = ["Main St", "5th Avenue", "Ocean Drive", "Collins Ave"]
+
+
+class StepRate(tf.keras.callbacks.Callback):
+    """Record wall-clock time per training batch"""
+
+    def __init__(self):
+        super().__init__()
+        self.durations = []
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.durations.append(time.perf_counter() - self._start)
+
+    def steps_per_second(self, warmup: int = 5) -> float:
+        timed = self.durations[warmup:] or self.durations
+        return len(timed) / sum(timed) if timed else 0.0
+
+
+def write_corpus(path: str, examples: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(examples):
+            label = rng.random() < 0.5
+            template = rng.choice(DISASTER_TEMPLATES if label else OTHER_TEMPLATES)
+            text = template.format(place=rng.choice(PLACES), street=rng.choice(STREETS))
+            f.write(json.dumps({'text': text, 'label': int(label)}) + '\n')
+
+
+def make_detector(model_name: str) -> DisasterDetector:
+    detector = DisasterDetector()
+    detector.tokenizer = BertTokenizer.from_pretrained(model_name)
+    detector.model = TFBertForSequenceClassification.from_pretrained(model_name, num_labels=2)
+    return detector
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--examples', type=int, default=20000)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--model', default='bert-base-uncased')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = os.path.join(tmp, 'train.jsonl')
+        write_corpus(corpus, args.examples)
+
+        with open(corpus, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f]
+        texts = [row['text'] for row in rows]
+        labels = [row['label'] for row in rows]
+
+        eager = StepRate()
+        detector = make_detector(args.model)
+        detector.model.fit = _capped_fit(detector.model.fit, args.steps, eager)
+        detector.train(texts, labels, epochs=1)
+
+        streaming = StepRate()
+        detector = make_detector(args.model)
+        detector.train_streaming(
+            corpus,
+            epochs=1,
+            cache_path=os.path.join(tmp, 'tokens.db'),
+            steps_per_epoch=args.steps,
+            callbacks=[streaming]
+        )
+
+    print(f"train():           {eager.steps_per_second():.2f} steps/s")
+    print(f"train_streaming(): {streaming.steps_per_second():.2f} steps/s")
+
+
+def _capped_fit(fit, steps: int, callback: StepRate):
+    """Wrap model.fit so the eager path runs the same number of steps"""
+    def wrapped(dataset, **kwargs):
+        return fit(dataset, steps_per_epoch=steps, callbacks=[callback], **kwargs)
+    return wrapped
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Write a synthetic feed log for load tests and replays.
+
+Generates posts and warnings with synthetic_data.SyntheticFeed, grouped
+into poll cycles per source, and records them with feed_log.FeedRecorder
+as if a collector had fetched them. The same options always produce the
+same log. Replay it through a running API with
+    FEED_REPLAY_PATH=synthetic.feed FEED_REPLAY_SPEED=60 uvicorn main:app
+
+Run from the backend directory:
+    python -m benchmarks.generate_feed --posts 1000000 --seed 7 --out synthetic.feed
+"""
+import argparse
+import os
+import time
+from collections import Counter
+
+from feed_log import FeedRecorder
+from synthetic_data import SyntheticFeed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default='synthetic.feed')
+    parser.add_argument('--cycle-seconds', type=float, default=60.0, help='Length of one poll cycle')
+    parser.add_argument('--background-rate', type=float, default=2.0, help='Background posts per second')
+    parser.add_argument('--incident-rate', type=float, default=6.0, help='Incidents per hour')
+    args = parser.parse_args()
+
+    if os.path.exists(args.out):
+        os.remove(args.out)
+    feed = SyntheticFeed(seed=args.seed, background_rate=args.background_rate, incident_rate=args.incident_rate)
+    sources = Counter()
+    start = time.perf_counter()
+    with FeedRecorder(args.out) as recorder:
+        for recorded_at, source, alerts in feed.batches(args.cycle_seconds, count=args.posts):
+            recorder.record(source, alerts, recorded_at=recorded_at)
+            sources[source] += len(alerts)
+    elapsed = time.perf_counter() - start
+
+    total = sum(sources.values())
+    size = os.path.getsize(args.out)
+    print(f"Wrote {total} alerts in {recorder.records} records to {args.out} "
+          f"({size / 2 ** 20:.1f} MiB, {size / max(total, 1):.0f} bytes/alert) in {elapsed:.1f}s")
+    print(f"Sources: {dict(sources)}; incidents: {len(feed.incidents)}, "
+          f"largest {max((i.size for i in feed.incidents), default=0)} posts")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Local stand-ins for the Twitter, Reddit, NWS and Nominatim APIs.
+
+Each API answers with generated data in the upstream's response shape,
+including rate-limit headers, after a configurable delay, and fails a
+configurable fraction of requests. Point the backend at it with
+TWITTER_API_BASE_URL, REDDIT_BASE_URL, REDDIT_OAUTH_BASE_URL,
+NWS_API_BASE_URL and NOMINATIM_BASE_URL.
+
+Latency and errors can be changed while running, per service or for all:
+    POST /_stub/config {"service": "twitter", "latency_ms": 250, "error_rate": 0.1}
+and request counts are reported by GET /_stub/stats.
+
+Run from the backend directory:
+    python -m benchmarks.stub_upstreams --port 9100 --latency-ms 50 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+SERVICES = ('twitter', 'reddit', 'nws', 'nominatim')
+
+PLACES = [
+    ('Los Angeles', 34.05, -118.24), ('Houston', 29.76, -95.37), ('Miami', 25.76, -80.19),
+    ('Oklahoma City', 35.47, -97.52), ('San Francisco', 37.77, -122.42), ('New Orleans', 29.95, -90.07),
+    ('Denver', 39.74, -104.99), ('Seattle', 47.61, -122.33), ('Tokyo', 35.68, 139.69),
+    ('Manila', 14.60, 120.98),
+]
+EVENTS = [
+    ('earthquake', 'Magnitude {m:.1f} earthquake shakes {place}, buildings evacuated'),
+    ('flood', 'Flash flooding reported in {place}, roads underwater'),
+    ('wildfire', 'Wildfire spreading near {place}, evacuation orders issued'),
+    ('tornado', 'Tornado on the ground near {place}, take shelter now'),
+    ('hurricane', 'Hurricane bands reaching {place}, storm surge expected'),
+]
+NWS_EVENTS = ['Tornado Warning', 'Flash Flood Warning', 'Severe Thunderstorm Warning', 'Red Flag Warning']
+
+
+class StubSettings:
+    """Latency and failure behaviour of one stubbed service"""
+
+    __slots__ = ('latency_ms', 'jitter_ms', 'error_rate', 'error_status')
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 503):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def update(self, values: Dict):
+        for field in self.__slots__:
+            if field in values:
+                setattr(self, field, type(getattr(self, field))(values[field]))
+
+    def as_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+def create_app(latency_ms: float = 0.0,
+               jitter_ms: float = 0.0,
+               error_rate: float = 0.0,
+               posts_per_page: int = 10,
+               nws_alerts: int = 20,
+               seed: Optional[int] = None) -> FastAPI:
+    """
+    Build the stub server
+
+    Args:
+        latency_ms: Delay added to every response
+        jitter_ms: Uniform random extra delay up to this much
+        error_rate: Fraction of requests answered with an error status
+        posts_per_page: Tweets or Reddit posts returned per search
+        nws_alerts: Active NWS alerts returned
+        seed: Seed for generated content and failures
+    """
+    app = FastAPI(title='QuickAlert upstream stubs')
+    rng = random.Random(seed)
+    settings = {
+        service: StubSettings(latency_ms, jitter_ms, error_rate) for service in SERVICES
+    }
+    stats = {service: {'requests': 0, 'errors': 0} for service in SERVICES}
+    ids = itertools.count(1)
+
+    async def gate(service: str) -> Optional[Response]:
+        """Apply the service's delay; returns an error response if this request fails"""
+        config = settings[service]
+        stats[service]['requests'] += 1
+        delay = config.latency_ms + rng.uniform(0, config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if config.error_rate and rng.random() < config.error_rate:
+            stats[service]['errors'] += 1
+            return JSONResponse({'error': 'stubbed failure'}, status_code=config.error_status)
+        return None
+
+    def post(now: float) -> Dict:
+        kind, template = rng.choice(EVENTS)
+        place, lat, lon = rng.choice(PLACES)
+        post_id = next(ids)
+        return {
+            'id': post_id,
+            'text': f"{template.format(m=rng.uniform(4, 7.5), place=place)} #{kind} ({post_id})",
+            'created': now - rng.uniform(0, 600),
+            'lat': lat + rng.gauss(0, 0.2),
+            'lon': lon + rng.gauss(0, 0.2),
+            'place': place,
+            'score': rng.randint(0, 5000),
+        }
+
+    def iso(epoch: float) -> str:
+        return datetime.fromtimestamp(epoch, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    @app.get('/2/tweets/search/recent')
+    async def twitter_search(max_results: int = 10):
+        failure = await gate('twitter')
+        if failure is not None:
+            return failure
+        now = time.time()
+        tweets = []
+        for item in (post(now) for _ in range(min(max_results, posts_per_page))):
+            tweet = {
+                'id': str(item['id']),
+                'edit_history_tweet_ids': [str(item['id'])],
+                'text': item['text'],
+                'created_at': iso(item['created']),
+                'public_metrics': {
+                    'retweet_count': item['score'] // 10, 'reply_count': item['score'] // 50,
+                    'like_count': item['score'], 'quote_count': 0
+                }
+            }
+            if rng.random() < 0.7:
+                tweet['geo'] = {'coordinates': {'type': 'Point', 'coordinates': [item['lon'], item['lat']]}}
+            tweets.append(tweet)
+        return JSONResponse(
+            {'data': tweets, 'meta': {'result_count': len(tweets)}},
+            headers={
+                'x-rate-limit-limit': '450',
+                'x-rate-limit-remaining': '449',
+                'x-rate-limit-reset': str(int(now) + 900),
+            }
+        )
+
+    @app.post('/api/v1/access_token')
+    async def reddit_token():
+        failure = await gate('reddit')
+        if failure is not None:
+            return failure
+        return {'access_token': 'stub-token', 'token_type': 'bearer', 'expires_in': 86400, 'scope': '*'}
+
+    @app.get('/r/{subreddit}/search')
+    @app.get('/r/{subreddit}/search/')
+    async def reddit_search(subreddit: str, limit: int = 10):
+        failure = await gate('reddit')
+        if failure is not None:
+            return failure
+        now = time.time()
+        children = [
+            {'kind': 't3', 'data': {
+                'id': format(item['id'], 'x'),
+                'name': f"t3_{item['id']:x}",
+                'title': item['text'],
+                'selftext': f"Reports coming in from {item['place']}.",
+                'created_utc': item['created'],
+                'score': item['score'],
+                'subreddit': subreddit,
+                'permalink': f"/r/{subreddit}/comments/{item['id']:x}/",
+            }}
+            for item in (post(now) for _ in range(min(limit, posts_per_page)))
+        ]
+        return JSONResponse(
+            {'kind': 'Listing', 'data': {'children': children, 'after': None, 'before': None}},
+            headers={'x-ratelimit-remaining': '599', 'x-ratelimit-used': '1', 'x-ratelimit-reset': '600'}
+        )
+
+    @app.get('/alerts/active')
+    async def nws_active():
+        failure = await gate('nws')
+        if failure is not None:
+            return failure
+        now = time.time()
+        features = []
+        for i in range(nws_alerts):
+            place, lat, lon = PLACES[i % len(PLACES)]
+            half = rng.uniform(0.1, 0.5)
+            ring = [[lon - half, lat - half], [lon + half, lat - half], [lon + half, lat + half],
+                    [lon - half, lat + half], [lon - half, lat - half]]
+            event = rng.choice(NWS_EVENTS)
+            features.append({
+                'type': 'Feature',
+                'id': f'urn:oid:stub.{next(ids)}',
+                'geometry': {'type': 'Polygon', 'coordinates': [ring]},
+                'properties': {
+                    'status': 'Actual',
+                    'severity': rng.choice(['Extreme', 'Severe', 'Moderate']),
+                    'event': event,
+                    'headline': f'{event} issued for {place}',
+                    'description': f'The National Weather Service has issued a {event} for {place}.',
+                    'sent': iso(now - rng.uniform(0, 3600)),
+                    'areaDesc': place,
+                }
+            })
+        return JSONResponse({'type': 'FeatureCollection', 'features': features},
+                            media_type='application/geo+json')
+
+    @app.get('/search')
+    async def nominatim_search(q: str = '', limit: int = 1):
+        failure = await gate('nominatim')
+        if failure is not None:
+            return failure
+        # Same place for the same query, anywhere on land-ish latitudes
+        digest = hashlib.blake2b(q.lower().encode('utf-8'), digest_size=8).digest()
+        lat = int.from_bytes(digest[:4], 'big') / 2 ** 32 * 120 - 55
+        lon = int.from_bytes(digest[4:], 'big') / 2 ** 32 * 360 - 180
+        return [{
+            'place_id': int.from_bytes(digest[:4], 'big'),
+            'lat': f'{lat:.7f}',
+            'lon': f'{lon:.7f}',
+            'display_name': q,
+            'boundingbox': [f'{lat - 0.1:.7f}', f'{lat + 0.1:.7f}', f'{lon - 0.1:.7f}', f'{lon + 0.1:.7f}'],
+            'class': 'place',
+            'type': 'city',
+        }][:max(limit, 0)]
+
+    @app.post('/_stub/config')
+    async def configure(request: Request):
+        values = await request.json()
+        service = values.pop('service', None)
+        for name in ([service] if service else SERVICES):
+            settings[name].update(values)
+        return {name: config.as_dict() for name, config in settings.items()}
+
+    @app.get('/_stub/stats')
+    async def report():
+        return {'stats': stats, 'settings': {name: config.as_dict() for name, config in settings.items()}}
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--posts-per-page', type=int, default=10)
+    parser.add_argument('--nws-alerts', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate,
+                     args.posts_per_page, args.nws_alerts, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -6,15 +6,160 @@ import spacy
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut
 import re
+from fast_classifier import HashedNgramClassifier
+from training_pipeline import TokenizationCache, build_streaming_dataset, default_token_cache_path, iter_examples
+from upstream_urls import nominatim_options
+import metrics
+
+DETECTION_SECONDS = metrics.histogram(
+    'quickalert_detection_seconds', 'Time per detection call by stage (fast, transformer, analysis)', ['stage']
+)
+DETECTION_TEXTS = metrics.counter(
+    'quickalert_detection_texts_total', 'Texts classified per stage', ['stage']
+)
+GEOCODE_SECONDS = metrics.histogram(
+    'quickalert_geocode_seconds', 'Time per geocoding lookup'
+)
+GEOCODE_FAILURES = metrics.counter(
+    'quickalert_geocode_failures_total', 'Geocoding lookups that timed out or found nothing'
+)
 
 class DisasterDetector:
-    def __init__(self):
-        pass
+    def __init__(self, cascade_band: Tuple[float, float] = (0.1, 0.9)):
+        """
+        Args:
+            cascade_band: Fast-stage probability range treated as uncertain;
+                only texts scoring inside it are sent to the transformer
+        """
+        self.fast_stage = HashedNgramClassifier()
+        self.cascade_band = cascade_band
+        self.cascade_stats = {'texts': 0, 'transformer_texts': 0}
+        # NOMINATIM_BASE_URL can point geocoding at a local or stub server
+        self.geocoder = Nominatim(user_agent='QuickAlert/1.0', **nominatim_options())
     
     def predict(self, texts):
         """Dummy prediction method for sample implementation"""
         return [{"is_disaster": True, "confidence": 0.9} for _ in texts]
 
+    def _transformer_probabilities(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """
+        Run the BERT classifier and return the disaster probability per text
+        
+        Args:
+            texts: Texts to classify
+            batch_size: Number of texts per forward pass
+            
+        Returns:
+            Array of disaster probabilities
+        """
+        probabilities = []
+        DETECTION_TEXTS.labels('transformer').inc(len(texts))
+        with DETECTION_SECONDS.labels('transformer').time():
+            for start in range(0, len(texts), batch_size):
+                encodings = self.tokenizer(
+                    texts[start:start + batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=128,
+                    return_tensors="tf"
+                )
+                logits = self.model(dict(encodings), training=False).logits
+                probabilities.append(tf.nn.softmax(logits, axis=-1).numpy()[:, 1])
+
+        if not probabilities:
+            return np.empty(0)
+        return np.concatenate(probabilities)
+
+    def _cascade_probabilities(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score texts with the fast stage and escalate uncertain ones to BERT
+        
+        Args:
+            texts: Texts to classify
+            
+        Returns:
+            Tuple of (final probabilities, boolean mask of escalated texts)
+        """
+        with DETECTION_SECONDS.labels('fast').time():
+            probabilities = self.fast_stage.predict_proba(texts)
+        DETECTION_TEXTS.labels('fast').inc(len(texts))
+        low, high = self.cascade_band
+        escalated = (probabilities > low) & (probabilities < high)
+        
+        if escalated.any():
+            uncertain = [texts[i] for i in np.flatnonzero(escalated)]
+            probabilities[escalated] = self._transformer_probabilities(uncertain)
+        
+        return probabilities, escalated
+
+    def predict_cascade(self, texts: List[str]) -> List[Dict]:
+        """
+        Classify texts with the fast-stage/BERT cascade
+        
+        Falls back to BERT for every text until the fast stage is trained.
+        
+        Args:
+            texts: Texts to classify
+            
+        Returns:
+            List of prediction dictionaries, one per text
+        """
+        if not self.fast_stage.is_trained:
+            probabilities = self._transformer_probabilities(texts)
+            escalated = np.ones(len(texts), dtype=bool)
+        else:
+            probabilities, escalated = self._cascade_probabilities(texts)
+        self.cascade_stats['texts'] += len(texts)
+        self.cascade_stats['transformer_texts'] += int(escalated.sum())
+        
+        return [
+            {
+                "is_disaster": bool(prob >= 0.5),
+                "confidence": float(max(prob, 1 - prob)),
+                "probability": float(prob),
+                "stage": "transformer" if used_bert else "fast"
+            }
+            for prob, used_bert in zip(probabilities, escalated)
+        ]
+
+    def cascade_transformer_fraction(self) -> float:
+        """Fraction of texts seen by predict_cascade that went to BERT"""
+        if not self.cascade_stats['texts']:
+            return 0.0
+        return self.cascade_stats['transformer_texts'] / self.cascade_stats['texts']
+
+    def evaluate_cascade(self, texts: List[str], labels: List[int]) -> Dict:
+        """
+        Compare cascade accuracy against running BERT on every text
+        
+        BERT is run once over all texts; the cascade result reuses those
+        scores for the escalated texts, so both numbers come from one pass.
+        
+        Args:
+            texts: Held-out texts
+            labels: Corresponding labels (0: non-disaster, 1: disaster)
+            
+        Returns:
+            Dictionary with accuracies, agreement and the BERT fraction
+        """
+        targets = np.asarray(labels, dtype=bool)
+        bert_probs = self._transformer_probabilities(texts)
+        fast_probs = self.fast_stage.predict_proba(texts)
+        
+        low, high = self.cascade_band
+        escalated = (fast_probs > low) & (fast_probs < high)
+        cascade_probs = np.where(escalated, bert_probs, fast_probs)
+        
+        bert_pred = bert_probs >= 0.5
+        cascade_pred = cascade_probs >= 0.5
+        return {
+            'texts': len(texts),
+            'transformer_fraction': float(escalated.mean()) if len(texts) else 0.0,
+            'bert_accuracy': float((bert_pred == targets).mean()) if len(texts) else 0.0,
+            'cascade_accuracy': float((cascade_pred == targets).mean()) if len(texts) else 0.0,
+            'agreement': float((bert_pred == cascade_pred).mean()) if len(texts) else 0.0
+        }
+
     def _analyze_text(self, text: str) -> Dict:
         """
         Perform detailed analysis of the text to extract relevant information
@@ -25,7 +170,8 @@ class DisasterDetector:
         Returns:
             Dictionary containing extracted information
         """
-        doc = self.nlp(text)
+        with DETECTION_SECONDS.labels('analysis').time():
+            doc = self.nlp(text)
         
         # Extract named entities
         entities = {ent.label_: ent.text for ent in doc.ents}
@@ -75,14 +221,18 @@ class DisasterDetector:
         for ent in doc.ents:
             if ent.label_ in ['GPE', 'LOC']:
                 try:
-                    location = self.geocoder.geocode(ent.text)
+                    with GEOCODE_SECONDS.time():
+                        location = self.geocoder.geocode(ent.text)
                     if location:
                         locations.append({
                             'name': ent.text,
                             'lat': location.latitude,
                             'lon': location.longitude
                         })
+                    else:
+                        GEOCODE_FAILURES.inc()
                 except GeocoderTimedOut:
+                    GEOCODE_FAILURES.inc()
                     continue
         return locations
     
@@ -124,6 +274,9 @@ class DisasterDetector:
             labels: List of corresponding labels (0: non-disaster, 1: disaster)
             epochs: Number of training epochs
         """
+        # The cascade's fast stage learns from the same examples
+        self.fast_stage.fit(texts, labels)
+        
         # Prepare training data
         train_encodings = self.tokenizer(
             texts,
@@ -138,12 +291,65 @@ class DisasterDetector:
             labels
         )).shuffle(1000).batch(16)
         
-        # Compile and train the model
+        self._compile_for_training()
+        self.model.fit(train_dataset, epochs=epochs)
+    
+    def train_streaming(self,
+                        path: str,
+                        epochs: int = 3,
+                        batch_size: int = 16,
+                        cache_path: Optional[str] = None,
+                        steps_per_epoch: Optional[int] = None,
+                        callbacks: Optional[List] = None):
+        """
+        Fine-tune the model on a training file too large to hold in memory
+        
+        Examples are streamed from disk, tokenized once into an on-disk cache
+        and batched by sequence length with per-batch padding.
+        
+        Args:
+            path: JSON Lines or CSV file of text/label examples
+            epochs: Number of training epochs
+            batch_size: Examples per batch
+            cache_path: SQLite file used as the tokenization cache; defaults to
+                default_token_cache_path()
+            steps_per_epoch: Optional cap on batches per epoch
+            callbacks: Extra Keras callbacks passed to fit
+        """
+        cache = TokenizationCache(cache_path or default_token_cache_path(), self.tokenizer)
+        try:
+            # Fit the fast stage first, one bounded chunk at a time
+            chunk = []
+            for example in iter_examples(path):
+                chunk.append(example)
+                if len(chunk) >= 10000:
+                    self.fast_stage.partial_fit(*zip(*chunk))
+                    chunk = []
+            if chunk:
+                self.fast_stage.partial_fit(*zip(*chunk))
+            
+            train_dataset = build_streaming_dataset(
+                path,
+                cache,
+                batch_size=batch_size,
+                pad_token_id=self.tokenizer.pad_token_id or 0
+            )
+            self._compile_for_training()
+            self.model.fit(
+                train_dataset,
+                epochs=epochs,
+                steps_per_epoch=steps_per_epoch,
+                callbacks=callbacks
+            )
+        finally:
+            cache.close()
+    
+    def _compile_for_training(self):
+        """Compile the model with the fine-tuning optimizer and loss"""
         optimizer = tf.keras.optimizers.Adam(learning_rate=2e-5)
         loss = tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True)
         
         self.model.compile(optimizer=optimizer, loss=loss, metrics=['accuracy'])
-        self.model.fit(train_dataset, epochs=epochs)
     
     def save_model(self, path: str):
         """Save the fine-tuned model to disk"""
@@ -0,0 +1,197 @@
+import asyncio
+import fcntl
+import logging
+import os
+import struct
+import tempfile
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Frames on the socket are a 4-byte big-endian length followed by the payload
+_HEADER = struct.Struct('!I')
+
+
+def default_socket_path() -> str:
+    """Socket path shared by the workers of one deployment"""
+    return os.getenv('FANOUT_SOCKET_PATH', os.path.join(tempfile.gettempdir(), 'quickalert-fanout.sock'))
+
+
+async def read_frame(reader: asyncio.StreamReader) -> bytes:
+    """Read one length-prefixed frame; raises IncompleteReadError at EOF"""
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return await reader.readexactly(length)
+
+
+def write_frame(writer: asyncio.StreamWriter, payload: bytes):
+    """Queue one length-prefixed frame without waiting for the peer"""
+    writer.write(_HEADER.pack(len(payload)) + payload)
+
+
+class FanoutHub:
+    """
+    Single-ingestion fan-out across the worker processes of one host
+
+    Every worker starts a hub on the same socket path. The first one to take
+    an exclusive ``flock`` on ``<socket>.lock`` becomes the leader: it runs
+    ingestion (``on_leader``) and serves a Unix domain socket. The others
+    connect as followers. ``publish`` on the leader delivers each payload to
+    its own ``on_message`` callback and to every follower, so all workers
+    apply the same updates and fan them out to their own clients.
+
+    A follower that connects first receives ``snapshot()`` so it starts with
+    the leader's current state. Followers that fall too far behind are
+    dropped and reconnect for a fresh snapshot rather than stalling the
+    leader. The lock is released when the leader process exits, and the
+    next follower to notice the closed socket takes over.
+    """
+
+    def __init__(self,
+                 on_message: Callable[[bytes], Awaitable[None]],
+                 socket_path: Optional[str] = None,
+                 on_leader: Optional[Callable[[], None]] = None,
+                 snapshot: Optional[Callable[[], Optional[bytes]]] = None,
+                 max_buffer: int = 8 * 1024 * 1024,
+                 retry_interval: float = 0.5):
+        """
+        Args:
+            on_message: Coroutine applying a published payload in this worker
+            socket_path: Unix socket shared by the workers
+            on_leader: Called once when this worker becomes the leader
+            snapshot: Leader state sent to each follower as it connects
+            max_buffer: Unsent bytes after which a follower is dropped
+            retry_interval: Seconds between reconnect/lock attempts
+        """
+        self.on_message = on_message
+        self.socket_path = socket_path or default_socket_path()
+        self.lock_path = self.socket_path + '.lock'
+        self.on_leader = on_leader
+        self.snapshot = snapshot
+        self.max_buffer = max_buffer
+        self.retry_interval = retry_interval
+
+        self.role: Optional[str] = None
+        self.followers: List[asyncio.StreamWriter] = []
+        self.dropped_followers = 0
+        self._lock_file = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self.role == 'leader'
+
+    @property
+    def is_follower(self) -> bool:
+        return self.role == 'follower'
+
+    def _try_lock(self) -> bool:
+        lock_file = open(self.lock_path, 'a+')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    async def start(self):
+        """Elect a leader and start serving or following"""
+        if self._try_lock():
+            await self._lead()
+        else:
+            self.role = 'follower'
+            self._task = asyncio.create_task(self._follow())
+
+    async def _lead(self):
+        # The lock guarantees no live leader owns a leftover socket file
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._serve_follower, path=self.socket_path)
+        self.role = 'leader'
+        logger.info(f"Fan-out leader serving on {self.socket_path} (pid {os.getpid()})")
+        if self.on_leader is not None:
+            self.on_leader()
+
+    async def _serve_follower(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.snapshot is not None:
+            payload = self.snapshot()
+            if payload:
+                write_frame(writer, payload)
+        self.followers.append(writer)
+        try:
+            # Followers never send; this returns when they disconnect
+            await reader.read()
+        finally:
+            if writer in self.followers:
+                self.followers.remove(writer)
+            writer.close()
+
+    async def _follow(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.socket_path)
+            except OSError:
+                # Leader not up yet, or gone: take over if its lock is free
+                if self._try_lock():
+                    await self._lead()
+                    return
+                await asyncio.sleep(self.retry_interval)
+                continue
+
+            try:
+                while True:
+                    payload = await read_frame(reader)
+                    try:
+                        await self.on_message(payload)
+                    except Exception as e:
+                        logger.error(f"Fan-out message handler failed: {str(e)}")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                logger.warning("Fan-out leader connection lost")
+            finally:
+                writer.close()
+
+    def buffered_bytes(self) -> int:
+        """Bytes written to followers but not yet sent"""
+        return sum(writer.transport.get_write_buffer_size() for writer in self.followers)
+
+    async def publish(self, payload: bytes):
+        """
+        Deliver a payload to this worker and every follower
+
+        Only the leader publishes. Before ``start`` the hub runs standalone
+        and just delivers locally.
+        """
+        for writer in list(self.followers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.followers.remove(writer)
+                self.dropped_followers += 1
+                writer.close()
+                continue
+            write_frame(writer, payload)
+        await self.on_message(payload)
+
+    async def stop(self):
+        """Stop serving or following and release leadership"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._server is not None:
+            self._server.close()
+            for writer in self.followers:
+                writer.close()
+            self.followers.clear()
+            await self._server.wait_closed()
+            self._server = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        if self._lock_file is not None:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+            self._lock_file.close()
+            self._lock_file = None
+        self.role = None
@@ -0,0 +1,123 @@
+import re
+import zlib
+from typing import List, Optional
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9#@']+")
+
+
+class HashedNgramClassifier:
+    """
+    Cheap linear disaster/non-disaster classifier over hashed word n-grams.
+
+    Used as the first stage of the DisasterDetector cascade: it scores every
+    text in microseconds so that only uncertain texts reach the transformer.
+    """
+
+    def __init__(self,
+                 n_features: int = 2 ** 18,
+                 ngram_range: tuple = (1, 2),
+                 learning_rate: float = 0.5,
+                 l2: float = 1e-6):
+        """
+        Args:
+            n_features: Size of the hashed feature space
+            ngram_range: Smallest and largest word n-gram to hash
+            learning_rate: Initial SGD step size
+            l2: L2 regularisation strength
+        """
+        self.n_features = n_features
+        self.ngram_range = ngram_range
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.weights = np.zeros(n_features, dtype=np.float32)
+        self.bias = 0.0
+        self.is_trained = False
+        self._steps = 0
+
+    def _features(self, text: str) -> np.ndarray:
+        """Hash the word n-grams of a text into unique feature indices"""
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        low, high = self.ngram_range
+        indices = set()
+        for n in range(low, high + 1):
+            for i in range(len(tokens) - n + 1):
+                gram = ' '.join(tokens[i:i + n]).encode('utf-8')
+                # crc32 is stable across processes, unlike hash()
+                indices.add(zlib.crc32(gram) % self.n_features)
+        return np.fromiter(indices, dtype=np.int64, count=len(indices))
+
+    def fit(self, texts: List[str], labels: List[int], epochs: int = 5,
+            seed: Optional[int] = 0) -> 'HashedNgramClassifier':
+        """
+        Train the classifier with logistic-loss SGD
+
+        Args:
+            texts: Training texts
+            labels: Corresponding labels (0: non-disaster, 1: disaster)
+            epochs: Passes over the training data
+            seed: Seed for the per-epoch shuffle
+
+        Returns:
+            The trained classifier
+        """
+        features = [self._features(text) for text in texts]
+        targets = np.asarray(labels, dtype=np.float32)
+        rng = np.random.default_rng(seed)
+
+        for _ in range(epochs):
+            for i in rng.permutation(len(features)):
+                self._sgd_step(features[i], targets[i])
+
+        self.is_trained = True
+        return self
+
+    def partial_fit(self, texts: List[str], labels: List[int]) -> 'HashedNgramClassifier':
+        """
+        Run one SGD pass over a chunk of examples
+
+        Lets the classifier learn from a corpus streamed in chunks without
+        holding it in memory.
+
+        Args:
+            texts: Chunk of training texts
+            labels: Corresponding labels (0: non-disaster, 1: disaster)
+
+        Returns:
+            The updated classifier
+        """
+        for text, label in zip(texts, labels):
+            self._sgd_step(self._features(text), float(label))
+
+        self.is_trained = True
+        return self
+
+    def _sgd_step(self, idx: np.ndarray, target: float):
+        """Apply one logistic-loss gradient step for a single example"""
+        # Normalise by feature count so long texts don't dominate
+        scale = 1.0 / max(len(idx), 1)
+        margin = self.weights[idx].sum() * scale + self.bias
+        prob = 1.0 / (1.0 + np.exp(-margin))
+        grad = prob - target
+        lr = self.learning_rate / (1.0 + 1e-4 * self._steps)
+
+        self.weights[idx] -= lr * (grad * scale + self.l2 * self.weights[idx])
+        self.bias -= lr * grad
+        self._steps += 1
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        """
+        Score texts with the trained model
+
+        Args:
+            texts: Texts to score
+
+        Returns:
+            Array of disaster probabilities, one per text
+        """
+        margins = np.empty(len(texts), dtype=np.float64)
+        for i, text in enumerate(texts):
+            idx = self._features(text)
+            margins[i] = self.weights[idx].sum() / max(len(idx), 1) + self.bias
+        return 1.0 / (1.0 + np.exp(-margins))
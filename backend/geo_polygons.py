@@ -0,0 +1,178 @@
+import math
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+
+def geometry_rings(geometry: Optional[Dict]) -> List[np.ndarray]:
+    """
+    Rings of a GeoJSON Polygon or MultiPolygon as (n, 2) lon/lat arrays
+
+    Rings are closed (last vertex equal to the first). Holes are returned
+    as ordinary rings; the even-odd rule used for containment treats them
+    as holes without needing to tell them apart.
+
+    Args:
+        geometry: GeoJSON geometry dict, or None
+
+    Returns:
+        List of rings, empty for other or missing geometries
+    """
+    if not geometry:
+        return []
+    if geometry.get('type') == 'Polygon':
+        polygons = [geometry.get('coordinates') or []]
+    elif geometry.get('type') == 'MultiPolygon':
+        polygons = geometry.get('coordinates') or []
+    else:
+        return []
+
+    rings = []
+    for polygon in polygons:
+        for ring in polygon:
+            if len(ring) < 3:
+                continue
+            points = np.array([vertex[:2] for vertex in ring], dtype=np.float64)
+            if not np.array_equal(points[0], points[-1]):
+                points = np.vstack((points, points[:1]))
+            rings.append(points)
+    return rings
+
+
+def representative_point(geometry: Optional[Dict]) -> Optional[Dict[str, float]]:
+    """
+    A {"lat", "lon"} point for a polygon geometry, for maps and clustering
+
+    Uses the mean of the outer ring's vertices rather than an arbitrary
+    corner, so the point sits inside typical (convex-ish) warning areas.
+    """
+    rings = geometry_rings(geometry)
+    if not rings:
+        return None
+    # Rings repeat the first vertex at the end; count it once
+    lon, lat = rings[0][:-1].mean(axis=0)
+    return {'lat': float(lat), 'lon': float(lon)}
+
+
+class _CellPack:
+    """Edges of every polygon touching one grid cell, packed for one vectorized test"""
+
+    __slots__ = ('ids', 'bounds', 'starts', 'x1', 'y1', 'x2', 'y2')
+
+    def __init__(self, ids: List[str], polygons: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        self.ids = ids
+        self.bounds = np.array([polygons[i][1] for i in ids], dtype=np.float64).reshape(-1, 4)
+        edges = [polygons[i][0] for i in ids]
+        sizes = np.fromiter((len(e) for e in edges), dtype=np.int64, count=len(edges))
+        self.starts = np.concatenate(([0], np.cumsum(sizes)[:-1])) if len(edges) else np.zeros(0, np.int64)
+        packed = np.concatenate(edges) if edges else np.zeros((0, 4))
+        self.x1, self.y1, self.x2, self.y2 = packed.T
+
+
+class PolygonIndex:
+    """
+    Point-in-area lookups over many polygons
+
+    Polygon bounding boxes are registered in a uniform lon/lat grid. A
+    lookup takes the grid cell of the point and tests every polygon
+    touching that cell in one numpy pass: the edges of those polygons are
+    kept packed in flat arrays per cell, crossings of a ray from the point
+    are computed for all edges at once and summed per polygon with
+    ``np.add.reduceat`` (odd means inside). Packs are rebuilt lazily for
+    cells whose polygons changed.
+    """
+
+    def __init__(self, cell_degrees: float = 1.0):
+        """
+        Args:
+            cell_degrees: Grid cell size in degrees of latitude and longitude
+        """
+        self.cell_degrees = cell_degrees
+        # id -> ((n, 4) edge array of x1, y1, x2, y2; (minx, miny, maxx, maxy))
+        self.polygons: Dict[str, Tuple[np.ndarray, Tuple[float, float, float, float]]] = {}
+        self.cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._packs: Dict[Tuple[int, int], _CellPack] = {}
+
+    def __len__(self) -> int:
+        return len(self.polygons)
+
+    def __contains__(self, area_id: str) -> bool:
+        return area_id in self.polygons
+
+    def _cell_range(self, bounds: Sequence[float]):
+        minx, miny, maxx, maxy = bounds
+        size = self.cell_degrees
+        for i in range(math.floor(minx / size), math.floor(maxx / size) + 1):
+            for j in range(math.floor(miny / size), math.floor(maxy / size) + 1):
+                yield i, j
+
+    def add(self, area_id: str, geometry: Dict) -> bool:
+        """
+        Index the area of a GeoJSON Polygon or MultiPolygon
+
+        Args:
+            area_id: Id returned by lookups, usually the alert id
+            geometry: GeoJSON geometry
+
+        Returns:
+            True if the geometry had a usable polygon
+        """
+        self.remove(area_id)
+        rings = geometry_rings(geometry)
+        if not rings:
+            return False
+
+        edges = np.concatenate([np.hstack((ring[:-1], ring[1:])) for ring in rings])
+        points = np.concatenate(rings)
+        bounds = (*points.min(axis=0), *points.max(axis=0))
+        self.polygons[area_id] = (edges, bounds)
+        for cell in self._cell_range(bounds):
+            self.cells.setdefault(cell, set()).add(area_id)
+            self._packs.pop(cell, None)
+        return True
+
+    def remove(self, area_id: str) -> bool:
+        """Drop an area; returns True if it was indexed"""
+        entry = self.polygons.pop(area_id, None)
+        if entry is None:
+            return False
+        for cell in self._cell_range(entry[1]):
+            members = self.cells.get(cell)
+            if members is not None:
+                members.discard(area_id)
+                if not members:
+                    del self.cells[cell]
+            self._packs.pop(cell, None)
+        return True
+
+    def covering(self, lat: float, lon: float) -> List[str]:
+        """
+        Ids of the areas containing a point
+
+        Args:
+            lat: Latitude of the point
+            lon: Longitude of the point
+
+        Returns:
+            Ids of every indexed area the point lies inside
+        """
+        cell = (math.floor(lon / self.cell_degrees), math.floor(lat / self.cell_degrees))
+        pack = self._packs.get(cell)
+        if pack is None:
+            members = self.cells.get(cell)
+            if not members:
+                return []
+            pack = self._packs[cell] = _CellPack(sorted(members), self.polygons)
+
+        bounds = pack.bounds
+        in_box = (bounds[:, 0] <= lon) & (lon <= bounds[:, 2]) & (bounds[:, 1] <= lat) & (lat <= bounds[:, 3])
+        if not in_box.any():
+            return []
+
+        # Even-odd rule: count edges crossed by a ray from the point towards +x
+        straddles = (pack.y1 > lat) != (pack.y2 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross_x = pack.x1 + (lat - pack.y1) * (pack.x2 - pack.x1) / (pack.y2 - pack.y1)
+        crossings = straddles & (lon < cross_x)
+        inside = (np.add.reduceat(crossings.astype(np.int32), pack.starts) & 1).astype(bool) & in_box
+        return [pack.ids[i] for i in np.flatnonzero(inside)]
@@ -0,0 +1,267 @@
+import math
+import os
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from alert_store import _index_fields
+from serialization import dumps
+
+# Importance of an alert when picking a cluster's representative; alert
+# levels and collector severities map onto the same scale
+SEVERITY_RANK = {
+    'critical': 3, 'extreme': 3,
+    'high': 2, 'severe': 2,
+    'medium': 1, 'moderate': 1,
+    'low': 0, 'minor': 0,
+}
+
+# Web Mercator is undefined at the poles
+MAX_LATITUDE = 85.05112878
+
+
+def alert_point(alert) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of an alert with coordinates, or None"""
+    coordinates = alert.get('coordinates')
+    if not coordinates:
+        return None
+    return float(coordinates['lat']), float(coordinates['lon'])
+
+
+def mercator_fraction(lat: float, lon: float) -> Tuple[float, float]:
+    """Position of a point on the Web Mercator square, both axes in [0, 1)"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    x = (lon + 180.0) / 360.0
+    sin_lat = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)
+    return min(max(x, 0.0), math.nextafter(1.0, 0.0)), min(max(y, 0.0), math.nextafter(1.0, 0.0))
+
+
+class _Cell:
+    """Running cluster of the alerts falling into one grid cell"""
+
+    __slots__ = ('count', 'lat_sum', 'lon_sum', 'rep')
+
+    def __init__(self):
+        self.count = 0
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        # (rank, timestamp, id) of the most important alert in the cell
+        self.rep: Optional[Tuple[int, str, str]] = None
+
+
+class GeoTileIndex:
+    """
+    Incrementally maintained map clusters for XYZ tiles
+
+    Each tile is split into a ``2**cell_bits`` square grid of cells, and every
+    zoom level keeps a count, a centroid and a representative alert per
+    non-empty cell. Cells nest across zoom levels (a cell at zoom z covers
+    four cells at z + 1), so adding an alert touches one cell per level and
+    removing one only re-picks representatives from the four child cells.
+    Tiles are never recomputed from the store on request. Only active
+    alerts are clustered. Each alert takes one cell per zoom level, so
+    with the default ``max_zoom`` of 18 the index can hold up to 19 cells
+    per alert: about 1.9M cells at a 100k-alert store cap. Lower
+    ``max_zoom`` (TILE_MAX_ZOOM) to trade deep zooms for memory.
+
+    Every tile has a version that changes when one of its cells does, and
+    encoded tiles are cached by that version, so unchanged tiles keep their
+    ETag while alerts arrive elsewhere. Versions come from one counter and
+    are never reused; empty tiles are forgotten and share version 0.
+    """
+
+    def __init__(self, max_zoom: int = 18, cell_bits: int = 3, cache_size: int = 4096):
+        """
+        Args:
+            max_zoom: Deepest zoom level served
+            cell_bits: log2 of the cluster grid size per tile axis
+            cache_size: Encoded tiles kept in memory
+        """
+        self.max_zoom = max_zoom
+        self.cell_bits = cell_bits
+        self.cache_size = cache_size
+        self.epoch = os.urandom(4).hex()
+        self.levels: List[Dict[Tuple[int, int], _Cell]] = [{} for _ in range(max_zoom + 1)]
+        # Alerts of each cell at the deepest level, to re-pick representatives
+        self.members: Dict[Tuple[int, int], Dict[str, Tuple[int, str, str]]] = {}
+        self.points: Dict[str, Tuple[int, int, float, float, Tuple[int, str, str]]] = {}
+        self.tile_versions: Dict[Tuple[int, int, int], int] = {}
+        self._tile_cells: Dict[Tuple[int, int, int], int] = {}
+        self._changes = 0
+        self._tile_cache: 'OrderedDict[Tuple[int, int, int], Tuple[int, bytes]]' = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _grid(self, lat: float, lon: float) -> Tuple[int, int]:
+        """Cell coordinates at the deepest level"""
+        x, y = mercator_fraction(lat, lon)
+        size = 1 << (self.max_zoom + self.cell_bits)
+        return int(x * size), int(y * size)
+
+    def _touch(self, z: int, cx: int, cy: int, cells_delta: int = 0):
+        tile = (z, cx >> self.cell_bits, cy >> self.cell_bits)
+        if cells_delta:
+            remaining = self._tile_cells.get(tile, 0) + cells_delta
+            if not remaining:
+                del self._tile_cells[tile]
+                self.tile_versions.pop(tile, None)
+                return
+            self._tile_cells[tile] = remaining
+        self.tile_versions[tile] = self._changes
+
+    def add(self, alert):
+        """Index an alert, moving it if it was indexed before"""
+        self.add_many([alert])
+
+    def add_many(self, alerts: Iterable):
+        """
+        Index a batch of alerts
+
+        Alerts without coordinates are ignored; re-added alerts are moved to
+        their new position and rank, or dropped if no longer active.
+        """
+        for alert in alerts:
+            alert_id, timestamp, level, status = _index_fields(alert)
+            if alert_id in self.points:
+                self.remove(alert_id)
+            point = alert_point(alert)
+            if point is None or status != 'active':
+                continue
+
+            self._changes += 1
+            lat, lon = point
+            gx, gy = self._grid(lat, lon)
+            key = (SEVERITY_RANK.get(str(level).lower(), 0), str(timestamp or ''), alert_id)
+            self.points[alert_id] = (gx, gy, lat, lon, key)
+            self.members.setdefault((gx, gy), {})[alert_id] = key
+
+            for z in range(self.max_zoom, -1, -1):
+                shift = self.max_zoom - z
+                cx, cy = gx >> shift, gy >> shift
+                cell = self.levels[z].get((cx, cy))
+                if cell is None:
+                    cell = self.levels[z][(cx, cy)] = _Cell()
+                    self._touch(z, cx, cy, 1)
+                else:
+                    self._touch(z, cx, cy)
+                cell.count += 1
+                cell.lat_sum += lat
+                cell.lon_sum += lon
+                if cell.rep is None or key > cell.rep:
+                    cell.rep = key
+
+    def remove(self, alert_id: str) -> bool:
+        """
+        Drop an alert from every level
+
+        Returns:
+            True if the alert was indexed
+        """
+        entry = self.points.pop(alert_id, None)
+        if entry is None:
+            return False
+        gx, gy, lat, lon, key = entry
+        self._changes += 1
+
+        members = self.members[(gx, gy)]
+        del members[alert_id]
+        if not members:
+            del self.members[(gx, gy)]
+
+        for z in range(self.max_zoom, -1, -1):
+            shift = self.max_zoom - z
+            cx, cy = gx >> shift, gy >> shift
+            level = self.levels[z]
+            cell = level[(cx, cy)]
+            cell.count -= 1
+            if not cell.count:
+                del level[(cx, cy)]
+                self._touch(z, cx, cy, -1)
+                continue
+            self._touch(z, cx, cy)
+            cell.lat_sum -= lat
+            cell.lon_sum -= lon
+            if cell.rep == key:
+                if z == self.max_zoom:
+                    cell.rep = max(members.values())
+                else:
+                    children = self.levels[z + 1]
+                    cell.rep = max(
+                        child.rep
+                        for child in (
+                            children.get((2 * cx + i, 2 * cy + j)) for i in (0, 1) for j in (0, 1)
+                        )
+                        if child is not None
+                    )
+        return True
+
+    def tile_version(self, z: int, x: int, y: int) -> int:
+        return self.tile_versions.get((z, x, y), 0)
+
+    def etag(self, z: int, x: int, y: int) -> str:
+        """Weak ETag of a tile's current contents"""
+        return f'W/"{self.epoch}-{z}-{x}-{y}-{self.tile_version(z, x, y)}"'
+
+    def clusters(self, z: int, x: int, y: int) -> List[Dict]:
+        """
+        Clusters of a tile
+
+        Returns:
+            One dict per non-empty cell with its alert count, centroid and
+            representative alert id
+        """
+        level = self.levels[z]
+        side = 1 << self.cell_bits
+        clusters = []
+        for cx in range(x << self.cell_bits, (x << self.cell_bits) + side):
+            for cy in range(y << self.cell_bits, (y << self.cell_bits) + side):
+                cell = level.get((cx, cy))
+                if cell is None:
+                    continue
+                clusters.append({
+                    'count': cell.count,
+                    'lat': cell.lat_sum / cell.count,
+                    'lon': cell.lon_sum / cell.count,
+                    'representative_id': cell.rep[2]
+                })
+        return clusters
+
+    def encode_tile(self, z: int, x: int, y: int, store) -> bytes:
+        """
+        JSON body of a tile, cached until the tile changes
+
+        Args:
+            z, x, y: Tile coordinates
+            store: Alert store supplying the representatives' cached encodings
+
+        Returns:
+            ``{"z", "x", "y", "clusters": [...]}`` with each cluster carrying
+            its representative alert under ``"alert"``
+        """
+        tile = (z, x, y)
+        version = self.tile_version(z, x, y)
+        cached = self._tile_cache.get(tile)
+        if cached is not None and cached[0] == version:
+            self.cache_hits += 1
+            self._tile_cache.move_to_end(tile)
+            return cached[1]
+        self.cache_misses += 1
+
+        parts = []
+        for cluster in self.clusters(z, x, y):
+            fragment = store.fragment(cluster['representative_id']) or b'null'
+            parts.append(dumps(cluster)[:-1] + b',"alert":' + fragment + b'}')
+        body = b''.join((
+            b'{"z":%d,"x":%d,"y":%d,"clusters":[' % tile,
+            b','.join(parts),
+            b']}'
+        ))
+
+        self._tile_cache[tile] = (version, body)
+        self._tile_cache.move_to_end(tile)
+        while len(self._tile_cache) > self.cache_size:
+            self._tile_cache.popitem(last=False)
+        return body
@@ -0,0 +1,197 @@
+import heapq
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * 6371.0 * math.asin(min(1.0, math.sqrt(a)))
+
+
+class Incident:
+    """Running state for one open incident"""
+
+    __slots__ = ('alert', 'disaster_type', 'lat', 'lon', 'last_seen', 'cell', 'miss_product')
+
+    def __init__(self, alert: Dict, disaster_type: str, lat: float, lon: float, seen_at: datetime):
+        self.alert = alert
+        self.disaster_type = disaster_type
+        self.lat = lat
+        self.lon = lon
+        self.last_seen = seen_at
+        self.cell = None
+        # Product of (1 - confidence) over reports, for noisy-OR aggregation
+        self.miss_product = 1.0 - alert['confidence_score']
+
+
+class IncidentClusterer:
+    """
+    Incrementally groups detections into incidents
+
+    Two detections belong to the same incident when they share a disaster
+    type, lie within ``radius_km`` of each other and arrive within
+    ``window`` of the incident's latest report. Open incidents are kept in a
+    grid of cells about ``radius_km`` wide, so matching a new detection only
+    inspects the handful of incidents in the neighbouring cells rather than
+    every open incident.
+    """
+
+    def __init__(self, radius_km: float = 25.0, window: timedelta = timedelta(hours=2)):
+        """
+        Args:
+            radius_km: Maximum distance between a report and an incident centre
+            window: Maximum gap between consecutive reports of one incident
+        """
+        self.radius_km = radius_km
+        self.window = window
+        self.cell_deg = radius_km / KM_PER_DEGREE
+        self.cells: Dict[Tuple, List[Incident]] = {}
+        self.incidents: Dict[str, Incident] = {}
+        self._expiry: List[Tuple[datetime, str]] = []
+        self._lon_widths: Dict[int, float] = {}
+
+    def _row(self, lat: float) -> int:
+        return math.floor(lat / self.cell_deg)
+
+    def _lon_width(self, row: int) -> float:
+        """Longitude cell width for a latitude row, at least radius_km everywhere in it"""
+        width = self._lon_widths.get(row)
+        if width is None:
+            edge = max(abs(row * self.cell_deg), abs((row + 1) * self.cell_deg))
+            width = self.cell_deg / max(math.cos(math.radians(min(edge, 89.0))), 1e-3)
+            self._lon_widths[row] = width
+        return width
+
+    def _cell(self, disaster_type: str, lat: float, lon: float) -> Tuple:
+        row = self._row(lat)
+        return (disaster_type, row, math.floor(lon / self._lon_width(row)))
+
+    def _neighbours(self, disaster_type: str, lat: float, lon: float):
+        row = self._row(lat)
+        for r in (row - 1, row, row + 1):
+            col = math.floor(lon / self._lon_width(r))
+            for c in (col - 1, col, col + 1):
+                yield from self.cells.get((disaster_type, r, c), ())
+
+    def _index(self, incident: Incident):
+        cell = self._cell(incident.disaster_type, incident.lat, incident.lon)
+        if cell == incident.cell:
+            return
+        self._unindex(incident)
+        incident.cell = cell
+        self.cells.setdefault(cell, []).append(incident)
+
+    def _unindex(self, incident: Incident):
+        if incident.cell is None:
+            return
+        bucket = self.cells.get(incident.cell)
+        if bucket is not None:
+            bucket.remove(incident)
+            if not bucket:
+                del self.cells[incident.cell]
+        incident.cell = None
+
+    def prune(self, now: datetime) -> int:
+        """
+        Close incidents whose latest report is older than the window
+
+        Args:
+            now: Current time
+
+        Returns:
+            Number of incidents closed
+        """
+        closed = 0
+        while self._expiry and self._expiry[0][0] < now:
+            deadline, incident_id = heapq.heappop(self._expiry)
+            incident = self.incidents.get(incident_id)
+            # Stale heap entry: the incident got a newer report since
+            if incident is None or incident.last_seen + self.window != deadline:
+                continue
+            self._unindex(incident)
+            del self.incidents[incident_id]
+            closed += 1
+        return closed
+
+    def discard(self, incident_id: str):
+        """Close an incident early, e.g. when its alert is evicted from the store"""
+        incident = self.incidents.pop(incident_id, None)
+        if incident is not None:
+            self._unindex(incident)
+
+    def add(self, alert: Dict, now: Optional[datetime] = None) -> Tuple[Dict, bool]:
+        """
+        Merge a new alert into a matching open incident or open a new one
+
+        Alerts without a disaster type or coordinates are never merged.
+
+        Args:
+            alert: Alert built from a single detection
+            now: Detection time, defaults to the current UTC time
+
+        Returns:
+            Tuple of (incident alert, True if a new incident was opened)
+        """
+        now = now or datetime.utcnow()
+        self.prune(now)
+
+        disaster_type = alert.get('disaster_type')
+        locations = alert.get('locations') or []
+        if not disaster_type or not locations:
+            alert['report_count'] = 1
+            return alert, True
+
+        lat, lon = locations[0]['lat'], locations[0]['lon']
+        best, best_distance = None, self.radius_km
+        for incident in self._neighbours(disaster_type, lat, lon):
+            distance = haversine_km(lat, lon, incident.lat, incident.lon)
+            if distance <= best_distance:
+                best, best_distance = incident, distance
+
+        if best is None:
+            incident = Incident(alert, disaster_type, lat, lon, now)
+            alert['report_count'] = 1
+            # Merges append to these; don't mutate the detection's lists
+            alert['locations'] = list(locations)
+            alert['keywords'] = list(alert.get('keywords') or [])
+            self.incidents[alert['id']] = incident
+            self._index(incident)
+            heapq.heappush(self._expiry, (now + self.window, alert['id']))
+            return alert, True
+
+        self._merge(best, alert, lat, lon, now)
+        return best.alert, False
+
+    def _merge(self, incident: Incident, alert: Dict, lat: float, lon: float, now: datetime):
+        merged = incident.alert
+        count = merged['report_count'] + 1
+        merged['report_count'] = count
+
+        # Noisy-OR: independent reports raise confidence, never lower it
+        incident.miss_product *= 1.0 - alert['confidence_score']
+        merged['confidence_score'] = 1.0 - incident.miss_product
+        merged['probability'] = max(merged['probability'], alert['probability'])
+        merged['last_report_at'] = alert['timestamp']
+
+        for location in alert['locations']:
+            if location not in merged['locations']:
+                merged['locations'].append(location)
+        for keyword in alert['keywords']:
+            if keyword not in merged['keywords']:
+                merged['keywords'].append(keyword)
+        if merged.get('geometry') is None and alert.get('geometry') is not None:
+            merged['geometry'] = alert['geometry']
+
+        # Running centroid of report positions
+        incident.lat += (lat - incident.lat) / count
+        incident.lon += (lon - incident.lon) / count
+        incident.last_seen = now
+        self._index(incident)
+        heapq.heappush(self._expiry, (now + self.window, merged['id']))
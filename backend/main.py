@@ -1,13 +1,31 @@
-from fastapi import FastAPI, WebSocket, HTTPException, Query
+from fastapi import FastAPI, WebSocket, HTTPException, Path, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List, Dict
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Optional, List, Dict, Iterator, Tuple, AsyncIterator
 import asyncio
-from datetime import datetime, timedelta
+import base64
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
 import logging
 import os
 import tweepy
 from dotenv import load_dotenv
 from sample_data import SampleDataProvider
+from alert_record import FeedAlert
+from serialization import CompressionMiddleware, dumps, encode_alerts_message, loads
+from alert_store import MemoryAlertStore, create_alert_store, utc_timestamp
+from alert_expiry import ExpiringAlertStore
+from polling_scheduler import PollingScheduler
+from fanout_hub import FanoutHub
+from alert_stream import FrameRing, format_sse
+from geo_tiles import GeoTileIndex
+from geo_polygons import PolygonIndex
+from social_media_collector import SocialMediaCollector
+from surge_detector import SurgeDetector
+from upstream_urls import rebase_session
+from feed_log import FeedRecorder, FeedReplayer
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -28,13 +46,26 @@ twitter_client = tweepy.Client(
     access_token=os.getenv('TWITTER_ACCESS_TOKEN'),
     access_token_secret=os.getenv('TWITTER_ACCESS_TOKEN_SECRET')
 )
+# Honour TWITTER_API_BASE_URL (tweepy hard-codes api.twitter.com)
+rebase_session(twitter_client.session, 'twitter')
+
+class FastJSONResponse(Response):
+    """JSON response encoded with the fast serialization layer."""
+    media_type = "application/json"
+    
+    def render(self, content) -> bytes:
+        return dumps(content)
 
 app = FastAPI(
     title="QuickAlert API",
     description="Real-time disaster alert system API",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
+# Compress HTTP responses (brotli or gzip, as negotiated)
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -45,50 +76,330 @@ app.add_middleware(
 )
 
 # Initialize sample data provider
-sample_data = SampleDataProvider()
+sample_data = SampleDataProvider(
+    seed=int(os.environ['SAMPLE_DATA_SEED']) if os.getenv('SAMPLE_DATA_SEED') else None
+)
+
+# Fetched alerts; persistent when ALERT_DB_PATH is set, so a restarted
+# worker can serve the last known alerts before its first poll completes.
+# Alerts are evicted when their TTL runs out or the store hits its cap.
+alert_store = ExpiringAlertStore(
+    create_alert_store(),
+    max_alerts=int(os.getenv('ALERT_MAX_COUNT', 100000))
+)
+
+# Ids of evicted alerts waiting to be announced to WebSocket clients
+expired_alert_ids: List[str] = []
+alert_store.add_listener(lambda alert, reason: expired_alert_ids.append(alert['id']))
+
+# Map clusters per zoom level, kept up to date as alerts arrive and expire
+tile_index = GeoTileIndex(max_zoom=int(os.getenv('TILE_MAX_ZOOM', 18)))
+tile_index.add_many(alert_store.iter_query())
+alert_store.add_listener(lambda alert, reason: tile_index.remove(alert['id']))
+# Resolved and dismissed alerts leave the map; re-activated ones return
+alert_store.add_status_listener(lambda alert, status: tile_index.add(alert))
+
+# Warning areas of stored alerts (NWS polygons), for point-in-area lookups
+warning_areas = PolygonIndex()
+for stored in alert_store.iter_query():
+    if stored.get('geometry'):
+        warning_areas.add(stored['id'], stored['geometry'])
+alert_store.add_listener(lambda alert, reason: warning_areas.remove(alert['id']))
+
+# Report rates per region and disaster type, for spotting sudden spikes
+surge_detector = SurgeDetector()
 
 # Store active WebSocket connections
 active_connections: List[WebSocket] = []
 
+# Recent broadcast frames, encoded once and shared by /ws and SSE clients
+alert_frames = FrameRing(capacity=int(os.getenv('ALERT_STREAM_HISTORY', 256)))
+
+# Seconds between SSE keepalive comments on an idle stream
+SSE_KEEPALIVE_INTERVAL = 15
+
+# Number of open /api/alerts/stream responses
+sse_streams = 0
+
+# Pipeline metrics served at /metrics; fetch, detection and cache metrics
+# are registered by the modules that record them. Each worker keeps its own
+# registry, so every series is labelled with the worker's pid
+metrics.REGISTRY.set_const_labels(worker=os.getpid())
+INGEST_SECONDS = metrics.histogram(
+    'quickalert_ingest_seconds', 'Time to store and index one published batch of alerts'
+)
+INGEST_ALERTS = metrics.histogram(
+    'quickalert_ingest_alerts', 'Alerts per published batch', buckets=metrics.COUNT_BUCKETS
+)
+BROADCAST_SECONDS = metrics.histogram(
+    'quickalert_broadcast_seconds', 'Time to send one update to every WebSocket client'
+)
+BROADCAST_FAILURES = metrics.counter(
+    'quickalert_broadcast_failures_total', 'WebSocket sends that failed and dropped the client'
+)
+metrics.gauge('quickalert_websocket_connections', 'Open WebSocket connections').set_function(
+    lambda: len(active_connections)
+)
+metrics.gauge('quickalert_sse_streams', 'Open Server-Sent Events streams').set_function(
+    lambda: sse_streams
+)
+metrics.gauge('quickalert_alerts_stored', 'Alerts in the store').set_function(lambda: len(alert_store))
+metrics.gauge('quickalert_expiry_queue_depth', 'Pending entries in the alert expiry heap').set_function(
+    lambda: alert_store.queue_depth
+)
+metrics.gauge('quickalert_expired_pending', 'Expired alert ids waiting to be broadcast').set_function(
+    lambda: len(expired_alert_ids)
+)
+metrics.gauge('quickalert_stream_frames', 'Frames held for resuming stream clients').set_function(
+    lambda: len(alert_frames.frames)
+)
+metrics.gauge('quickalert_fanout_followers', 'Workers following this fan-out leader').set_function(
+    lambda: len(fanout_hub.followers)
+)
+metrics.gauge('quickalert_fanout_leader', '1 on the worker that polls sources and fans out').set_function(
+    lambda: int(not fanout_hub.is_follower)
+)
+metrics.gauge('quickalert_fanout_buffered_bytes', 'Bytes queued for fan-out followers').set_function(
+    lambda: fanout_hub.buffered_bytes()
+)
+metrics.gauge('quickalert_profiler_running', '1 while the sampling profiler is on').set_function(
+    lambda: int(metrics.PROFILER.running)
+)
+metrics.watch_cache('tiles', tile_index, 'cache_hits', 'cache_misses')
+if isinstance(alert_store.store, MemoryAlertStore):
+    metrics.watch_cache('alert_fragments', alert_store.store, 'fragment_hits', 'fragment_misses')
+
+# PROFILER_TOKEN lets /debug/profiler be used from other hosts (X-Profiler-Token header)
+PROFILER_TOKEN = os.getenv('PROFILER_TOKEN')
+
 # Get disaster keywords from environment
 DISASTER_KEYWORDS = os.getenv('DISASTER_KEYWORDS', '').split(',')
 
-async def fetch_twitter_alerts() -> List[Dict]:
-    """Fetch recent disaster-related tweets."""
-    try:
-        query = ' OR '.join(DISASTER_KEYWORDS)
-        tweets = twitter_client.search_recent_tweets(
-            query=query,
-            max_results=10,
-            tweet_fields=['created_at', 'geo', 'public_metrics']
-        )
-        
-        alerts = []
-        if tweets.data:
-            for tweet in tweets.data:
-                alert = {
-                    "source": "twitter",
-                    "text": tweet.text,
-                    "severity": "Medium",  # Default severity, could be enhanced with NLP
-                    "created_at": tweet.created_at.isoformat(),
-                    "coordinates": tweet.geo.coordinates if tweet.geo else None,
-                    "engagement": {
-                        "retweets": tweet.public_metrics['retweet_count'],
-                        "likes": tweet.public_metrics['like_count'],
-                        "replies": tweet.public_metrics['reply_count']
-                    }
+def tweet_coordinates(tweet) -> Optional[Dict]:
+    """Point coordinates of a geotagged tweet, if it has exact ones."""
+    point = (tweet.geo or {}).get("coordinates") or {}
+    if point.get("type") != "Point":
+        return None
+    lon, lat = point["coordinates"]
+    return {"lat": lat, "lon": lon}
+
+async def fetch_twitter_alerts() -> List[FeedAlert]:
+    """
+    Fetch recent disaster-related tweets.
+    
+    Errors propagate so the polling scheduler logs them, counts the poll as
+    failed and backs off.
+    """
+    query = ' OR '.join(DISASTER_KEYWORDS)
+    # The client blocks on HTTP; keep it off the event loop
+    tweets = await asyncio.to_thread(
+        twitter_client.search_recent_tweets,
+        query=query,
+        max_results=10,
+        tweet_fields=['created_at', 'geo', 'public_metrics']
+    )
+    
+    alerts = []
+    if tweets.data:
+        for tweet in tweets.data:
+            alert = FeedAlert(
+                source="twitter",
+                text=tweet.text,
+                severity="Medium",  # Default severity, could be enhanced with NLP
+                created_at=tweet.created_at.isoformat(),
+                coordinates=tweet_coordinates(tweet),
+                engagement={
+                    "retweets": tweet.public_metrics['retweet_count'],
+                    "likes": tweet.public_metrics['like_count'],
+                    "replies": tweet.public_metrics['reply_count']
                 }
-                alerts.append(alert)
-        return alerts
-    except Exception as e:
-        logger.error(f"Error fetching Twitter alerts: {str(e)}")
-        return []
+            )
+            alerts.append(alert)
+    return alerts
+
+def _feed_alert_id(alert: FeedAlert) -> str:
+    """Stable id for a fetched alert so re-polls update it in place."""
+    key = f"{alert['source']}\0{alert['text']}".encode('utf-8')
+    return hashlib.blake2b(key, digest_size=12).hexdigest()
+
+# NWS warnings need no credentials; Twitter is polled with twitter_client above.
+# Every NWS response resyncs the "weather" source's budget from its headers
+weather_collector = SocialMediaCollector(
+    {},
+    rate_limit_observer=lambda source, headers, status_code: poll_scheduler.observe_response(
+        source, headers, status_code
+    )
+)
+
+async def fetch_weather_alerts() -> List[FeedAlert]:
+    """Fetch active NWS warnings with their warning areas."""
+    warnings = await asyncio.to_thread(weather_collector.fetch_weather_alerts)
+    return [
+        FeedAlert.from_dict(dict(warning, created_at=warning['created_at'].isoformat()))
+        for warning in warnings
+    ]
+
+async def fetch_sample_alerts() -> List[FeedAlert]:
+    """Sample alerts, so the feed has data when the APIs fail."""
+    return sample_data.get_all_alerts()
+
+async def publish_alerts(source: str, alerts: List[FeedAlert]):
+    """
+    Publish a source's polled alerts to every worker through the fan-out hub.
+    
+    Surges are detected here, once, by the worker that polled the alerts;
+    followers only receive the resulting events. Re-polled alerts are
+    already counted, so only new reports feed the rates.
+    """
+    for alert in alerts:
+        alert["id"] = _feed_alert_id(alert)
+    if feed_recorder is not None:
+        feed_recorder.record(source, alerts)
+    surges = surge_detector.observe_many(
+        alert for alert in alerts if alert_store.get(alert["id"]) is None
+    )
+    await fanout_hub.publish(dumps({
+        "type": "alerts",
+        "data": alerts,
+        "surges": surges,
+        "timestamp": datetime.now().isoformat()
+    }))
+
+def alerts_snapshot() -> bytes:
+    """Active alerts of this worker, sent to followers as they connect."""
+    return encode_alerts_message(
+        "alerts",
+        [fragment for _, fragment in alert_store.iter_encoded(status="active")],
+        datetime.now().isoformat()
+    )
+
+async def apply_alerts_update(payload: bytes):
+    """Save published alerts in this worker and broadcast them to its clients."""
+    update = loads(payload)
+    alerts = [FeedAlert.from_dict(alert) for alert in update["data"]]
+    # Detected by the publishing worker; snapshots carry none
+    surges = update.get("surges") or []
+    if fanout_hub.is_follower:
+        surge_detector.record(surges)
+    INGEST_ALERTS.observe(len(alerts))
+    with INGEST_SECONDS.time():
+        # Indexed first, so an alert evicted by the store cap is dropped again
+        for alert in alerts:
+            if alert.get("geometry"):
+                warning_areas.add(alert["id"], alert["geometry"])
+        alert_store.add_many(alerts)
+        tile_index.add_many(alerts)
+        alert_store.expire()
+    timestamp = datetime.now().isoformat()
+    
+    # Encode each message once, reusing cached alert encodings
+    fragments = (alert_store.fragment(alert["id"]) for alert in alerts)
+    frames = [alert_frames.append("alerts", encode_alerts_message(
+        "alerts",
+        [fragment for fragment in fragments if fragment is not None],
+        timestamp
+    ))]
+    if expired_alert_ids:
+        frames.append(alert_frames.append("expired", dumps({
+            "type": "expired",
+            "data": expired_alert_ids,
+            "timestamp": timestamp
+        })))
+        expired_alert_ids.clear()
+    if surges:
+        frames.append(alert_frames.append("surge", dumps({
+            "type": "surge",
+            "data": surges,
+            "timestamp": timestamp
+        })))
+    
+    with BROADCAST_SECONDS.time():
+        for connection in list(active_connections):
+            try:
+                for frame in frames:
+                    await connection.send_text(frame.text)
+            except Exception as e:
+                logger.error(f"Error sending to client: {str(e)}")
+                BROADCAST_FAILURES.inc()
+                active_connections.remove(connection)
+
+# With several uvicorn workers only the hub leader polls the sources; every
+# worker applies the leader's updates and fans them out to its own clients
+fanout_hub = FanoutHub(
+    apply_alerts_update,
+    on_leader=lambda: start_ingestion(),
+    snapshot=alerts_snapshot
+)
+
+# FEED_RECORD_PATH appends every polled batch to a feed log; FEED_REPLAY_PATH
+# replays one (at FEED_REPLAY_SPEED times real time) instead of polling
+feed_recorder = FeedRecorder(os.environ['FEED_RECORD_PATH']) if os.getenv('FEED_RECORD_PATH') else None
+feed_replayer = FeedReplayer(
+    os.environ['FEED_REPLAY_PATH'],
+    publish_alerts,
+    speed=float(os.getenv('FEED_REPLAY_SPEED', 1))
+) if os.getenv('FEED_REPLAY_PATH') else None
+
+# The event loop only holds tasks weakly; keep the leader's ingestion task alive
+ingestion_task: Optional[asyncio.Task] = None
+
+def start_ingestion() -> asyncio.Task:
+    """Start polling the sources, or replaying the configured feed log instead."""
+    global ingestion_task
+    if feed_replayer is not None:
+        ingestion_task = asyncio.create_task(feed_replayer.run())
+    else:
+        ingestion_task = asyncio.create_task(poll_scheduler.run())
+    return ingestion_task
+
+# Each source is polled on its own schedule within its rate limit: faster
+# while it keeps producing new alerts, slower when quiet or failing
+REFRESH_INTERVAL = int(os.getenv('ALERT_REFRESH_INTERVAL', 300))
+poll_scheduler = PollingScheduler(publish_alerts)
+poll_scheduler.register(
+    "twitter",
+    lambda: fetch_twitter_alerts(),
+    interval=REFRESH_INTERVAL,
+    min_interval=int(os.getenv('ALERT_MIN_REFRESH_INTERVAL', 30)),
+    max_interval=int(os.getenv('ALERT_MAX_REFRESH_INTERVAL', 1800)),
+    requests_per_hour=float(os.getenv('TWITTER_RATE_LIMIT', 180)),
+    item_key=_feed_alert_id
+)
+poll_scheduler.register(
+    "weather",
+    lambda: fetch_weather_alerts(),
+    interval=REFRESH_INTERVAL,
+    min_interval=int(os.getenv('ALERT_MIN_REFRESH_INTERVAL', 30)),
+    max_interval=int(os.getenv('ALERT_MAX_REFRESH_INTERVAL', 1800)),
+    item_key=_feed_alert_id
+)
+poll_scheduler.register(
+    "sample",
+    lambda: fetch_sample_alerts(),
+    interval=REFRESH_INTERVAL,
+    min_interval=REFRESH_INTERVAL,
+    max_interval=REFRESH_INTERVAL,
+    item_key=_feed_alert_id
+)
+
+# Rate-limit headers of every Twitter response resync the source's budget
+twitter_client.session.hooks["response"].append(
+    lambda response, *args, **kwargs: poll_scheduler.observe_response(
+        "twitter", response.headers, response.status_code
+    )
+)
+
+async def fetch_all_alerts():
+    """Poll every source once now, within its rate budget."""
+    for source in list(poll_scheduler.sources):
+        await poll_scheduler.poll(source)
 
-async def fetch_all_alerts() -> List[Dict]:
-    """Fetch alerts from all sources."""
-    twitter_alerts = await fetch_twitter_alerts()
-    sample_alerts = sample_data.get_all_alerts()  # Get some sample data if APIs fail
-    return twitter_alerts + sample_alerts
+async def ensure_alerts_loaded():
+    """Drop expired alerts and poll the sources only if the store is empty."""
+    alert_store.expire()
+    # Followers get their alerts from the leader, and a replayed feed replaces the upstream APIs
+    if not len(alert_store) and not fanout_hub.is_follower and feed_replayer is None:
+        await fetch_all_alerts()
 
 @app.get("/")
 async def root():
@@ -100,48 +411,259 @@ async def root():
         "timestamp": datetime.now().isoformat()
     }
 
+def encode_cursor(alert: Dict) -> str:
+    """Opaque pagination cursor pointing just past an alert."""
+    key = json.dumps([utc_timestamp(alert.get("timestamp") or alert["created_at"]), alert["id"]])
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Decode a cursor from encode_cursor into a (timestamp, id) store key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, alert_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(timestamp), str(alert_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def alerts_etag(**params) -> str:
+    """
+    ETag for a filtered view of the current alert store snapshot.
+    
+    Versions restart with the store and differ per worker, so the store's
+    random epoch is part of the tag.
+    """
+    digest = hashlib.blake2b(
+        json.dumps(params, sort_keys=True, default=str).encode("utf-8"),
+        digest_size=8
+    ).hexdigest()
+    return f'W/"{alert_store.epoch}-{alert_store.version}-{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header covers the given ETag."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+def encode_alerts_page(alerts: Iterator[Tuple[Dict, bytes]], limit: Optional[int], filters: Dict) -> bytes:
+    """
+    Encode a page of alerts from their cached JSON encodings.
+    
+    The page is joined into one body rather than streamed: a chunk per alert
+    costs a threadpool hop and a compressor flush each, which dominated the
+    response time of large pages.
+    """
+    fragments = []
+    last = None
+    has_more = False
+    for alert, fragment in alerts:
+        if limit is not None and len(fragments) >= limit:
+            has_more = True
+            break
+        fragments.append(fragment)
+        last = alert
+    
+    return b"".join((
+        b'{"alerts":[',
+        b",".join(fragments),
+        b"],",
+        dumps({
+            "timestamp": datetime.now().isoformat(),
+            "count": len(fragments),
+            "next_cursor": encode_cursor(last) if has_more else None,
+            "filters": filters
+        })[1:]
+    ))
+
 @app.get("/api/alerts")
 async def get_alerts(
+    request: Request,
     source: Optional[str] = Query(None, description="Filter by source (twitter)"),
     severity: Optional[str] = Query(None, description="Filter by severity (High, Medium, Low)"),
-    hours: Optional[int] = Query(24, description="Get alerts from the last N hours", ge=1, le=72)
+    hours: Optional[int] = Query(24, description="Get alerts from the last N hours", ge=1, le=72),
+    limit: Optional[int] = Query(None, description="Maximum alerts per page", ge=1, le=1000),
+    after: Optional[str] = Query(None, description="Cursor from a previous page's next_cursor")
 ):
-    """Get filtered alerts."""
+    """Get filtered alerts, newest first, optionally one page at a time."""
     try:
-        alerts = await fetch_all_alerts()
+        await ensure_alerts_loaded()
+        
+        # Whole-minute cutoff so the view, and its ETag, is stable within a minute
+        cutoff_time = (datetime.now(timezone.utc) - timedelta(hours=hours)).replace(second=0, microsecond=0)
+        etag = alerts_etag(
+            source=source,
+            severity=severity,
+            since=cutoff_time,
+            limit=limit,
+            after=after
+        )
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        alerts = alert_store.iter_encoded(
+            status="active",
+            level=severity,
+            since=utc_timestamp(cutoff_time),
+            after=decode_cursor(after) if after else None
+        )
         
         # Apply filters
         if source:
-            alerts = [a for a in alerts if a["source"] == source]
-        if severity:
-            alerts = [a for a in alerts if a["severity"] == severity]
-            
-        # Filter by time
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        alerts = [
-            a for a in alerts 
-            if datetime.fromisoformat(a["created_at"]) > cutoff_time
-        ]
-            
-        return {
-            "alerts": alerts,
-            "timestamp": datetime.now().isoformat(),
-            "count": len(alerts),
-            "filters": {
-                "source": source,
-                "severity": severity,
-                "hours": hours
-            }
+            alerts = (pair for pair in alerts if pair[0]["source"] == source)
+        
+        filters = {
+            "source": source,
+            "severity": severity,
+            "hours": hours
         }
+        return Response(
+            encode_alerts_page(alerts, limit, filters),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching alerts: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def initial_message() -> bytes:
+    """Message with every active alert, sent when a client connects."""
+    return encode_alerts_message(
+        "initial",
+        [fragment for _, fragment in alert_store.iter_encoded(status="active")],
+        datetime.now().isoformat()
+    )
+
+async def stream_alert_events(last_frame_id: Optional[int]) -> AsyncIterator[bytes]:
+    """Server-Sent Events for one client, resuming after last_frame_id if possible."""
+    yield b"retry: 3000\n\n"
+    
+    frames = alert_frames.since(last_frame_id) if last_frame_id is not None else None
+    cursor = alert_frames.last_id
+    if frames is None:
+        await ensure_alerts_loaded()
+        cursor = alert_frames.last_id
+        yield format_sse(initial_message(), "initial", alert_frames.event_id(cursor))
+    else:
+        for frame in frames:
+            yield frame.sse
+    
+    while True:
+        if not await alert_frames.wait(cursor, SSE_KEEPALIVE_INTERVAL):
+            yield b": keepalive\n\n"
+            continue
+        frames = alert_frames.since(cursor)
+        if frames is None:
+            # Fell further behind than the ring holds; start over from a snapshot
+            cursor = alert_frames.last_id
+            yield format_sse(initial_message(), "initial", alert_frames.event_id(cursor))
+            continue
+        for frame in frames:
+            yield frame.sse
+            cursor = frame.id
+
+async def counted_stream(events: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Pass events through, keeping the open stream count for /metrics."""
+    global sse_streams
+    sse_streams += 1
+    try:
+        async for event in events:
+            yield event
+    finally:
+        sse_streams -= 1
+
+@app.get("/api/alerts/stream")
+async def stream_alerts(request: Request, last_event_id: Optional[str] = None):
+    """
+    Stream alert updates as Server-Sent Events.
+    
+    Sends an "initial" event with every active alert, then "alerts" and
+    "expired" events as they are broadcast. Reconnecting clients send
+    Last-Event-ID (or ?last_event_id=) and only receive what they missed.
+    """
+    last_frame_id = alert_frames.parse_event_id(
+        request.headers.get("last-event-id") or last_event_id
+    )
+    return StreamingResponse(
+        counted_stream(stream_alert_events(last_frame_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/alerts/tiles/{z}/{x}/{y}")
+async def get_alert_tile(
+    request: Request,
+    z: int = Path(..., ge=0),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0)
+):
+    """
+    Get the alert clusters of one XYZ map tile.
+    
+    Each cluster has its alert count, centroid and most severe alert.
+    Tiles carry an ETag that only changes when alerts in the tile do.
+    """
+    if z > tile_index.max_zoom or x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=404, detail="Tile out of range")
+    
+    await ensure_alerts_loaded()
+    etag = tile_index.etag(z, x, y)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=tile_index.encode_tile(z, x, y, alert_store),
+        media_type="application/json",
+        headers=headers
+    )
+
+@app.get("/api/surges")
+async def get_surges(
+    disaster_type: Optional[str] = None,
+    min_count: int = Query(1, ge=1)
+):
+    """
+    Get report counts per region and disaster type over the sliding window.
+    
+    Counts come from incrementally maintained windows, not a scan of the
+    alert store. Recent surge events are included. Only the worker that
+    polls the sources counts reports; followers just relay its surges.
+    """
+    return {
+        "windows": surge_detector.window_counts(disaster_type=disaster_type, min_count=min_count),
+        "surges": surge_detector.recent_surges,
+        "window_seconds": surge_detector.window_buckets * surge_detector.bucket_seconds,
+        "recent_seconds": surge_detector.short_buckets * surge_detector.bucket_seconds,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/warnings")
+async def get_warnings_at(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180)
+):
+    """Get active alerts whose warning area contains a point."""
+    alerts = [alert_store.get(alert_id) for alert_id in warning_areas.covering(lat, lon)]
+    return {
+        "alerts": [alert for alert in alerts if alert is not None and alert.get("status", "active") == "active"],
+        "timestamp": datetime.now().isoformat()
+    }
+
 @app.get("/api/sources")
 async def get_sources():
     """Get available alert sources."""
     return {
-        "sources": ["twitter"],
+        "sources": ["twitter", "weather"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/sources/status")
+async def get_sources_status():
+    """Get polling interval, rate-limit quota and data freshness per source."""
+    return {
+        "sources": poll_scheduler.status(),
+        "worker": {"pid": os.getpid(), "role": fanout_hub.role or "standalone"},
         "timestamp": datetime.now().isoformat()
     }
 
@@ -153,25 +675,54 @@ async def get_severities():
         "timestamp": datetime.now().isoformat()
     }
 
-async def broadcast_alerts():
-    """Broadcast alerts to all connected clients."""
-    while True:
-        if active_connections:
-            try:
-                alerts = await fetch_all_alerts()
-                for connection in active_connections:
-                    try:
-                        await connection.send_json({
-                            "type": "alerts",
-                            "data": alerts,
-                            "timestamp": datetime.now().isoformat()
-                        })
-                    except Exception as e:
-                        logger.error(f"Error sending to client: {str(e)}")
-                        active_connections.remove(connection)
-            except Exception as e:
-                logger.error(f"Error in broadcast: {str(e)}")
-        await asyncio.sleep(int(os.getenv('ALERT_REFRESH_INTERVAL', 300)))
+@app.get("/metrics")
+async def get_metrics():
+    """Pipeline metrics in the Prometheus text format."""
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def check_profiler_access(request: Request, token: Optional[str]):
+    """Allow the profiler endpoints from this host, or with PROFILER_TOKEN from anywhere."""
+    if PROFILER_TOKEN and token == PROFILER_TOKEN:
+        return
+    if request.client is not None and request.client.host in ("127.0.0.1", "::1", "localhost"):
+        return
+    raise HTTPException(status_code=403, detail="Profiler is only available locally or with PROFILER_TOKEN")
+
+@app.post("/debug/profiler/start")
+async def start_profiler(
+    request: Request,
+    interval: Optional[float] = Query(None, ge=0.001, le=1.0),
+    reset: bool = False
+):
+    """Start the sampling profiler; interval is seconds between samples."""
+    check_profiler_access(request, request.headers.get("x-profiler-token"))
+    if reset:
+        metrics.PROFILER.reset()
+    metrics.PROFILER.start(interval)
+    return metrics.PROFILER.status()
+
+@app.post("/debug/profiler/stop")
+async def stop_profiler(request: Request):
+    """Stop the sampling profiler, keeping the stacks collected so far."""
+    check_profiler_access(request, request.headers.get("x-profiler-token"))
+    metrics.PROFILER.stop()
+    return metrics.PROFILER.status()
+
+@app.get("/debug/profiler")
+async def get_profile(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1),
+    folded: bool = False
+):
+    """
+    Profiler status and the sampled stacks.
+    
+    With folded=true returns plain folded stacks for flamegraph.pl or speedscope.
+    """
+    check_profiler_access(request, request.headers.get("x-profiler-token"))
+    if folded:
+        return PlainTextResponse(metrics.PROFILER.folded(limit))
+    return {**metrics.PROFILER.status(), "stacks": metrics.PROFILER.folded(limit).splitlines()}
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -181,12 +732,8 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         # Send initial data
-        initial_alerts = await fetch_all_alerts()
-        await websocket.send_json({
-            "type": "initial",
-            "data": initial_alerts,
-            "timestamp": datetime.now().isoformat()
-        })
+        await ensure_alerts_loaded()
+        await websocket.send_text(initial_message().decode("utf-8"))
         
         while True:
             try:
@@ -207,8 +754,26 @@ async def websocket_endpoint(websocket: WebSocket):
 
 @app.on_event("startup")
 async def startup_event():
-    """Start background tasks on application startup."""
-    asyncio.create_task(broadcast_alerts())
+    """Join the worker fan-out; the elected leader starts polling."""
+    await fanout_hub.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop ingesting and leave the fan-out so another worker can take over."""
+    global ingestion_task
+    if ingestion_task is not None:
+        ingestion_task.cancel()
+        try:
+            await ingestion_task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Ingestion task failed: {str(e)}")
+        ingestion_task = None
+    await fanout_hub.stop()
+    metrics.PROFILER.stop()
+    if feed_recorder is not None:
+        feed_recorder.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,441 @@
+import abc
+import bisect
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency buckets in seconds, from sub-millisecond cache paths to slow APIs
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+# Buckets for batch sizes and other counts
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], *extra: str) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric(abc.ABC):
+    """Base of a named metric with optional labels; one child per label set"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self.labels()
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """New value holder for one label set"""
+
+    def labels(self, *values) -> object:
+        """Child metric for one combination of label values"""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    @abc.abstractmethod
+    def samples(self, const: str = '') -> Iterable[Tuple[str, str, float]]:
+        """
+        (name suffix, label string, value) for every sample
+
+        Args:
+            const: Rendered constant label pairs added to every sample
+        """
+
+    def render(self, const: str = '') -> List[str]:
+        documentation = self.documentation.replace('\\', '\\\\').replace('\n', '\\n')
+        lines = [f'# HELP {self.name} {documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, labels, value in self.samples(const):
+            lines.append(f'{self.name}{suffix}{labels} {_format_value(value)}')
+        return lines
+
+
+class _Value:
+    __slots__ = ('value', 'lock', 'function')
+
+    def __init__(self, lock: threading.Lock):
+        self.value = 0
+        self.lock = lock
+        self.function: Optional[Callable[[], float]] = None
+
+    def inc(self, amount: float = 1):
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from a callback at scrape time instead"""
+        self.function = function
+
+    def get(self) -> float:
+        if self.function is not None:
+            try:
+                return self.function()
+            except Exception as e:
+                logger.error(f"Metric callback failed: {str(e)}")
+                return float('nan')
+        return self.value
+
+
+class Counter(_Metric):
+    """Monotonically increasing count; by convention named ``*_total``"""
+
+    kind = 'counter'
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def samples(self, const: str = ''):
+        for key, child in list(self._children.items()):
+            yield '', _labels(self.labelnames, key, const), child.get()
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, set directly or read from a callback"""
+
+    kind = 'gauge'
+
+    def _new_child(self) -> _Value:
+        return _Value(self._lock)
+
+    def inc(self, amount: float = 1):
+        self._default.inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default.dec(amount)
+
+    def set(self, value: float):
+        self._default.set(value)
+
+    def set_function(self, function: Callable[[], float]):
+        self._default.set_function(function)
+
+    def samples(self, const: str = ''):
+        for key, child in list(self._children.items()):
+            yield '', _labels(self.labelnames, key, const), child.get()
+
+
+class _Timer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram: '_HistogramValue'):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _HistogramValue:
+    __slots__ = ('bounds', 'counts', 'sum', 'lock')
+
+    def __init__(self, bounds: Tuple[float, ...], lock: threading.Lock):
+        self.bounds = bounds
+        # One slot per bucket plus +Inf; made cumulative only when rendered
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.lock = lock
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """Context manager observing the seconds spent in its block"""
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    """Distribution of observations in fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.bounds, self._lock)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return self._default.time()
+
+    def samples(self, const: str = ''):
+        for key, child in list(self._children.items()):
+            with self._lock:
+                counts = list(child.counts)
+                total = child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float('inf'),), counts):
+                cumulative += count
+                yield '_bucket', _labels(self.labelnames, key, const, f'le="{_format_value(bound)}"'), cumulative
+            yield '_sum', _labels(self.labelnames, key, const), total
+            yield '_count', _labels(self.labelnames, key, const), cumulative
+
+
+class Registry:
+    """
+    Set of metrics rendered together in the Prometheus text format
+
+    Besides metrics, collectors can be registered: callables run at scrape
+    time that return ready-made metrics, for numbers other objects already
+    keep (cache hit counts, queue lengths) so the hot path does no extra work.
+
+    Constant labels are added to every sample, e.g. ``worker`` so series
+    from different processes of one deployment stay apart.
+    """
+
+    def __init__(self):
+        self.metrics: Dict[str, _Metric] = {}
+        self.collectors: List[Callable[[], Iterable[_Metric]]] = []
+        self.const_labels: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def set_const_labels(self, **labels: str):
+        """Add labels to every sample this registry renders"""
+        self.const_labels.update({name: str(value) for name, value in labels.items()})
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def add_collector(self, collector: Callable[[], Iterable[_Metric]]):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format"""
+        const = ','.join(f'{name}="{_escape(value)}"' for name, value in self.const_labels.items())
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render(const))
+        for collector in list(self.collectors):
+            try:
+                for metric in collector():
+                    lines.extend(metric.render(const))
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Counter in the default registry; returns the existing one if already registered"""
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Gauge in the default registry; returns the existing one if already registered"""
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    """Histogram in the default registry; returns the existing one if already registered"""
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
+
+
+_watched_caches: Dict[str, 'weakref.ref'] = {}
+
+
+def _cache_metrics() -> Iterable[_Metric]:
+    hits = Counter('quickalert_cache_hits_total', 'Cache lookups answered from the cache', ['cache'])
+    misses = Counter('quickalert_cache_misses_total', 'Cache lookups that had to compute the value', ['cache'])
+    for name, (ref, hits_attr, misses_attr) in list(_watched_caches.items()):
+        cache = ref()
+        if cache is None:
+            del _watched_caches[name]
+            continue
+        hits.labels(name).set_function(lambda c=cache, a=hits_attr: getattr(c, a))
+        misses.labels(name).set_function(lambda c=cache, a=misses_attr: getattr(c, a))
+    return [hits, misses]
+
+
+def watch_cache(name: str, cache, hits_attr: str = 'hits', misses_attr: str = 'misses'):
+    """
+    Report a cache's own hit and miss counters
+
+    The cache keeps counting with plain attribute increments; the values
+    are only read when metrics are scraped. Only a weak reference is kept,
+    and a later cache registered under the same name replaces it.
+
+    Args:
+        name: Value of the ``cache`` label
+        cache: Object with hit and miss counter attributes
+        hits_attr: Attribute holding the hit count
+        misses_attr: Attribute holding the miss count
+    """
+    if not _watched_caches:
+        REGISTRY.add_collector(_cache_metrics)
+    _watched_caches[name] = (weakref.ref(cache), hits_attr, misses_attr)
+
+
+class SamplingProfiler:
+    """
+    Opt-in statistical profiler that can be switched on and off at runtime
+
+    While running, a daemon thread wakes every ``interval`` seconds and
+    records the current stack of every other thread. Stacks are aggregated
+    in the folded format (``outer;inner;leaf count`` per line) read by
+    flamegraph.pl and speedscope. When stopped it costs nothing.
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        """
+        Args:
+            interval: Seconds between samples
+            max_depth: Innermost frames kept per stack
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: collections.Counter = collections.Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None) -> bool:
+        """
+        Start sampling; keeps stacks already collected
+
+        Returns:
+            False if the profiler was already running
+        """
+        if self.running:
+            return False
+        if interval is not None:
+            self.interval = interval
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started every {self.interval * 1000:.1f} ms")
+        return True
+
+    def stop(self) -> bool:
+        """
+        Stop sampling
+
+        Returns:
+            False if the profiler was not running
+        """
+        if not self.running:
+            return False
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        logger.info(f"Sampling profiler stopped after {self.samples} samples")
+        return True
+
+    def reset(self):
+        """Forget the collected stacks"""
+        self.stacks = collections.Counter()
+        self.samples = 0
+
+    def _frame_name(self, frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.max_depth:
+                    names.append(self._frame_name(frame))
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+    def folded(self, limit: Optional[int] = None) -> str:
+        """Collected stacks in the folded format, most frequent first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common(limit))
+
+    def status(self) -> Dict:
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'samples': self.samples,
+            'distinct_stacks': len(self.stacks),
+            'started_at': self.started_at,
+        }
+
+
+PROFILER = SamplingProfiler()
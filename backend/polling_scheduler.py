@@ -0,0 +1,358 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+FETCH_SECONDS = metrics.histogram(
+    'quickalert_fetch_seconds', 'Time to fetch one poll cycle from a source', ['source']
+)
+FETCH_ITEMS = metrics.histogram(
+    'quickalert_fetch_items', 'Items returned per poll cycle', ['source'], buckets=metrics.COUNT_BUCKETS
+)
+FETCH_NEW_ITEMS = metrics.counter(
+    'quickalert_fetch_new_items_total', 'Items not seen in earlier poll cycles', ['source']
+)
+FETCH_FAILURES = metrics.counter(
+    'quickalert_fetch_failures_total', 'Poll cycles that raised or got an error response', ['source']
+)
+FETCH_THROTTLED = metrics.counter(
+    'quickalert_fetch_throttled_total', 'Polls skipped because the rate budget was spent', ['source']
+)
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str],
+                             now: Optional[float] = None) -> Optional[Tuple[Optional[int], int, float]]:
+    """
+    Read the rate-limit state a source reports in its response headers
+
+    Understands Twitter (``x-rate-limit-*``, reset as epoch seconds), Reddit
+    (``x-ratelimit-*``, reset as seconds from now) and the IETF draft
+    ``RateLimit-*`` fields. ``Retry-After`` alone is treated as zero
+    remaining until that time.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        now: Current epoch time, defaults to time.time()
+
+    Returns:
+        Tuple of (limit or None, remaining, reset epoch time), or None if the
+        response carries no rate-limit information
+    """
+    now = time.time() if now is None else now
+    lowered = {k.lower(): v for k, v in headers.items()}
+
+    def number(key: str) -> Optional[float]:
+        try:
+            return float(lowered[key])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    remaining = number('x-rate-limit-remaining')
+    if remaining is not None:
+        limit = number('x-rate-limit-limit')
+        reset = number('x-rate-limit-reset')
+        return (int(limit) if limit is not None else None, int(remaining),
+                reset if reset is not None else now + 900)
+
+    for prefix in ('x-ratelimit-', 'ratelimit-'):
+        remaining = number(prefix + 'remaining')
+        if remaining is not None:
+            limit = number(prefix + 'limit')
+            used = number(prefix + 'used')
+            if limit is None and used is not None:
+                limit = used + remaining
+            reset = number(prefix + 'reset')
+            return (int(limit) if limit is not None else None, int(remaining),
+                    now + (reset if reset is not None else 60))
+
+    retry_after = number('retry-after')
+    if retry_after is not None:
+        return None, 0, now + retry_after
+    return None
+
+
+class TokenBucket:
+    """
+    Request budget for one source
+
+    Refills continuously at ``rate`` tokens per second up to ``capacity``.
+    When the source reports its real quota in response headers, the bucket
+    is resynchronised to it so local estimates never outrun the server.
+    """
+
+    def __init__(self, capacity: float, rate: float, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            capacity: Maximum burst of requests
+            rate: Tokens added per second
+            clock: Time source, injectable for tests
+        """
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self.tokens = capacity
+        self.blocked_until = 0.0
+        self._updated = clock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, now: Optional[float] = None) -> bool:
+        """Take one token if available"""
+        now = self.clock() if now is None else now
+        if now < self.blocked_until:
+            return False
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def next_available(self, now: Optional[float] = None) -> float:
+        """Earliest time a token will be available"""
+        now = self.clock() if now is None else now
+        self._refill(now)
+        ready = now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+        return max(ready, self.blocked_until)
+
+    def sync(self, limit: Optional[int], remaining: int, reset_at: float, now: Optional[float] = None):
+        """
+        Align the bucket with the quota reported by the source
+
+        Args:
+            limit: Requests allowed per window, if reported
+            remaining: Requests left in the current window
+            reset_at: Epoch time the window resets
+            now: Current time
+        """
+        now = self.clock() if now is None else now
+        self._updated = now
+        self.tokens = min(float(remaining), self.capacity)
+        if remaining <= 0:
+            self.blocked_until = reset_at
+        if limit:
+            self.capacity = float(limit)
+        # Spread what is left evenly over the rest of the window
+        window_left = max(reset_at - now, 1.0)
+        self.rate = max(remaining, 1) / window_left
+
+
+class SourcePoller:
+    """Adaptive polling state and statistics for one source"""
+
+    def __init__(self,
+                 name: str,
+                 fetch: Callable[[], Awaitable[List]],
+                 bucket: TokenBucket,
+                 interval: float,
+                 min_interval: float,
+                 max_interval: float,
+                 item_key: Callable):
+        self.name = name
+        self.fetch = fetch
+        self.bucket = bucket
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.item_key = item_key
+        self.next_run = 0.0
+        self.seen: 'OrderedDict[str, None]' = OrderedDict()
+
+        self.polls = 0
+        self.items = 0
+        self.new_items = 0
+        self.errors = 0
+        self.throttled = 0
+        self.consecutive_errors = 0
+        self.last_success: Optional[float] = None
+        self.last_new_item: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.quota: Optional[Tuple[Optional[int], int, float]] = None
+        self._response_error = False
+
+    def count_new(self, items: Iterable) -> int:
+        """Count items not seen in recent polls, remembering a bounded window"""
+        new = 0
+        for item in items:
+            key = self.item_key(item)
+            if key in self.seen:
+                self.seen.move_to_end(key)
+                continue
+            self.seen[key] = None
+            new += 1
+        while len(self.seen) > 10000:
+            self.seen.popitem(last=False)
+        return new
+
+    def adapt(self, new_items: int, failed: bool):
+        """Speed up while a source is producing, back off when quiet or failing"""
+        if failed:
+            self.consecutive_errors += 1
+            self.interval = min(self.max_interval, self.interval * 2)
+        elif new_items:
+            self.consecutive_errors = 0
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.consecutive_errors = 0
+            self.interval = min(self.max_interval, self.interval * 1.5)
+
+    def status(self, now: float) -> Dict:
+        """Quota spend and freshness for the status endpoint"""
+        limit, remaining, reset_at = self.quota or (None, None, None)
+        return {
+            'interval_seconds': round(self.interval, 1),
+            'next_poll_in_seconds': round(max(self.next_run - now, 0.0), 1),
+            'polls': self.polls,
+            'throttled': self.throttled,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'items': self.items,
+            'new_items': self.new_items,
+            'seconds_since_success': round(now - self.last_success, 1) if self.last_success else None,
+            'seconds_since_new_item': round(now - self.last_new_item, 1) if self.last_new_item else None,
+            'quota': {
+                'limit': limit,
+                'remaining': remaining,
+                'resets_in_seconds': round(max(reset_at - now, 0.0), 1) if reset_at else None,
+                'local_tokens': round(self.bucket.tokens, 2)
+            }
+        }
+
+
+class PollingScheduler:
+    """
+    Polls each registered source on its own adaptive schedule
+
+    Every source has a token bucket sized to its rate limit. Rate-limit
+    headers reported through ``observe_response`` resynchronise the bucket,
+    and an exhausted quota parks the source until the reset time instead of
+    blocking inside the client. Poll intervals halve while a source keeps
+    returning new items and grow when it is quiet or failing.
+    """
+
+    def __init__(self,
+                 on_items: Callable[[str, List], Awaitable[None]],
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            on_items: Coroutine called with (source name, items) after each poll
+            clock: Time source, injectable for tests
+        """
+        self.on_items = on_items
+        self.clock = clock
+        self.sources: Dict[str, SourcePoller] = {}
+
+    def register(self,
+                 name: str,
+                 fetch: Callable[[], Awaitable[List]],
+                 interval: float = 300,
+                 min_interval: float = 30,
+                 max_interval: float = 1800,
+                 requests_per_hour: float = 3600,
+                 burst: Optional[float] = None,
+                 item_key: Callable = lambda item: item['id']):
+        """
+        Add a source to poll
+
+        Args:
+            name: Source name
+            fetch: Coroutine returning the items of one poll
+            interval: Starting poll interval in seconds
+            min_interval: Shortest interval while the source is busy
+            max_interval: Longest interval while quiet or failing
+            requests_per_hour: Local request budget until headers say otherwise
+            burst: Bucket capacity, defaults to a tenth of the hourly budget
+            item_key: Identity of an item, used to count new items
+        """
+        rate = requests_per_hour / 3600.0
+        capacity = burst if burst is not None else max(1.0, requests_per_hour / 10)
+        self.sources[name] = SourcePoller(
+            name, fetch, TokenBucket(capacity, rate, self.clock),
+            interval, min_interval, max_interval, item_key
+        )
+
+    def observe_response(self, name: str, headers: Mapping[str, str], status_code: int = 200):
+        """
+        Record rate-limit headers and status of a response from a source
+
+        Safe to call from any thread, e.g. a requests session hook.
+        """
+        poller = self.sources.get(name)
+        if poller is None:
+            return
+        now = self.clock()
+        if status_code >= 400:
+            poller._response_error = True
+        quota = parse_rate_limit_headers(headers, now)
+        if quota is not None:
+            poller.quota = quota
+            poller.bucket.sync(*quota, now=now)
+
+    async def poll(self, name: str):
+        """Poll one source now, respecting its bucket"""
+        poller = self.sources[name]
+        now = self.clock()
+        if not poller.bucket.try_acquire(now):
+            poller.throttled += 1
+            FETCH_THROTTLED.labels(name).inc()
+            poller.next_run = poller.bucket.next_available(now)
+            return
+
+        poller.polls += 1
+        poller._response_error = False
+        failed = False
+        items: List = []
+        try:
+            with FETCH_SECONDS.labels(name).time():
+                items = await poller.fetch() or []
+        except Exception as e:
+            failed = True
+            poller.last_error = str(e)
+            logger.error(f"Polling {name} failed: {str(e)}")
+
+        now = self.clock()
+        failed = failed or poller._response_error
+        if failed:
+            poller.errors += 1
+            FETCH_FAILURES.labels(name).inc()
+        else:
+            poller.last_success = now
+
+        new_items = poller.count_new(items)
+        poller.items += len(items)
+        poller.new_items += new_items
+        FETCH_ITEMS.labels(name).observe(len(items))
+        FETCH_NEW_ITEMS.labels(name).inc(new_items)
+        if new_items:
+            poller.last_new_item = now
+
+        poller.adapt(new_items, failed)
+        poller.next_run = max(now + poller.interval, poller.bucket.next_available(now))
+
+        if items:
+            try:
+                await self.on_items(name, items)
+            except Exception as e:
+                logger.error(f"Handling items from {name} failed: {str(e)}")
+
+    async def run(self):
+        """Poll sources forever as each one comes due"""
+        while True:
+            now = self.clock()
+            due = [name for name, p in self.sources.items() if p.next_run <= now]
+            for name in due:
+                await self.poll(name)
+
+            next_run = min((p.next_run for p in self.sources.values()), default=self.clock() + 1)
+            await asyncio.sleep(max(next_run - self.clock(), 0.05))
+
+    def status(self) -> Dict[str, Dict]:
+        """Per-source quota spend and data freshness"""
+        now = self.clock()
+        return {name: poller.status(now) for name, poller in self.sources.items()}
@@ -7,5 +7,7 @@ if __name__ == "__main__":
         port=8000,
         reload=True,  # Enable auto-reload for development
         reload_dirs=["backend"],  # Watch the backend directory for changes
+        ws="websockets",
+        ws_per_message_deflate=True,  # Compress WebSocket frames when the client supports it
         log_level="info"
     ) 
\ No newline at end of file
@@ -1,100 +1,109 @@
 import random
 from datetime import datetime, timedelta
 import json
+from typing import Optional
+from alert_record import FeedAlert
 
 class SampleDataProvider:
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        """
+        Args:
+            seed: Seed for the randomized times and engagement, so repeated
+                runs serve the same sequence; for large or bursty data use
+                synthetic_data.SyntheticFeed
+        """
+        self.rng = random.Random(seed)
         self.sample_events = [
-            {
-                "source": "weather",
-                "text": "Severe thunderstorm warning for Los Angeles County. Potential for heavy rain, hail, and wind gusts up to 60 mph.",
-                "severity": "Severe",
-                "location": "Los Angeles County, CA",
-                "coordinates": {"lat": 34.0522, "lon": -118.2437},
-                "details": {
+            FeedAlert(
+                source="weather",
+                text="Severe thunderstorm warning for Los Angeles County. Potential for heavy rain, hail, and wind gusts up to 60 mph.",
+                severity="Severe",
+                location="Los Angeles County, CA",
+                coordinates={"lat": 34.0522, "lon": -118.2437},
+                details={
                     "wind_speed": "45-60 mph",
                     "precipitation": "2-3 inches expected",
                     "duration": "Next 3 hours"
                 }
-            },
-            {
-                "source": "twitter",
-                "text": "Multiple reports of flooding in downtown Miami. Ocean Drive and Collins Ave underwater. Vehicles stranded. Avoid area!",
-                "severity": "Extreme",
-                "location": "Miami Beach, FL",
-                "coordinates": {"lat": 25.7617, "lon": -80.1918},
-                "details": {
+            ),
+            FeedAlert(
+                source="twitter",
+                text="Multiple reports of flooding in downtown Miami. Ocean Drive and Collins Ave underwater. Vehicles stranded. Avoid area!",
+                severity="Extreme",
+                location="Miami Beach, FL",
+                coordinates={"lat": 25.7617, "lon": -80.1918},
+                details={
                     "affected_areas": ["Ocean Drive", "Collins Avenue", "5th Street"],
                     "reported_by": "Miami PD",
                     "evacuation_status": "Voluntary"
                 }
-            },
-            {
-                "source": "reddit",
-                "text": "4.2 magnitude earthquake near San Francisco. Felt across Bay Area. BART temporarily suspended.",
-                "severity": "Medium",
-                "location": "San Francisco Bay Area, CA",
-                "coordinates": {"lat": 37.7749, "lon": -122.4194},
-                "details": {
+            ),
+            FeedAlert(
+                source="reddit",
+                text="4.2 magnitude earthquake near San Francisco. Felt across Bay Area. BART temporarily suspended.",
+                severity="Medium",
+                location="San Francisco Bay Area, CA",
+                coordinates={"lat": 37.7749, "lon": -122.4194},
+                details={
                     "magnitude": 4.2,
                     "depth": "8.2 km",
                     "aftershocks": "3 recorded"
                 }
-            },
-            {
-                "source": "weather",
-                "text": "Winter storm warning: Denver metro area expecting 8-12 inches of snow. Strong winds creating blizzard conditions.",
-                "severity": "Severe",
-                "location": "Denver Metropolitan Area, CO",
-                "coordinates": {"lat": 39.7392, "lon": -104.9903},
-                "details": {
+            ),
+            FeedAlert(
+                source="weather",
+                text="Winter storm warning: Denver metro area expecting 8-12 inches of snow. Strong winds creating blizzard conditions.",
+                severity="Severe",
+                location="Denver Metropolitan Area, CO",
+                coordinates={"lat": 39.7392, "lon": -104.9903},
+                details={
                     "snowfall": "8-12 inches",
                     "wind_chill": "-15°F",
                     "visibility": "< 1/4 mile"
                 }
-            },
-            {
-                "source": "twitter",
-                "text": "Fast-moving wildfire near Phoenix suburbs. Evacuation orders for Cave Creek area. Multiple structures threatened.",
-                "severity": "Extreme",
-                "location": "Cave Creek, Phoenix, AZ",
-                "coordinates": {"lat": 33.4484, "lon": -112.0740},
-                "details": {
+            ),
+            FeedAlert(
+                source="twitter",
+                text="Fast-moving wildfire near Phoenix suburbs. Evacuation orders for Cave Creek area. Multiple structures threatened.",
+                severity="Extreme",
+                location="Cave Creek, Phoenix, AZ",
+                coordinates={"lat": 33.4484, "lon": -112.0740},
+                details={
                     "size": "approximately 500 acres",
                     "containment": "5%",
                     "evacuation_zones": ["Zone A", "Zone B"]
                 }
-            },
-            {
-                "source": "weather",
-                "text": "Flash flood warning issued for Houston metro area. Street flooding reported in multiple locations.",
-                "severity": "Severe",
-                "location": "Houston, TX",
-                "coordinates": {"lat": 29.7604, "lon": -95.3698},
-                "details": {
+            ),
+            FeedAlert(
+                source="weather",
+                text="Flash flood warning issued for Houston metro area. Street flooding reported in multiple locations.",
+                severity="Severe",
+                location="Houston, TX",
+                coordinates={"lat": 29.7604, "lon": -95.3698},
+                details={
                     "rainfall_rate": "2 inches per hour",
                     "duration": "Until 9:00 PM CDT",
                     "affected_areas": ["Downtown", "Midtown", "Medical Center"]
                 }
-            }
+            )
         ]
 
     def get_random_alerts(self, count=3):
         """Get a random selection of alerts with updated timestamps."""
-        alerts = random.sample(self.sample_events, min(count, len(self.sample_events)))
+        alerts = self.rng.sample(self.sample_events, min(count, len(self.sample_events)))
         current_time = datetime.now()
         
         for alert in alerts:
             # Add a random timestamp within the last 6 hours for more realism
-            random_minutes = random.randint(0, 360)
+            random_minutes = self.rng.randint(0, 360)
             alert_time = current_time - timedelta(minutes=random_minutes)
             alert["created_at"] = alert_time.isoformat()
             
             # Add random engagement metrics
             alert["engagement"] = {
-                "shares": random.randint(10, 1000),
-                "comments": random.randint(5, 500),
-                "verified_reports": random.randint(1, 50)
+                "shares": self.rng.randint(10, 1000),
+                "comments": self.rng.randint(5, 500),
+                "verified_reports": self.rng.randint(1, 50)
             }
         
         return sorted(alerts, key=lambda x: x["created_at"], reverse=True)
@@ -114,15 +123,15 @@ class SampleDataProvider:
         for event in self.sample_events:
             alert = event.copy()
             # More realistic time distribution
-            random_minutes = random.randint(0, hours * 60)
+            random_minutes = self.rng.randint(0, hours * 60)
             alert_time = current_time - timedelta(minutes=random_minutes)
             alert["created_at"] = alert_time.isoformat()
             
             # Add engagement metrics
             alert["engagement"] = {
-                "shares": random.randint(10, 1000),
-                "comments": random.randint(5, 500),
-                "verified_reports": random.randint(1, 50)
+                "shares": self.rng.randint(10, 1000),
+                "comments": self.rng.randint(5, 500),
+                "verified_reports": self.rng.randint(1, 50)
             }
             
             # Apply filters
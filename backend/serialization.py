@@ -0,0 +1,175 @@
+import json
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+
+def _default(obj: Any):
+    """Fallback for values the JSON encoders don't handle natively"""
+    if hasattr(obj, 'to_wire'):
+        return obj.to_wire()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode an object to compact JSON bytes
+
+    Uses orjson when it is installed and the standard library otherwise.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def loads(data) -> Any:
+    """Decode JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_alerts_message(message_type: str, fragments: Iterable[bytes], timestamp: str) -> bytes:
+    """
+    Assemble a WebSocket alerts message from pre-encoded alert fragments
+
+    Equivalent to ``dumps({"type": ..., "data": [...], "timestamp": ...})``
+    but splices in the cached alert bytes instead of re-encoding every alert.
+    """
+    return b''.join((
+        b'{"type":', dumps(message_type),
+        b',"data":[', b','.join(fragments),
+        b'],"timestamp":', dumps(timestamp), b'}'
+    ))
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick a response content-encoding from an Accept-Encoding header
+
+    Prefers brotli when the client accepts it and the module is installed,
+    then gzip. Returns None when the body should be sent uncompressed.
+    """
+    accepted = set()
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+
+    if brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class StreamCompressor:
+    """Incremental gzip or brotli compressor for streamed response bodies"""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        """
+        Args:
+            encoding: 'gzip' or 'br'
+            level: Compression level; fast defaults suited to live traffic
+        """
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=4 if level is None else level)
+            self._compress = self._compressor.process
+            self._flush = self._compressor.finish
+        else:
+            # wbits=31 writes a gzip header and trailer
+            self._compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+            self._compress = self._compressor.compress
+            self._flush = self._compressor.flush
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compress(data)
+
+    def finish(self) -> bytes:
+        return self._flush()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware applying gzip or brotli to HTTP responses
+
+    Works with streamed bodies: each chunk is passed through an incremental
+    compressor, so large alert pages are never buffered whole. Responses
+    smaller than ``minimum_size`` in a single chunk are sent as is.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get('headers') or [])
+        encoding = negotiate_encoding(headers.get(b'accept-encoding', b'').decode('latin-1'))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Dict = {}
+        compressor: List[Optional[StreamCompressor]] = [None]
+
+        async def send_compressed(message):
+            if message['type'] == 'http.response.start':
+                start_message.update(message)
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+
+            if compressor[0] is None:
+                response_headers = start_message.get('headers', [])
+                already_encoded = any(k.lower() == b'content-encoding' for k, _ in response_headers)
+                # Compressors buffer input, which would hold back live events
+                event_stream = any(
+                    k.lower() == b'content-type' and v.startswith(b'text/event-stream')
+                    for k, v in response_headers
+                )
+                if already_encoded or event_stream or (not more_body and len(body) < self.minimum_size):
+                    await send(start_message)
+                    await send(message)
+                    start_message.clear()
+                    compressor[0] = False
+                    return
+
+                compressor[0] = StreamCompressor(encoding)
+                response_headers = [
+                    (k, v) for k, v in response_headers if k.lower() != b'content-length'
+                ]
+                response_headers.append((b'content-encoding', encoding.encode('latin-1')))
+                response_headers.append((b'vary', b'Accept-Encoding'))
+                await send(dict(start_message, headers=response_headers))
+
+            if compressor[0] is False:
+                await send(message)
+                return
+
+            chunk = compressor[0].compress(body)
+            if not more_body:
+                chunk += compressor[0].finish()
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
+
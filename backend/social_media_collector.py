@@ -1,23 +1,47 @@
 import tweepy
 import praw
 import requests
-from typing import Dict, List, Optional
+import time
+from typing import Callable, Dict, List, Mapping, Optional
 from datetime import datetime, timedelta
 import logging
+from geo_polygons import representative_point
+from upstream_urls import rebase_session, upstream_url
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SocialMediaCollector:
-    def __init__(self, api_keys: Dict[str, str]):
-        """Initialize API clients"""
+    def __init__(self,
+                 api_keys: Dict[str, str],
+                 rate_limit_observer: Optional[Callable[[str, Mapping[str, str], int], None]] = None):
+        """
+        Initialize API clients
+        
+        Args:
+            api_keys: Credentials per source
+            rate_limit_observer: Called with (source, response headers, status
+                code) for every API response, e.g. PollingScheduler.observe_response
+        """
+        self.rate_limit_observer = rate_limit_observer
         self.twitter_api = self._setup_twitter(api_keys.get('twitter'))
         self.reddit_api = self._setup_reddit(api_keys.get('reddit'))
         self.nws_headers = {
             'User-Agent': '(QuickAlert, contact@quickalert.com)',
             'Accept': 'application/geo+json'
         }
+        self.nws_session = requests.Session()
+        self._observe_session(self.nws_session, 'weather')
         self.api_keys = api_keys
+    
+    def _observe_session(self, session: requests.Session, source: str):
+        """Report every response of a requests session to the rate-limit observer"""
+        if self.rate_limit_observer is None:
+            return
+        
+        def hook(response, *args, **kwargs):
+            self.rate_limit_observer(source, response.headers, response.status_code)
+        
+        session.hooks['response'].append(hook)
         
     def _setup_twitter(self, api_keys: Dict[str, str]) -> Optional[tweepy.API]:
         """Set up Twitter API client"""
@@ -34,7 +58,12 @@ class SocialMediaCollector:
                 api_keys['access_token'],
                 api_keys['access_token_secret']
             )
-            return tweepy.API(auth, wait_on_rate_limit=True)
+            # Never sleep inside the client on a 429; the scheduler reads the
+            # rate-limit headers and parks the source until its window resets
+            api = tweepy.API(auth, wait_on_rate_limit=False)
+            rebase_session(api.session, 'twitter')
+            self._observe_session(api.session, 'twitter')
+            return api
         except Exception as e:
             logger.error(f"Twitter API setup failed: {str(e)}")
             return None
@@ -49,49 +78,62 @@ class SocialMediaCollector:
             return praw.Reddit(
                 client_id=api_keys['client_id'],
                 client_secret=api_keys['client_secret'],
-                user_agent='QuickAlert/1.0'
+                user_agent='QuickAlert/1.0',
+                reddit_url=upstream_url('reddit'),
+                oauth_url=upstream_url('reddit_oauth')
             )
         except Exception as e:
             logger.error(f"Reddit API setup failed: {str(e)}")
             return None
     
+    def fetch_weather_alerts(self) -> List[Dict]:
+        """
+        Get active Extreme and Severe warnings from the National Weather Service
+        
+        Raises on request or response errors, so a poller can count them.
+        
+        Returns:
+            Alert dicts; polygon warnings keep their full ``geometry``
+        """
+        response = self.nws_session.get(
+            f"{upstream_url('nws')}/alerts/active",
+            headers=self.nws_headers
+        )
+        response.raise_for_status()
+        
+        alerts = []
+        data = response.json()
+        
+        for feature in data.get('features', []):
+            props = feature.get('properties', {})
+            if props.get('status') == 'Actual' and props.get('severity') in ['Extreme', 'Severe']:
+                alert = {
+                    'text': props.get('headline', ''),
+                    'description': props.get('description', ''),
+                    'created_at': datetime.fromisoformat(props.get('sent', '').replace('Z', '+00:00')),
+                    'location': props.get('areaDesc'),
+                    'event': props.get('event'),
+                    'severity': props.get('severity'),
+                    'source': 'weather'
+                }
+                
+                # Keep the full warning area; the point is only for maps
+                geometry = feature.get('geometry')
+                if geometry and geometry.get('type') in ('Polygon', 'MultiPolygon'):
+                    alert['geometry'] = geometry
+                    alert['coordinates'] = representative_point(geometry)
+                elif geometry and geometry.get('type') == 'Point':
+                    lon, lat = geometry['coordinates'][:2]
+                    alert['coordinates'] = {'lat': lat, 'lon': lon}
+                
+                alerts.append(alert)
+        
+        return alerts
+    
     def _get_weather_alerts(self) -> List[Dict]:
         """Get active weather alerts from National Weather Service"""
         try:
-            response = requests.get(
-                'https://api.weather.gov/alerts/active',
-                headers=self.nws_headers
-            )
-            response.raise_for_status()
-            
-            alerts = []
-            data = response.json()
-            
-            for feature in data.get('features', []):
-                props = feature.get('properties', {})
-                if props.get('status') == 'Actual' and props.get('severity') in ['Extreme', 'Severe']:
-                    alert = {
-                        'text': props.get('headline', ''),
-                        'description': props.get('description', ''),
-                        'created_at': datetime.fromisoformat(props.get('sent', '').replace('Z', '+00:00')),
-                        'location': props.get('areaDesc'),
-                        'event': props.get('event'),
-                        'severity': props.get('severity'),
-                        'source': 'weather'
-                    }
-                    
-                    # Extract coordinates if available
-                    if feature.get('geometry') and feature['geometry'].get('coordinates'):
-                        coords = feature['geometry']['coordinates'][0][0] if isinstance(feature['geometry']['coordinates'][0][0], list) else feature['geometry']['coordinates']
-                        alert['coordinates'] = {
-                            'lon': coords[0],
-                            'lat': coords[1]
-                        }
-                    
-                    alerts.append(alert)
-            
-            return alerts
-            
+            return self.fetch_weather_alerts()
         except Exception as e:
             logger.error(f"Error collecting weather alerts: {str(e)}")
             return []
@@ -187,8 +229,24 @@ class SocialMediaCollector:
                             })
         except Exception as e:
             logger.error(f"Error collecting Reddit data: {str(e)}")
-            
+        
+        self._report_reddit_limits()
         return posts
+    
+    def _report_reddit_limits(self):
+        """Pass PRAW's tracked rate-limit state to the observer as headers"""
+        if self.rate_limit_observer is None:
+            return
+        limits = self.reddit_api.auth.limits
+        if limits.get('remaining') is None:
+            return
+        now = time.time()
+        headers = {
+            'x-ratelimit-remaining': str(limits['remaining']),
+            'x-ratelimit-used': str(limits.get('used') or 0),
+            'x-ratelimit-reset': str(max((limits.get('reset_timestamp') or now) - now, 0))
+        }
+        self.rate_limit_observer('reddit', headers, 200)
 
     def collect_disaster_data(self, keywords):
         """Dummy collection method for sample implementation"""
@@ -0,0 +1,347 @@
+import logging
+import math
+import re
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Words that identify the disaster type of a feed post that has not been
+# through the detector; checked in order, first match wins
+DISASTER_TERMS = (
+    ('tsunami', ('tsunami',)),
+    ('earthquake', ('earthquake', 'quake', 'magnitude', 'aftershock')),
+    ('hurricane', ('hurricane', 'tropical storm', 'storm surge')),
+    ('tornado', ('tornado', 'twister', 'funnel cloud')),
+    ('wildfire', ('wildfire', 'forest fire', 'brush fire', 'fire')),
+    ('flood', ('flood', 'flooding', 'flash flood', 'underwater')),
+    ('storm', ('thunderstorm', 'blizzard', 'winter storm', 'hail', 'storm')),
+)
+_TERM_PATTERNS = tuple(
+    (disaster_type, re.compile(r'\b(?:' + '|'.join(map(re.escape, terms)) + r')\b', re.IGNORECASE))
+    for disaster_type, terms in DISASTER_TERMS
+)
+
+
+def infer_disaster_type(text: str) -> Optional[str]:
+    """Disaster type named in a post's text, or None"""
+    for disaster_type, pattern in _TERM_PATTERNS:
+        if pattern.search(text or ''):
+            return disaster_type
+    return None
+
+
+def event_time(value) -> Optional[float]:
+    """
+    Epoch seconds of an ISO timestamp or datetime, None if unparseable
+
+    Naive times are read as local time, as written by ``datetime.now()``;
+    producers of UTC times must include the offset.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    try:
+        return value.timestamp()
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+class WindowCounter:
+    """
+    Event counts over a sliding time window in a ring of fixed-width buckets
+
+    Recording an event and advancing the window are O(1): a running total
+    is kept for the whole window and for the most recent ``short_buckets``,
+    and buckets are zeroed as the window slides over them. Every bucket that
+    closes also updates an exponentially weighted mean and variance of the
+    per-bucket count, which serves as the baseline rate, except while the
+    counter is marked as surging.
+    """
+
+    __slots__ = (
+        'buckets', 'head', 'total', 'short_total', 'short_buckets',
+        'mean', 'var', 'closed', 'surging'
+    )
+
+    def __init__(self, window_buckets: int, short_buckets: int, head: int):
+        self.buckets = [0] * window_buckets
+        self.head = head
+        self.total = 0
+        self.short_total = 0
+        self.short_buckets = short_buckets
+        self.mean = 0.0
+        self.var = 0.0
+        self.closed = 0
+        self.surging = False
+
+    def advance(self, bucket: int, alpha: float):
+        """Slide the window so ``bucket`` is the newest bucket"""
+        size = len(self.buckets)
+        steps = bucket - self.head
+        if steps <= 0:
+            return
+
+        # Fold the closing head and the empty buckets after it into the
+        # baseline; a long gap decays it in closed form instead of per step.
+        # The baseline is frozen during a surge so the spike can't mask itself.
+        if not self.surging:
+            self._close(self.buckets[self.head % size], alpha)
+            empty = steps - 1
+            for _ in range(min(empty, size)):
+                self._close(0, alpha)
+            if empty > size:
+                decay = (1 - alpha) ** (empty - size)
+                self.var = decay * (self.var + (1 - decay) * self.mean ** 2)
+                self.mean *= decay
+                self.closed += empty - size
+
+        if steps >= size:
+            self.buckets = [0] * size
+            self.total = self.short_total = 0
+        else:
+            for b in range(self.head + 1, bucket + 1):
+                # Bucket b - short_buckets leaves the short window
+                if self.short_buckets <= size:
+                    self.short_total -= self.buckets[(b - self.short_buckets) % size]
+                self.total -= self.buckets[b % size]
+                self.buckets[b % size] = 0
+        self.head = bucket
+
+    def _close(self, count: int, alpha: float):
+        if self.closed == 0:
+            self.mean = float(count)
+        else:
+            delta = count - self.mean
+            self.mean += alpha * delta
+            self.var = (1 - alpha) * (self.var + alpha * delta * delta)
+        self.closed += 1
+
+    def add(self, bucket: int, count: int = 1) -> bool:
+        """
+        Count events in a bucket at or before the head
+
+        Returns:
+            False if the bucket is already outside the window
+        """
+        age = self.head - bucket
+        if age >= len(self.buckets) or age < 0:
+            return False
+        self.buckets[bucket % len(self.buckets)] += count
+        self.total += count
+        if age < self.short_buckets:
+            self.short_total += count
+        return True
+
+
+class SurgeDetector:
+    """
+    Spots sudden spikes of reports per (geo cell, disaster type)
+
+    Reports are counted in a ``WindowCounter`` per grid cell and disaster
+    type. A surge is raised when the count over the short window is
+    ``threshold`` standard deviations above what the baseline rate
+    predicts (Poisson-style, so quiet cells need a real jump, not one
+    extra report) and at least ``min_count`` reports. It is raised once
+    and re-armed when the rate falls back to half the threshold; the
+    baseline stays frozen meanwhile.
+
+    Window counts are answered from the counters, never by scanning alerts.
+    """
+
+    def __init__(self,
+                 cell_degrees: float = 0.5,
+                 bucket_seconds: int = 60,
+                 window_buckets: int = 60,
+                 short_buckets: int = 5,
+                 alpha: float = 0.05,
+                 threshold: float = 4.0,
+                 min_count: int = 5,
+                 clock: Callable[[], float] = time.time):
+        """
+        Args:
+            cell_degrees: Grid cell size in degrees of latitude and longitude
+            bucket_seconds: Width of one time bucket
+            window_buckets: Buckets in the long window reported by the API
+            short_buckets: Buckets in the window tested for a surge
+            alpha: EWMA weight of the newest closed bucket in the baseline
+            threshold: Standard deviations above baseline that count as a surge
+            min_count: Fewest reports in the short window for a surge
+            clock: Time source for reports without a timestamp
+        """
+        self.cell_degrees = cell_degrees
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = window_buckets
+        self.short_buckets = min(short_buckets, window_buckets)
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.clock = clock
+        self.counters: Dict[Tuple[int, int, str], WindowCounter] = {}
+        self.listeners: List[Callable[[Dict], None]] = []
+        self.recent_surges: List[Dict] = []
+        self._latest_bucket = 0
+        self._observed = 0
+
+    def add_listener(self, callback: Callable[[Dict], None]):
+        """Register a callback for surge events"""
+        self.listeners.append(callback)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees)
+
+    def observe(self,
+                disaster_type: str,
+                lat: float,
+                lon: float,
+                timestamp=None) -> Optional[Dict]:
+        """
+        Count one report
+
+        Args:
+            disaster_type: Disaster type of the report
+            lat: Latitude of the report
+            lon: Longitude of the report
+            timestamp: Report time (epoch, ISO string or datetime); now if None
+
+        Returns:
+            The surge event if this report started a surge, else None
+        """
+        when = event_time(timestamp)
+        if when is None:
+            when = self.clock()
+        bucket = int(when // self.bucket_seconds)
+        key = (*self._cell(lat, lon), disaster_type)
+
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = WindowCounter(self.window_buckets, self.short_buckets, bucket)
+        counter.advance(bucket, self.alpha)
+        if not counter.add(bucket):
+            return None
+
+        self._latest_bucket = max(self._latest_bucket, bucket)
+        self._observed += 1
+        if self._observed % 10000 == 0:
+            self.prune()
+        return self._check(key, counter)
+
+    def observe_alert(self, alert) -> Optional[Dict]:
+        """
+        Count an alert at its location
+
+        Detection alerts use their disaster type and first geocoded
+        location; feed alerts use their coordinates and the disaster type
+        named in their text.
+        """
+        disaster_type = alert.get('disaster_type') or infer_disaster_type(alert.get('text'))
+        if not disaster_type:
+            return None
+        point = alert.get('coordinates')
+        if not point:
+            point = next((loc for loc in alert.get('locations') or () if 'lat' in loc and 'lon' in loc), None)
+        if not point:
+            return None
+        timestamp = alert.get('timestamp') or alert.get('created_at')
+        return self.observe(disaster_type, point['lat'], point['lon'], timestamp)
+
+    def _expected_short(self, counter: WindowCounter) -> float:
+        return counter.mean * self.short_buckets
+
+    def _score(self, counter: WindowCounter) -> float:
+        expected = self._expected_short(counter)
+        spread = math.sqrt(max(expected, counter.var * self.short_buckets, 1.0))
+        return (counter.short_total - expected) / spread
+
+    def _check(self, key: Tuple[int, int, str], counter: WindowCounter) -> Optional[Dict]:
+        score = self._score(counter)
+        if counter.surging:
+            if score < self.threshold / 2:
+                counter.surging = False
+            return None
+        if score < self.threshold or counter.short_total < self.min_count:
+            return None
+
+        counter.surging = True
+        event = self._describe(key, counter)
+        event['score'] = round(score, 2)
+        event['detected_at'] = datetime.fromtimestamp(counter.head * self.bucket_seconds, timezone.utc).isoformat()
+        self.record([event])
+        logger.warning(f"Surge of {key[2]} reports near ({event['lat']:.2f}, {event['lon']:.2f}): "
+                       f"{counter.short_total} in {self.short_buckets * self.bucket_seconds}s")
+        for callback in self.listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Surge listener failed: {str(e)}")
+        return event
+
+    def _describe(self, key: Tuple[int, int, str], counter: WindowCounter) -> Dict:
+        row, col, disaster_type = key
+        return {
+            'disaster_type': disaster_type,
+            'lat': (row + 0.5) * self.cell_degrees,
+            'lon': (col + 0.5) * self.cell_degrees,
+            'cell_degrees': self.cell_degrees,
+            'window_count': counter.total,
+            'recent_count': counter.short_total,
+            'baseline_per_window': round(self._expected_short(counter), 3),
+            'surging': counter.surging,
+        }
+
+    def window_counts(self,
+                      disaster_type: Optional[str] = None,
+                      min_count: int = 1,
+                      now: Optional[float] = None) -> List[Dict]:
+        """
+        Current window counts per cell and disaster type
+
+        Args:
+            disaster_type: Only this disaster type, if given
+            min_count: Skip cells with fewer reports in the long window
+            now: Time the windows are advanced to; defaults to the clock
+
+        Returns:
+            One dict per (cell, disaster type), busiest first
+        """
+        bucket = int((self.clock() if now is None else now) // self.bucket_seconds)
+        bucket = max(bucket, self._latest_bucket)
+        results = []
+        for key, counter in self.counters.items():
+            if disaster_type is not None and key[2] != disaster_type:
+                continue
+            counter.advance(bucket, self.alpha)
+            if counter.surging and self._score(counter) < self.threshold / 2:
+                counter.surging = False
+            if counter.total >= min_count:
+                results.append(self._describe(key, counter))
+        results.sort(key=lambda r: (r['recent_count'], r['window_count']), reverse=True)
+        return results
+
+    def prune(self):
+        """Forget cells whose window has been empty for a whole window"""
+        horizon = self._latest_bucket - self.window_buckets
+        stale = [key for key, counter in self.counters.items() if counter.head < horizon]
+        for key in stale:
+            del self.counters[key]
+
+    def record(self, events: Iterable[Dict]):
+        """Keep surge events, e.g. ones detected by another worker, in recent_surges"""
+        self.recent_surges.extend(events)
+        del self.recent_surges[:-100]
+
+    def observe_many(self, alerts: Iterable) -> List[Dict]:
+        """Count a batch of alerts; returns the surges they started"""
+        surges = []
+        for alert in alerts:
+            event = self.observe_alert(alert)
+            if event is not None:
+                surges.append(event)
+        return surges
@@ -0,0 +1,399 @@
+import heapq
+import math
+import random
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from alert_record import FeedAlert
+
+# Regional hazard mix: relative likelihood of each disaster type
+HAZARD_PROFILES = {
+    'california': {'earthquake': 0.35, 'wildfire': 0.4, 'flood': 0.1, 'storm': 0.1, 'tsunami': 0.05},
+    'northwest': {'earthquake': 0.2, 'wildfire': 0.3, 'flood': 0.3, 'storm': 0.2},
+    'southwest': {'wildfire': 0.45, 'flood': 0.25, 'storm': 0.25, 'earthquake': 0.05},
+    'mountain': {'storm': 0.45, 'wildfire': 0.3, 'flood': 0.15, 'tornado': 0.1},
+    'plains': {'tornado': 0.45, 'storm': 0.3, 'flood': 0.15, 'wildfire': 0.1},
+    'midwest': {'storm': 0.4, 'tornado': 0.3, 'flood': 0.3},
+    'gulf': {'hurricane': 0.35, 'flood': 0.35, 'tornado': 0.15, 'storm': 0.15},
+    'florida': {'hurricane': 0.45, 'flood': 0.3, 'storm': 0.2, 'tornado': 0.05},
+    'southeast': {'tornado': 0.3, 'storm': 0.3, 'flood': 0.25, 'hurricane': 0.15},
+    'northeast': {'storm': 0.5, 'flood': 0.3, 'hurricane': 0.2},
+    'pacific': {'tsunami': 0.3, 'earthquake': 0.3, 'hurricane': 0.2, 'flood': 0.2},
+}
+
+# (place, latitude, longitude, population in millions, hazard profile)
+METROS = [
+    ('New York, NY', 40.71, -74.01, 19.5, 'northeast'),
+    ('Los Angeles, CA', 34.05, -118.24, 12.9, 'california'),
+    ('Chicago, IL', 41.88, -87.63, 9.4, 'midwest'),
+    ('Dallas, TX', 32.78, -96.80, 7.9, 'plains'),
+    ('Houston, TX', 29.76, -95.37, 7.3, 'gulf'),
+    ('Washington, DC', 38.91, -77.04, 6.3, 'northeast'),
+    ('Philadelphia, PA', 39.95, -75.17, 6.2, 'northeast'),
+    ('Miami, FL', 25.76, -80.19, 6.1, 'florida'),
+    ('Atlanta, GA', 33.75, -84.39, 6.2, 'southeast'),
+    ('Boston, MA', 42.36, -71.06, 4.9, 'northeast'),
+    ('Phoenix, AZ', 33.45, -112.07, 5.0, 'southwest'),
+    ('San Francisco, CA', 37.77, -122.42, 4.6, 'california'),
+    ('Riverside, CA', 33.95, -117.40, 4.6, 'california'),
+    ('Detroit, MI', 42.33, -83.05, 4.3, 'midwest'),
+    ('Seattle, WA', 47.61, -122.33, 4.0, 'northwest'),
+    ('Minneapolis, MN', 44.98, -93.27, 3.7, 'midwest'),
+    ('San Diego, CA', 32.72, -117.16, 3.3, 'california'),
+    ('Tampa, FL', 27.95, -82.46, 3.2, 'florida'),
+    ('Denver, CO', 39.74, -104.99, 3.0, 'mountain'),
+    ('St. Louis, MO', 38.63, -90.20, 2.8, 'midwest'),
+    ('Charlotte, NC', 35.23, -80.84, 2.7, 'southeast'),
+    ('Orlando, FL', 28.54, -81.38, 2.7, 'florida'),
+    ('San Antonio, TX', 29.42, -98.49, 2.6, 'plains'),
+    ('Portland, OR', 45.52, -122.68, 2.5, 'northwest'),
+    ('Sacramento, CA', 38.58, -121.49, 2.4, 'california'),
+    ('Las Vegas, NV', 36.17, -115.14, 2.3, 'southwest'),
+    ('Kansas City, MO', 39.10, -94.58, 2.2, 'plains'),
+    ('Nashville, TN', 36.16, -86.78, 2.0, 'southeast'),
+    ('New Orleans, LA', 29.95, -90.07, 1.3, 'gulf'),
+    ('Oklahoma City, OK', 35.47, -97.52, 1.4, 'plains'),
+    ('Salt Lake City, UT', 40.76, -111.89, 1.3, 'mountain'),
+    ('Honolulu, HI', 21.31, -157.86, 1.0, 'pacific'),
+    ('Anchorage, AK', 61.22, -149.90, 0.4, 'pacific'),
+]
+
+# Post templates per disaster type; every one names the hazard in words
+# infer_disaster_type recognises
+TEMPLATES = {
+    'earthquake': [
+        'Magnitude {mag} earthquake just shook {place}, {detail}',
+        'Strong earthquake felt across {place} {ago}. {detail}',
+        'Did anyone else feel that quake in {place}? {detail}',
+        'Aftershock rattling {place} again, {detail}',
+    ],
+    'wildfire': [
+        'Wildfire spreading fast near {place}, {detail}',
+        'Smoke everywhere in {place}, the wildfire is {acres} acres now. {detail}',
+        'Evacuation orders issued as brush fire grows outside {place}. {detail}',
+    ],
+    'flood': [
+        'Flash flooding in {place}, {detail}',
+        'Streets underwater across {place} {ago}. {detail}',
+        'Flood waters rising near {place}, {detail}',
+    ],
+    'hurricane': [
+        'Hurricane bands hitting {place}, {detail}',
+        'Storm surge pushing into {place} {ago}. {detail}',
+        'Hurricane winds tearing through {place}, {detail}',
+    ],
+    'tornado': [
+        'Tornado on the ground near {place}! {detail}',
+        'Funnel cloud spotted over {place} {ago}. {detail}',
+        'Tornado warning sirens going off in {place}, {detail}',
+    ],
+    'storm': [
+        'Severe thunderstorm over {place}, {detail}',
+        'Hail the size of golf balls in {place} {ago}. {detail}',
+        'Blizzard conditions around {place}, {detail}',
+    ],
+    'tsunami': [
+        'Tsunami warning for the coast near {place}, {detail}',
+        'Tsunami sirens sounding in {place} {ago}. {detail}',
+    ],
+}
+DETAILS = [
+    'stay safe everyone', 'power is out on our block', 'roads are closed',
+    'first responders on scene', 'moving to higher ground', 'schools closed',
+    'avoid the area', 'shelter in place', 'cars stranded', 'please share',
+    'evacuation centers opening', 'no injuries reported yet', 'praying for everyone',
+]
+AGO = ['just now', 'a few minutes ago', 'this morning', 'tonight', 'right now']
+# Everyday posts that should not count as reports
+CHATTER = [
+    'Traffic is terrible in {place} today',
+    'Beautiful sunset over {place} tonight',
+    'Anyone know a good coffee place in {place}?',
+    'Game day in {place}, lets go!',
+    'Long week in {place}, {detail}',
+    'The new restaurant downtown in {place} is packed',
+]
+# NWS event name per disaster type, for warnings issued during incidents
+WARNING_EVENTS = {
+    'tornado': 'Tornado Warning',
+    'flood': 'Flash Flood Warning',
+    'hurricane': 'Hurricane Warning',
+    'storm': 'Severe Thunderstorm Warning',
+    'wildfire': 'Red Flag Warning',
+    'tsunami': 'Tsunami Warning',
+}
+
+DEFAULT_START = datetime(2024, 6, 1)
+
+_BACKGROUND, _INCIDENT, _POST, _WARNING = range(4)
+
+
+class Incident:
+    """One disaster that produces a burst of posts around its epicenter"""
+
+    __slots__ = ('id', 'disaster_type', 'place', 'lat', 'lon', 'spread', 'start', 'size', 'decay', 'remaining', 'severity')
+
+    def __init__(self, incident_id: int, disaster_type: str, place: str, lat: float, lon: float,
+                 spread: float, start: float, size: int, decay: float, severity: str):
+        self.id = incident_id
+        self.disaster_type = disaster_type
+        self.place = place
+        self.lat = lat
+        self.lon = lon
+        self.spread = spread
+        self.start = start
+        self.size = size
+        self.decay = decay
+        self.remaining = size
+        self.severity = severity
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name != 'remaining'}
+
+
+class SyntheticFeed:
+    """
+    Seeded, reproducible stream of realistic social media posts and warnings
+
+    Posts come from two processes merged in time order:
+
+    * background reports and everyday chatter, a Poisson stream spread over
+      metro areas by population, with each area's own hazard mix;
+    * incidents, started as a Poisson process, each producing a
+      heavy-tailed (Pareto) number of posts clustered around an epicenter.
+      Post times are the order statistics of exponentially distributed
+      delays, so a burst peaks at once and decays, and are drawn one at a
+      time; memory stays proportional to the incidents still active, not
+      to the posts generated. Weather incidents also issue one NWS-style
+      warning with a polygon area.
+
+    The same seed and start always give the same posts, whatever the
+    count requested.
+    """
+
+    def __init__(self,
+                 seed: int = 0,
+                 start: datetime = DEFAULT_START,
+                 background_rate: float = 2.0,
+                 incident_rate: float = 6.0,
+                 chatter_fraction: float = 0.25,
+                 geotagged_fraction: float = 0.4,
+                 burst_alpha: float = 1.5,
+                 burst_min: int = 20,
+                 burst_max: int = 50000,
+                 mean_decay_minutes: float = 20.0,
+                 reddit_fraction: float = 0.25):
+        """
+        Args:
+            seed: Seed for everything generated
+            start: Time of the first post
+            background_rate: Background posts per second across all areas
+            incident_rate: New incidents per hour
+            chatter_fraction: Share of background posts that are not reports
+            geotagged_fraction: Share of posts carrying exact coordinates
+            burst_alpha: Pareto shape of incident sizes (smaller is heavier tailed)
+            burst_min: Fewest posts an incident produces
+            burst_max: Most posts an incident produces
+            mean_decay_minutes: Typical time constant of a burst's decay
+            reddit_fraction: Share of posts from Reddit rather than Twitter
+        """
+        self.seed = seed
+        self.start = start
+        self.background_rate = background_rate
+        self.incident_rate = incident_rate / 3600.0
+        self.chatter_fraction = chatter_fraction
+        self.geotagged_fraction = geotagged_fraction
+        self.burst_alpha = burst_alpha
+        self.burst_min = burst_min
+        self.burst_max = burst_max
+        self.mean_decay = mean_decay_minutes * 60.0
+        self.reddit_fraction = reddit_fraction
+        self.incidents: List[Incident] = []
+        self._start_epoch = start.timestamp()
+        self._metro_weights = [metro[3] for metro in METROS]
+        self._hazards = {
+            name: (list(profile), list(profile.values())) for name, profile in HAZARD_PROFILES.items()
+        }
+
+    def _metro(self, rng: random.Random) -> Tuple[str, float, float, float, str]:
+        return rng.choices(METROS, self._metro_weights)[0]
+
+    def _hazard(self, rng: random.Random, profile: str) -> str:
+        types, weights = self._hazards[profile]
+        return rng.choices(types, weights)[0]
+
+    def _timestamp(self, t: float) -> str:
+        return datetime.fromtimestamp(self._start_epoch + t).isoformat()
+
+    def _text(self, rng: random.Random, disaster_type: Optional[str], place: str) -> str:
+        city = place.split(',')[0]
+        if disaster_type is None:
+            text = rng.choice(CHATTER).format(place=city, detail=rng.choice(DETAILS))
+        else:
+            text = rng.choice(TEMPLATES[disaster_type]).format(
+                place=city,
+                mag=f'{rng.uniform(3.0, 7.8):.1f}',
+                acres=rng.randrange(50, 50000, 50),
+                ago=rng.choice(AGO),
+                detail=rng.choice(DETAILS),
+            )
+            if rng.random() < 0.4:
+                text += f' #{disaster_type}'
+        if rng.random() < 0.3:
+            text = f'@user{rng.randrange(100000)} {text}'
+        return text
+
+    def _post(self, rng: random.Random, t: float, disaster_type: Optional[str], place: str,
+              lat: float, lon: float, spread: float, severity: str) -> FeedAlert:
+        source = 'reddit' if rng.random() < self.reddit_fraction else 'twitter'
+        coordinates = None
+        if rng.random() < self.geotagged_fraction:
+            coordinates = {'lat': lat + rng.gauss(0, spread), 'lon': lon + rng.gauss(0, spread)}
+        reach = rng.lognormvariate(2.0, 1.6)
+        if source == 'twitter':
+            engagement = {
+                'retweets': int(reach / 4), 'likes': int(reach), 'replies': int(reach / 10)
+            }
+        else:
+            engagement = {'score': int(reach * 2), 'comments': int(reach / 5)}
+        return FeedAlert(
+            source=source,
+            text=self._text(rng, disaster_type, place),
+            severity=severity,
+            created_at=self._timestamp(t),
+            location=place,
+            coordinates=coordinates,
+            engagement=engagement,
+        )
+
+    def _warning(self, rng: random.Random, t: float, incident: Incident) -> FeedAlert:
+        event = WARNING_EVENTS[incident.disaster_type]
+        # A rough ellipse a few times the burst's spread around the epicenter
+        radius = max(incident.spread * 3, 0.05)
+        ring = [
+            [round(incident.lon + radius * 1.4 * math.cos(a), 4), round(incident.lat + radius * math.sin(a), 4)]
+            for a in (2 * math.pi * k / 12 for k in range(12))
+        ]
+        ring.append(ring[0])
+        return FeedAlert(
+            source='weather',
+            text=f'{event} issued for {incident.place} by NWS',
+            severity='Extreme' if incident.severity == 'High' else 'Severe',
+            created_at=self._timestamp(t),
+            location=incident.place,
+            coordinates={'lat': incident.lat, 'lon': incident.lon},
+            geometry={'type': 'Polygon', 'coordinates': [ring]},
+            details={'event': event},
+        )
+
+    def _new_incident(self, rng: random.Random, t: float) -> Incident:
+        place, lat, lon, _, profile = self._metro(rng)
+        size = int(min(self.burst_max, self.burst_min * rng.paretovariate(self.burst_alpha)))
+        incident = Incident(
+            incident_id=len(self.incidents) + 1,
+            disaster_type=self._hazard(rng, profile),
+            place=place,
+            lat=lat + rng.gauss(0, 0.2),
+            lon=lon + rng.gauss(0, 0.2),
+            spread=rng.uniform(0.02, 0.15),
+            start=t,
+            size=size,
+            decay=self.mean_decay * rng.lognormvariate(0, 0.5),
+            severity='High' if size > self.burst_min * 5 else 'Medium',
+        )
+        self.incidents.append(incident)
+        return incident
+
+    def posts(self, count: Optional[int] = None, duration: Optional[float] = None) -> Iterator[FeedAlert]:
+        """
+        Generate posts and warnings in time order
+
+        Every call starts over from the seed.
+
+        Args:
+            count: Stop after this many alerts
+            duration: Stop after this many seconds of simulated time
+
+        Yields:
+            FeedAlert records with ISO ``created_at`` times from ``start``
+        """
+        for _, alert in self._timeline(count, duration):
+            yield alert
+
+    def _timeline(self, count: Optional[int], duration: Optional[float]) -> Iterator[Tuple[float, FeedAlert]]:
+        """(seconds since start, alert) pairs in time order"""
+        if count is None and duration is None:
+            raise ValueError('Give a count or a duration')
+        rng = random.Random(self.seed)
+        self.incidents = []
+        sequence = 0
+        events: List[Tuple[float, int, int, Optional[Incident]]] = []
+
+        def schedule(t: float, kind: int, incident: Optional[Incident] = None):
+            nonlocal sequence
+            sequence += 1
+            heapq.heappush(events, (t, sequence, kind, incident))
+
+        if self.background_rate > 0:
+            schedule(rng.expovariate(self.background_rate), _BACKGROUND)
+        if self.incident_rate > 0:
+            schedule(rng.expovariate(self.incident_rate), _INCIDENT)
+
+        produced = 0
+        while events and (count is None or produced < count):
+            t, _, kind, incident = heapq.heappop(events)
+            if duration is not None and t > duration:
+                return
+
+            if kind == _BACKGROUND:
+                schedule(t + rng.expovariate(self.background_rate), _BACKGROUND)
+                place, lat, lon, _, profile = self._metro(rng)
+                disaster_type = None if rng.random() < self.chatter_fraction else self._hazard(rng, profile)
+                yield t, self._post(rng, t, disaster_type, place, lat, lon, 0.3, 'Low')
+            elif kind == _INCIDENT:
+                schedule(t + rng.expovariate(self.incident_rate), _INCIDENT)
+                incident = self._new_incident(rng, t)
+                # Next of the remaining delays, all i.i.d. exponential
+                schedule(t + rng.expovariate(incident.remaining / incident.decay), _POST, incident)
+                if incident.disaster_type in WARNING_EVENTS:
+                    schedule(t + rng.uniform(120, 900), _WARNING, incident)
+                continue
+            elif kind == _POST:
+                incident.remaining -= 1
+                if incident.remaining:
+                    schedule(t + rng.expovariate(incident.remaining / incident.decay), _POST, incident)
+                yield t, self._post(rng, t, incident.disaster_type, incident.place,
+                                    incident.lat, incident.lon, incident.spread, incident.severity)
+            else:
+                yield t, self._warning(rng, t, incident)
+            produced += 1
+
+    def batches(self,
+                seconds: float = 60.0,
+                count: Optional[int] = None,
+                duration: Optional[float] = None) -> Iterator[Tuple[float, str, List[FeedAlert]]]:
+        """
+        Group posts into poll cycles, as a collector would fetch them
+
+        Args:
+            seconds: Length of one poll cycle
+            count, duration: As for ``posts``
+
+        Yields:
+            (epoch seconds at the end of the cycle, source, alerts) for each
+            source with posts in the cycle
+        """
+        start = self._start_epoch
+        cycle = None
+        pending: Dict[str, List[FeedAlert]] = {}
+        for t, post in self._timeline(count, duration):
+            post_cycle = int(t // seconds)
+            if cycle is not None and post_cycle != cycle:
+                for source, alerts in pending.items():
+                    yield start + (cycle + 1) * seconds, source, alerts
+                pending = {}
+            cycle = post_cycle
+            pending.setdefault(str(post['source']), []).append(post)
+        if cycle is not None:
+            for source, alerts in pending.items():
+                yield start + (cycle + 1) * seconds, source, alerts
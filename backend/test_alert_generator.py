@@ -0,0 +1,46 @@
+import random
+from alert_generator import AlertGenerator
+
+def make_detection(rng, confidence=None):
+    return {
+        "disaster_type": rng.choice(["flood", "wildfire", "earthquake", "landslide"]),
+        "severity": rng.choice(["low", "medium", "high", "severe", "extreme", None]),
+        "confidence_score": rng.random() if confidence is None else confidence,
+        "probabilities": {"disaster": rng.random()},
+        # No location, so no two detections merge into one incident
+        "locations": [],
+        "keywords": [],
+        "entities": {},
+    }
+
+def test_batch_levels_match_single_detection_levels():
+    rng = random.Random(11)
+    detections = [make_detection(rng) for _ in range(500)]
+    # Land exactly on the thresholds too
+    for confidence, probability in [(0.9, 0.9), (0.8, 0.8), (0.7, 0.1), (0.6999, 0.99)]:
+        detection = make_detection(rng, confidence)
+        detection["probabilities"]["disaster"] = probability
+        detections.append(detection)
+    
+    batch = AlertGenerator().generate_alerts(detections)
+    single_generator = AlertGenerator()
+    single = [single_generator._create_alert(d) for d in detections]
+    
+    expected = [
+        single_generator._determine_alert_level(
+            single_generator._base_level(d["severity"]),
+            d["confidence_score"],
+            d["probabilities"]["disaster"]
+        )
+        for d in detections
+    ]
+    assert [a["alert_level"] for a in batch] == expected
+    assert [a["alert_level"] for a in single] == expected
+    assert [a["recommendations"] for a in batch] == [a["recommendations"] for a in single]
+
+def test_low_confidence_detections_alert_unless_a_threshold_is_set():
+    detection = make_detection(random.Random(2), confidence=0.2)
+    
+    (alert,) = AlertGenerator().generate_alerts([detection])
+    assert alert["alert_level"] == AlertGenerator()._base_level(detection["severity"])
+    assert AlertGenerator(confidence_threshold=0.6).generate_alerts([detection]) == []
@@ -0,0 +1,52 @@
+from alert_record import FeedAlert, Source, Severity
+from serialization import dumps, loads
+
+def test_feed_alert_behaves_like_dict_and_interns_values():
+    alert = FeedAlert.from_dict({
+        "source": "twitter",
+        "text": "Flooding downtown",
+        "severity": "Extreme",
+        "created_at": "2024-01-01T10:00:00",
+        "coordinates": {"lat": 25.76, "lon": -80.19},
+        "details": {},
+        "unknown_key": "ignored"
+    })
+    
+    assert alert["source"] == "twitter" and alert.source is Source.TWITTER
+    assert alert.severity is Severity.EXTREME
+    assert alert["coordinates"]["lat"] == 25.76
+    assert alert.get("details") is None and "details" not in alert
+    
+    alert["id"] = "a1"
+    copied = alert.copy()
+    copied["status"] = "resolved"
+    assert alert.get("status") is None
+
+def test_feed_alert_wire_format_omits_unset_fields():
+    alert = FeedAlert(id="a1", source="reddit", text="Quake", severity="Medium",
+                      created_at="2024-01-01T10:00:00", coordinates={"lat": 1, "lon": 2})
+    
+    assert loads(dumps(alert)) == {
+        "id": "a1",
+        "source": "reddit",
+        "text": "Quake",
+        "severity": "Medium",
+        "created_at": "2024-01-01T10:00:00",
+        "coordinates": {"lat": 1.0, "lon": 2.0}
+    }
+
+def test_feed_alert_keeps_nws_event_and_description():
+    alert = FeedAlert.from_dict({
+        "source": "weather",
+        "text": "Flood Warning issued for the Texas coast",
+        "description": "Heavy rain will cause flooding of low-lying areas.",
+        "event": "Flood Warning",
+        "severity": "Severe",
+        "created_at": "2024-01-01T10:00:00-05:00"
+    })
+    
+    assert alert["event"] == "Flood Warning"
+    wire = loads(dumps(alert))
+    assert wire["description"] == "Heavy rain will cause flooding of low-lying areas."
+    assert wire["event"] == "Flood Warning"
+    assert "description" not in FeedAlert.from_dict({"source": "weather", "text": "x", "description": ""})
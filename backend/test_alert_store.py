@@ -0,0 +1,184 @@
+import threading
+import pytest
+from datetime import datetime, timedelta, timezone
+from alert_store import MemoryAlertStore, SQLiteAlertStore, create_alert_store
+from alert_expiry import ExpiringAlertStore, ExpiryPolicy
+
+def make_alert(alert_id, timestamp, level='high', status='active'):
+    return {
+        'id': alert_id,
+        'timestamp': timestamp,
+        'alert_level': level,
+        'status': status,
+        'disaster_type': 'flood'
+    }
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield MemoryAlertStore()
+    else:
+        store = SQLiteAlertStore(str(tmp_path / 'alerts.db'))
+        yield store
+        store.close()
+
+def test_query_filters_and_orders_newest_first(store):
+    store.add_many([
+        make_alert('a', '2024-01-01T10:00:00'),
+        make_alert('b', '2024-01-01T12:00:00', level='low'),
+        make_alert('c', '2024-01-01T11:00:00', status='resolved'),
+    ])
+    
+    assert [a['id'] for a in store.query()] == ['b', 'c', 'a']
+    assert [a['id'] for a in store.query(status='active')] == ['b', 'a']
+    assert [a['id'] for a in store.query(level='high')] == ['c', 'a']
+    assert [a['id'] for a in store.query(since='2024-01-01T10:30:00', limit=1)] == ['b']
+
+def test_upsert_and_status_update_bump_version(store):
+    store.add(make_alert('a', '2024-01-01T10:00:00'))
+    version = store.version
+    
+    store.add(make_alert('a', '2024-01-01T10:00:00', level='critical'))
+    assert len(store) == 1
+    assert store.get('a')['alert_level'] == 'critical'
+    assert store.version > version
+    
+    assert store.update_status('a', 'resolved')
+    assert store.get('a')['status'] == 'resolved'
+    assert not store.update_status('missing', 'resolved')
+
+def test_sqlite_store_warm_starts_from_disk(tmp_path):
+    path = str(tmp_path / 'alerts.db')
+    store = SQLiteAlertStore(path)
+    store.add_many([make_alert('a', '2024-01-01T10:00:00')])
+    version = store.version
+    store.close()
+    
+    reopened = SQLiteAlertStore(path)
+    assert reopened.get('a')['disaster_type'] == 'flood'
+    assert reopened.version == version
+    reopened.close()
+
+def test_mixed_timestamp_offsets_order_and_filter_in_utc(store):
+    store.add_many([
+        # 05:34:05 UTC, from an NWS-style offset
+        make_alert('nws', '2026-10-19T00:34:05-05:00'),
+        make_alert('utc', '2026-10-19T05:10:00Z'),
+        make_alert('old', '2026-10-19T04:00:00+00:00'),
+    ])
+    
+    assert [a['id'] for a in store.query()] == ['nws', 'utc', 'old']
+    assert [a['id'] for a in store.query(since='2026-10-19T05:04:00Z')] == ['nws', 'utc']
+    assert [a['id'] for a in store.query(after=('2026-10-19T05:34:05+00:00', 'nws'))] == ['utc', 'old']
+
+def test_sqlite_store_normalises_timestamps_written_before_utc_indexing(tmp_path):
+    path = str(tmp_path / 'alerts.db')
+    store = SQLiteAlertStore(path)
+    store.add_many([make_alert('nws', '2026-10-19T00:34:05-05:00'), make_alert('utc', '2026-10-19T05:10:00Z')])
+    store.conn.execute("UPDATE alerts SET timestamp = '2026-10-19T00:34:05-05:00' WHERE id = 'nws'")
+    store.close()
+    
+    reopened = SQLiteAlertStore(path)
+    assert [a['id'] for a in reopened.query(since='2026-10-19T05:04:00Z')] == ['nws', 'utc']
+    reopened.close()
+
+def test_memory_store_reads_survive_concurrent_writes():
+    store = MemoryAlertStore()
+    store.add_many([make_alert(f'a{i}', '2026-10-19T10:00:00Z') for i in range(1000)])
+    stop = threading.Event()
+    
+    # Writes come from the event loop while a threadpool streams a response
+    def churn():
+        i = 0
+        while not stop.is_set():
+            store.add(make_alert(f'n{i}', '2026-10-19T11:00:00Z'))
+            store.remove_many([f'n{i}'])
+            i += 1
+    
+    writer = threading.Thread(target=churn)
+    writer.start()
+    try:
+        for _ in range(50):
+            assert len(list(store.iter_encoded(status='active'))) >= 1000
+            assert len(store.index_rows()) >= 1000
+    finally:
+        stop.set()
+        writer.join()
+
+def test_expiring_store_evicts_due_alerts_and_notifies():
+    now = [1000.0]
+    policy = ExpiryPolicy(
+        level_ttls={'high': timedelta(minutes=10), 'low': timedelta(minutes=1)},
+        overrides={('earthquake', None): timedelta(minutes=30)}
+    )
+    store = ExpiringAlertStore(MemoryAlertStore(), policy=policy, clock=lambda: now[0])
+    events = []
+    store.add_listener(lambda alert, reason: events.append((alert['id'], reason)))
+    
+    store.add_many([
+        make_alert('a', '2024-01-01T10:00:00', level='low'),
+        make_alert('b', '2024-01-01T10:00:00', level='high'),
+        dict(make_alert('c', '2024-01-01T10:00:00', level='low'), disaster_type='earthquake'),
+    ])
+    
+    now[0] += 120
+    assert store.expire() == 1
+    assert events == [('a', 'expired')]
+    assert store.get('a') is None
+    
+    # Re-adding restarts the TTL
+    now[0] += 500
+    store.add(make_alert('b', '2024-01-01T10:00:00', level='high'))
+    now[0] += 200
+    assert store.expire() == 0
+    now[0] += 500
+    assert store.expire() == 1
+    assert {a['id'] for a in store.query()} == {'c'}
+
+def test_restored_alerts_keep_their_deadlines(tmp_path):
+    path = str(tmp_path / 'alerts.db')
+    store = SQLiteAlertStore(path)
+    store.add_many([
+        make_alert('fresh', '2026-10-19T11:00:00Z', level='high'),
+        make_alert('stale', '2026-10-19T06:00:00Z', level='low'),
+        dict(make_alert('quake', '2026-10-19T09:00:00Z', level='critical'), disaster_type='earthquake'),
+    ])
+    store.close()
+    
+    noon = datetime(2026, 10, 19, 12, tzinfo=timezone.utc).timestamp()
+    now = [noon]
+    policy = ExpiryPolicy(overrides={('earthquake', None): timedelta(hours=2)})
+    restored = ExpiringAlertStore(SQLiteAlertStore(path), policy=policy, clock=lambda: now[0])
+    assert [a['id'] for a in restored.query()] == ['fresh']
+    
+    # 11:00 plus the 12 hour TTL of a high alert, not a fresh lifetime from the restart
+    now[0] = noon + timedelta(hours=10, minutes=59).total_seconds()
+    assert restored.expire() == 0
+    now[0] = noon + timedelta(hours=11).total_seconds()
+    assert restored.expire() == 1
+    restored.close()
+
+def test_expiring_store_enforces_cap():
+    store = ExpiringAlertStore(MemoryAlertStore(), max_alerts=2, clock=lambda: 0.0)
+    events = []
+    store.add_listener(lambda alert, reason: events.append((alert['id'], reason)))
+    
+    store.add(make_alert('a', '2024-01-01T10:00:00', level='low'))
+    store.add(make_alert('b', '2024-01-01T10:00:00', level='critical'))
+    store.add(make_alert('c', '2024-01-01T10:00:00', level='high'))
+    
+    assert len(store) == 2
+    assert events == [('a', 'capacity')]
+
+def test_workers_sharing_a_db_path_get_their_own_files(tmp_path):
+    path = str(tmp_path / 'alerts.db')
+    # Each call stands in for one worker process claiming a slot
+    first, second = create_alert_store(path), create_alert_store(path)
+    assert first.path == path
+    assert second.path == str(tmp_path / 'alerts.1.db')
+    
+    first.add_many([make_alert('a', '2024-01-01T10:00:00')])
+    second.add_many([make_alert('a', '2024-01-01T10:00:00')])
+    assert first.version == second.version == 1
+    first.close()
+    second.close()
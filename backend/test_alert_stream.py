@@ -0,0 +1,36 @@
+import asyncio
+from alert_stream import FrameRing
+
+def test_resume_replays_missed_frames_until_they_fall_out():
+    ring = FrameRing(capacity=3)
+    for i in range(1, 4):
+        ring.append("alerts", b'{"n":%d}' % i)
+    
+    assert [frame.id for frame in ring.since(1)] == [2, 3]
+    assert ring.since(3) == []
+    
+    ring.append("alerts", b'{"n":4}')
+    assert ring.since(0) is None  # frame 1 was dropped
+    assert [frame.id for frame in ring.since(1)] == [2, 3, 4]
+
+def test_event_ids_are_scoped_to_the_ring_epoch():
+    ring = FrameRing()
+    frame = ring.append("expired", b'{"data":["a"]}')
+    
+    assert frame.sse == b'id: %s\nevent: expired\ndata: {"data":["a"]}\n\n' % ring.event_id().encode()
+    assert ring.parse_event_id(ring.event_id()) == 1
+    assert ring.parse_event_id(FrameRing().event_id()) is None
+    assert ring.parse_event_id("garbage") is None
+    assert ring.parse_event_id(None) is None
+
+def test_waiters_share_one_wakeup():
+    async def scenario():
+        ring = FrameRing()
+        waiters = [asyncio.create_task(ring.wait(0)) for _ in range(100)]
+        await asyncio.sleep(0)
+        assert not await ring.wait(0, timeout=0.01)
+        
+        ring.append("alerts", b"{}")
+        assert all(await asyncio.gather(*waiters))
+    
+    asyncio.run(scenario())
@@ -0,0 +1,249 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+import os
+import subprocess
+import sys
+import pytest
+import requests
+from fastapi.testclient import TestClient
+import main
+
+@pytest.fixture
+def client(monkeypatch):
+    async def no_tweets():
+        return []
+    monkeypatch.setattr(main, "fetch_twitter_alerts", no_tweets)
+    return TestClient(main.app)
+
+def test_alerts_etag_returns_304_until_store_changes(client):
+    response = client.get("/api/alerts")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    
+    cached = client.get("/api/alerts", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    
+    main.alert_store.update_status(response.json()["alerts"][0]["id"], "resolved")
+    assert client.get("/api/alerts", headers={"If-None-Match": etag}).status_code == 200
+
+def test_alerts_etag_differs_between_stores_at_the_same_version(monkeypatch):
+    etags = set()
+    for _ in range(2):
+        monkeypatch.setattr(main, "alert_store", main.ExpiringAlertStore(main.MemoryAlertStore()))
+        assert main.alert_store.version == 0
+        etags.add(main.alerts_etag(source=None, since="2026-10-19T00:00:00"))
+    assert len(etags) == 2
+
+def test_recent_alerts_with_a_utc_offset_are_in_the_last_hour(client):
+    # An NWS warning stamped in US Central time, half an hour ago
+    created_at = (datetime.now(timezone.utc) - timedelta(minutes=30)).astimezone(timezone(timedelta(hours=-5)))
+    main.alert_store.add({
+        "id": "nws-offset",
+        "source": "weather",
+        "text": "Flash Flood Warning",
+        "severity": "Severe",
+        "created_at": created_at.isoformat(),
+        "status": "active"
+    })
+    
+    alerts = client.get("/api/alerts", params={"hours": 1}).json()["alerts"]
+    assert "nws-offset" in [a["id"] for a in alerts]
+
+def test_alerts_cursor_pages_are_stable_when_alerts_arrive(client):
+    everything = [a["id"] for a in client.get("/api/alerts").json()["alerts"]]
+    
+    first = client.get("/api/alerts", params={"limit": 2}).json()
+    assert [a["id"] for a in first["alerts"]] == everything[:2]
+    
+    # A new alert sorts ahead of the cursor and must not shift the next page
+    newest = dict(first["alerts"][0], id="new-alert", text="new", created_at="2999-01-01T00:00:00")
+    main.alert_store.add(newest)
+    
+    second = client.get("/api/alerts", params={"limit": 2, "after": first["next_cursor"]}).json()
+    assert [a["id"] for a in second["alerts"]] == everything[2:4]
+
+def test_alerts_rejects_bad_cursor(client):
+    assert client.get("/api/alerts", params={"after": "not-a-cursor"}).status_code == 400
+
+def test_alert_stream_resumes_from_last_event_id(client):
+    async def take(stream, count):
+        return [await stream.__anext__() for _ in range(count)]
+    
+    async def scenario():
+        first = main.stream_alert_events(None)
+        retry, initial = await take(first, 2)
+        assert retry.startswith(b"retry:")
+        assert b"event: initial" in initial
+        await first.aclose()
+        
+        last_id = main.alert_frames.last_id
+        main.alert_frames.append("alerts", b'{"type":"alerts","data":[]}')
+        resumed = main.stream_alert_events(last_id)
+        _, missed = await take(resumed, 2)
+        assert missed == main.alert_frames.frames[-1].sse
+        await resumed.aclose()
+    
+    asyncio.run(scenario())
+
+def test_alert_tiles_are_cached_by_etag(client):
+    world = client.get("/api/alerts/tiles/0/0/0")
+    assert world.status_code == 200
+    assert sum(c["count"] for c in world.json()["clusters"]) > 0
+    
+    etag = world.headers["etag"]
+    assert client.get("/api/alerts/tiles/0/0/0", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/alerts/tiles/1/2/0").status_code == 404
+
+def test_resolved_alerts_leave_their_tiles(client):
+    alert = {
+        "id": "tile-status", "source": "twitter", "text": "Bridge collapse reported",
+        "severity": "Extreme", "created_at": "2999-01-01T00:00:00", "coordinates": {"lat": -40.5, "lon": 150.5}
+    }
+    asyncio.run(main.apply_alerts_update(main.dumps({"type": "alerts", "data": [alert]})))
+    tile = "/api/alerts/tiles/3/7/4"
+    before = client.get(tile)
+    assert [c["representative_id"] for c in before.json()["clusters"]] == ["tile-status"]
+    
+    main.alert_store.update_status("tile-status", "resolved")
+    after = client.get(tile, headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert after.json()["clusters"] == []
+    
+    main.alert_store.update_status("tile-status", "active")
+    assert [c["count"] for c in client.get(tile).json()["clusters"]] == [1]
+
+def test_surges_count_new_reports_once(client):
+    report = {
+        "id": "surge-report", "source": "twitter", "text": "Flash flooding on Main St",
+        "created_at": datetime.now().isoformat(), "coordinates": {"lat": 10.1, "lon": 20.1}
+    }
+    asyncio.run(main.publish_alerts("twitter", [dict(report)]))
+    asyncio.run(main.publish_alerts("twitter", [dict(report)]))
+    
+    windows = client.get("/api/surges", params={"disaster_type": "flood"}).json()["windows"]
+    (window,) = [w for w in windows if w["lat"] == 10.25 and w["lon"] == 20.25]
+    assert window["window_count"] == 1
+
+def test_followers_relay_surges_without_counting_reports(client, monkeypatch):
+    monkeypatch.setattr(main.fanout_hub, "role", "follower")
+    report = {
+        "id": "follower-report", "source": "twitter", "text": "Wildfire spreading near the ridge",
+        "created_at": datetime.now().isoformat(), "coordinates": {"lat": -30.1, "lon": 40.1}
+    }
+    surge = {"disaster_type": "fire", "lat": -30.25, "lon": 40.25, "score": 9.0}
+    asyncio.run(main.apply_alerts_update(main.dumps({"type": "alerts", "data": [report], "surges": [surge]})))
+    
+    response = client.get("/api/surges", params={"disaster_type": "fire"}).json()
+    assert not [w for w in response["windows"] if w["lat"] == -30.25]
+    assert response["surges"][-1] == surge
+
+def test_metrics_endpoint_reports_pipeline_metrics(client):
+    client.get("/api/alerts")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE quickalert_broadcast_seconds histogram" in response.text
+    worker = f'worker="{os.getpid()}"'
+    assert f"quickalert_websocket_connections{{{worker}}} 0\n" in response.text
+    assert f"quickalert_fanout_leader{{{worker}}} 1\n" in response.text
+    assert f'quickalert_cache_hits_total{{cache="tiles",{worker}}}' in response.text
+
+def test_profiler_endpoints_need_local_client_or_token(client, monkeypatch):
+    # TestClient requests come from the host "testclient", not loopback
+    assert client.post("/debug/profiler/start").status_code == 403
+    
+    monkeypatch.setattr(main, "PROFILER_TOKEN", "secret")
+    headers = {"X-Profiler-Token": "secret"}
+    try:
+        assert client.post("/debug/profiler/start", params={"interval": 0.01}, headers=headers).json()["running"]
+        profile = client.get("/debug/profiler", headers=headers).json()
+        assert profile["running"] and profile["interval"] == 0.01
+    finally:
+        assert not client.post("/debug/profiler/stop", headers=headers).json()["running"]
+
+class FakeNWSResponse:
+    status_code = 200
+    headers = {}
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        # A long, thin warning: its first vertex is far from the point tested
+        ring = [[-100, 30], [-94, 30], [-94, 30.5], [-100, 30.5], [-100, 30]]
+        return {"features": [{
+            "geometry": {"type": "Polygon", "coordinates": [ring]},
+            "properties": {
+                "status": "Actual", "severity": "Severe", "event": "Flood Warning",
+                "headline": "Flood Warning for the Texas coast", "areaDesc": "Texas coast",
+                "description": "Flooding of low-lying coastal roads is expected.",
+                "sent": "2999-01-01T00:00:00Z"
+            }
+        }]}
+
+def test_nws_warning_areas_answer_point_lookups(client, monkeypatch):
+    monkeypatch.setattr(main.weather_collector.nws_session, "get", lambda *args, **kwargs: FakeNWSResponse())
+    asyncio.run(main.poll_scheduler.poll("weather"))
+    
+    inside = client.get("/api/warnings", params={"lat": 30.2, "lon": -94.2}).json()["alerts"]
+    assert [a["text"] for a in inside] == ["Flood Warning for the Texas coast"]
+    assert inside[0]["event"] == "Flood Warning"
+    assert inside[0]["description"] == "Flooding of low-lying coastal roads is expected."
+    assert client.get("/api/warnings", params={"lat": 31.0, "lon": -100.0}).json()["alerts"] == []
+    
+    main.alert_store.update_status(inside[0]["id"], "resolved")
+    assert client.get("/api/warnings", params={"lat": 30.2, "lon": -94.2}).json()["alerts"] == []
+
+def test_ingestion_task_is_kept_and_cancelled_on_shutdown(monkeypatch):
+    async def poll_forever():
+        await asyncio.Event().wait()
+    monkeypatch.setattr(main.poll_scheduler, "run", poll_forever)
+    
+    async def scenario():
+        task = main.start_ingestion()
+        await asyncio.sleep(0)
+        assert main.ingestion_task is task and not task.done()
+        
+        await main.shutdown_event()
+        assert task.cancelled() and main.ingestion_task is None
+    
+    asyncio.run(scenario())
+
+def test_failed_twitter_poll_is_counted_and_backs_off(monkeypatch):
+    def unreachable(**kwargs):
+        raise ConnectionError("api.twitter.com unreachable")
+    monkeypatch.setattr(main.twitter_client, "search_recent_tweets", unreachable)
+    poller = main.poll_scheduler.sources["twitter"]
+    monkeypatch.setattr(poller, "interval", 100.0)
+    errors = poller.errors
+    
+    asyncio.run(main.poll_scheduler.poll("twitter"))
+    assert poller.errors == errors + 1
+    assert poller.last_error == "api.twitter.com unreachable"
+    assert poller.interval == 200.0
+
+def test_nws_responses_resync_the_weather_budget():
+    response = requests.Response()
+    response.status_code = 429
+    response.headers["Retry-After"] = "120"
+    for hook in main.weather_collector.nws_session.hooks["response"]:
+        hook(response)
+    
+    poller = main.poll_scheduler.sources["weather"]
+    assert poller.quota[1] == 0
+    assert poller.bucket.next_available(main.poll_scheduler.clock()) > main.poll_scheduler.clock() + 60
+
+def test_log_file_setting_is_applied(tmp_path):
+    # Imported modules must not configure the root logger before main does
+    log_file = tmp_path / "quickalert.log"
+    script = "import logging, main; print(type(logging.getLogger().handlers[0]).__name__)"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=tmp_path,
+        env=dict(os.environ, LOG_FILE=str(log_file), PYTHONPATH=os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    assert result.stdout.strip() == "FileHandler"
+    assert log_file.exists()
@@ -0,0 +1,34 @@
+import numpy as np
+from disaster_detector import DisasterDetector
+from test_fast_classifier import DISASTER, EVERYDAY
+
+def fake_transformer(calls):
+    def probabilities(texts, batch_size=32):
+        calls.append(list(texts))
+        return np.full(len(texts), 0.95)
+    return probabilities
+
+def test_untrained_cascade_sends_everything_to_the_transformer():
+    detector = DisasterDetector()
+    calls = []
+    detector._transformer_probabilities = fake_transformer(calls)
+    
+    results = detector.predict_cascade(["Flooding on main street", "Nice weather"])
+    assert calls == [["Flooding on main street", "Nice weather"]]
+    assert [r["stage"] for r in results] == ["transformer", "transformer"]
+    assert detector.cascade_stats == {"texts": 2, "transformer_texts": 2}
+    assert detector.cascade_transformer_fraction() == 1.0
+
+def test_trained_cascade_only_escalates_uncertain_texts():
+    detector = DisasterDetector(cascade_band=(0.4, 0.6))
+    detector.fast_stage.fit(DISASTER + EVERYDAY, [1] * len(DISASTER) + [0] * len(EVERYDAY), epochs=100)
+    calls = []
+    detector._transformer_probabilities = fake_transformer(calls)
+    
+    # Confident either way, then a text sharing no n-gram with the training set
+    texts = [DISASTER[0], EVERYDAY[0], "zzz qqq"]
+    results = detector.predict_cascade(texts)
+    assert calls == [["zzz qqq"]]
+    assert [r["stage"] for r in results] == ["fast", "fast", "transformer"]
+    assert [r["is_disaster"] for r in results] == [True, False, True]
+    assert detector.cascade_stats == {"texts": 3, "transformer_texts": 1}
@@ -0,0 +1,75 @@
+import asyncio
+from fanout_hub import FanoutHub
+
+async def wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+def test_one_leader_fans_out_to_every_worker(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "fanout.sock")
+        received = {name: [] for name in ("a", "b", "c")}
+        started = []
+        
+        def make_hub(name):
+            async def on_message(payload):
+                received[name].append(payload)
+            return FanoutHub(
+                on_message,
+                socket_path=path,
+                on_leader=lambda: started.append(name),
+                snapshot=lambda: b"snapshot",
+                retry_interval=0.01
+            )
+        
+        hubs = {name: make_hub(name) for name in received}
+        for hub in hubs.values():
+            await hub.start()
+        
+        assert [hub.role for hub in hubs.values()] == ["leader", "follower", "follower"]
+        assert started == ["a"]
+        await wait_for(lambda: len(hubs["a"].followers) == 2)
+        
+        await hubs["a"].publish(b"update-1")
+        await wait_for(lambda: len(received["b"]) == 2 and len(received["c"]) == 2)
+        assert received["a"] == [b"update-1"]
+        assert received["b"] == received["c"] == [b"snapshot", b"update-1"]
+        
+        # When the leader goes away a follower takes over ingestion
+        await hubs["a"].stop()
+        await wait_for(lambda: hubs["b"].is_leader or hubs["c"].is_leader)
+        assert len(started) == 2
+        new_leader = hubs[started[1]]
+        follower = "c" if started[1] == "b" else "b"
+        await wait_for(lambda: len(new_leader.followers) == 1)
+        await new_leader.publish(b"update-2")
+        await wait_for(lambda: received[follower][-1] == b"update-2")
+        
+        for hub in hubs.values():
+            await hub.stop()
+    
+    asyncio.run(scenario())
+
+def test_slow_follower_is_dropped_instead_of_blocking(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "fanout.sock")
+        
+        async def ignore(payload):
+            pass
+        
+        leader = FanoutHub(ignore, socket_path=path, max_buffer=1024)
+        await leader.start()
+        _, writer = await asyncio.open_unix_connection(path)  # never reads
+        await wait_for(lambda: len(leader.followers) == 1)
+        
+        for _ in range(200):
+            await leader.publish(b"x" * 65536)
+        assert leader.followers == []
+        assert leader.dropped_followers == 1
+        
+        writer.close()
+        await leader.stop()
+    
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+import numpy as np
+from fast_classifier import HashedNgramClassifier
+
+DISASTER = [
+    "Massive earthquake shakes the city, buildings collapsed",
+    "Flash flooding downtown, residents evacuating to higher ground",
+    "Wildfire spreading fast near the highway, evacuation ordered",
+    "Tornado touched down, roofs torn off and power lines down",
+    "Hurricane making landfall tonight, storm surge expected",
+    "Flood waters rising, cars swept away on main street",
+]
+EVERYDAY = [
+    "Great coffee at the new place on main street",
+    "Watching the game tonight with friends",
+    "New phone arrived today, loving the camera",
+    "City council meets on Tuesday about the parking plan",
+    "Best pizza in town, highly recommend the crust",
+    "Traffic is light this morning on the highway",
+]
+
+def test_untrained_classifier_is_undecided():
+    classifier = HashedNgramClassifier()
+    assert not classifier.is_trained
+    np.testing.assert_allclose(classifier.predict_proba(["anything at all", ""]), [0.5, 0.5])
+
+def test_fit_separates_disaster_reports_from_chatter():
+    classifier = HashedNgramClassifier(n_features=2 ** 14).fit(
+        DISASTER + EVERYDAY, [1] * len(DISASTER) + [0] * len(EVERYDAY), epochs=100
+    )
+    
+    assert classifier.is_trained
+    disaster = classifier.predict_proba(["Earthquake and flooding, people evacuating"])
+    chatter = classifier.predict_proba(["Coffee with friends before the game"])
+    assert disaster[0] > 0.6 and chatter[0] < 0.4
+
+def test_partial_fit_chunks_learn_like_one_pass():
+    texts, labels = DISASTER + EVERYDAY, [1] * len(DISASTER) + [0] * len(EVERYDAY)
+    whole = HashedNgramClassifier(n_features=2 ** 12).partial_fit(texts, labels)
+    chunked = HashedNgramClassifier(n_features=2 ** 12)
+    chunked.partial_fit(texts[:5], labels[:5])
+    chunked.partial_fit(texts[5:], labels[5:])
+    
+    np.testing.assert_array_equal(whole.weights, chunked.weights)
+    assert whole.bias == chunked.bias
+
+def test_features_are_stable_across_instances():
+    first, second = HashedNgramClassifier(), HashedNgramClassifier()
+    text = "Flood warning for the river valley"
+    assert sorted(first._features(text)) == sorted(second._features(text))
+    # Unigrams and bigrams of six tokens
+    assert len(first._features(text)) == 11
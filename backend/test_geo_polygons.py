@@ -0,0 +1,70 @@
+import math
+import random
+from alert_generator import AlertGenerator
+from geo_polygons import PolygonIndex, representative_point
+
+def polygon(points):
+    return {"type": "Polygon", "coordinates": [points + [points[0]]]}
+
+def star(cx, cy, radius, spikes, rng):
+    points = []
+    for k in range(spikes * 2):
+        r = radius if k % 2 == 0 else radius * rng.uniform(0.3, 0.7)
+        angle = math.pi * k / spikes
+        points.append([cx + r * math.cos(angle), cy + r * math.sin(angle)])
+    return points
+
+def inside_scalar(points, lon, lat):
+    inside = False
+    for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1]):
+        if (y1 > lat) != (y2 > lat) and lon < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+def test_covering_matches_scalar_ray_casting():
+    rng = random.Random(3)
+    shapes = {
+        f"p{i}": star(rng.uniform(-100, -90), rng.uniform(30, 40), rng.uniform(0.2, 3), 7, rng)
+        for i in range(200)
+    }
+    index = PolygonIndex(cell_degrees=1.0)
+    for area_id, points in shapes.items():
+        index.add(area_id, polygon(points))
+    for area_id in list(shapes)[:50]:
+        index.remove(area_id)
+        del shapes[area_id]
+    
+    for _ in range(500):
+        lon, lat = rng.uniform(-101, -89), rng.uniform(29, 41)
+        expected = sorted(a for a, pts in shapes.items() if inside_scalar(pts, lon, lat))
+        assert sorted(index.covering(lat, lon)) == expected
+
+def test_holes_and_multipolygons():
+    outer = [[-96, 29], [-95, 29], [-95, 30], [-96, 30], [-96, 29]]
+    hole = [[-95.6, 29.4], [-95.4, 29.4], [-95.4, 29.6], [-95.6, 29.6], [-95.6, 29.4]]
+    index = PolygonIndex()
+    index.add("donut", {"type": "Polygon", "coordinates": [outer, hole]})
+    index.add("multi", {"type": "MultiPolygon", "coordinates": [[outer], [[[0, 0], [1, 0], [1, 1], [0, 0]]]]})
+    
+    assert index.covering(29.2, -95.8) == ["donut", "multi"]
+    assert index.covering(29.5, -95.5) == ["multi"]
+    assert index.covering(0.2, 0.8) == ["multi"]
+    assert representative_point({"type": "Polygon", "coordinates": [outer]}) == {"lat": 29.5, "lon": -95.5}
+
+def test_alerts_by_location_use_warning_area_not_a_corner():
+    generator = AlertGenerator()
+    # A long, thin warning area: its first vertex is far from the point tested
+    area = polygon([[-100, 30], [-94, 30], [-94, 30.5], [-100, 30.5]])
+    generator.generate_alerts([{
+        "disaster_type": "flood",
+        "severity": "severe",
+        "confidence_score": 0.9,
+        "probabilities": {"disaster": 0.9},
+        "locations": [{"name": "Texas", "lat": 30.25, "lon": -97.0}],
+        "keywords": ["flood"],
+        "entities": {},
+        "geometry": area,
+    }])
+    
+    assert len(generator.get_alerts_by_location(30.2, -94.2, radius_km=10)) == 1
+    assert generator.get_alerts_by_location(31.0, -100.0, radius_km=10) == []
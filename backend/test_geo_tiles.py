@@ -0,0 +1,83 @@
+import random
+from alert_record import FeedAlert
+from alert_store import MemoryAlertStore
+from geo_tiles import GeoTileIndex, mercator_fraction
+from serialization import loads
+
+def make_alert(alert_id, lat, lon, severity="Moderate"):
+    return FeedAlert(
+        id=alert_id, source="weather", text=alert_id, severity=severity,
+        created_at="2024-01-01T00:00:00", coordinates={"lat": lat, "lon": lon}
+    )
+
+def tile_of(lat, lon, z):
+    x, y = mercator_fraction(lat, lon)
+    return z, int(x * (1 << z)), int(y * (1 << z))
+
+def test_clusters_nest_and_pick_most_severe_representative():
+    index = GeoTileIndex(max_zoom=10)
+    index.add_many([
+        make_alert("a", 29.76, -95.36),
+        make_alert("b", 29.77, -95.37, severity="Extreme"),
+        make_alert("c", 34.05, -118.24),
+    ])
+    
+    # At zoom 0 Houston and Los Angeles share one cell
+    assert [(c["count"], c["representative_id"]) for c in index.clusters(0, 0, 0)] == [(3, "b")]
+    
+    houston = index.clusters(*tile_of(29.76, -95.36, 10))
+    assert sum(c["count"] for c in houston) == 2
+    
+    index.remove("b")
+    assert index.clusters(0, 0, 0)[0]["representative_id"] in {"a", "c"}
+    assert [c["representative_id"] for c in index.clusters(*tile_of(29.76, -95.36, 10))] == ["a"]
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(7)
+    alerts = [
+        make_alert(f"a{i}", rng.uniform(25, 49), rng.uniform(-124, -67),
+                   rng.choice(["Minor", "Moderate", "Severe", "Extreme"]))
+        for i in range(300)
+    ]
+    index = GeoTileIndex(max_zoom=8)
+    index.add_many(alerts)
+    removed = set(rng.sample(range(300), 150))
+    for i in removed:
+        index.remove(f"a{i}")
+    
+    rebuilt = GeoTileIndex(max_zoom=8)
+    rebuilt.add_many(a for i, a in enumerate(alerts) if i not in removed)
+    for z in range(9):
+        assert {k: (c.count, c.rep) for k, c in index.levels[z].items()} == \
+               {k: (c.count, c.rep) for k, c in rebuilt.levels[z].items()}
+
+def test_tile_etag_changes_only_with_its_alerts():
+    store = MemoryAlertStore()
+    index = GeoTileIndex(max_zoom=10)
+    houston = make_alert("h", 29.76, -95.36)
+    store.add(houston)
+    index.add(houston)
+    
+    tile = tile_of(29.76, -95.36, 10)
+    etag = index.etag(*tile)
+    body = loads(index.encode_tile(*tile, store))
+    assert body["clusters"][0]["alert"]["id"] == "h"
+    
+    index.add(make_alert("la", 34.05, -118.24))
+    assert index.etag(*tile) == etag
+    
+    index.remove("h")
+    assert index.etag(*tile) != etag
+    assert loads(index.encode_tile(*tile, store))["clusters"] == []
+
+def test_inactive_alerts_are_not_clustered():
+    index = GeoTileIndex(max_zoom=4)
+    index.add_many([make_alert("a", 29.76, -95.36), make_alert("b", 29.77, -95.37, severity="Extreme")])
+    version = index.tile_version(0, 0, 0)
+    
+    resolved = make_alert("b", 29.77, -95.37, severity="Extreme")
+    resolved["status"] = "resolved"
+    index.add(resolved)
+    assert [(c["count"], c["representative_id"]) for c in index.clusters(0, 0, 0)] == [(1, "a")]
+    assert index.tile_version(0, 0, 0) != version
+    assert "b" not in index.points
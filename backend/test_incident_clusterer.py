@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from incident_clusterer import IncidentClusterer
+
+def make_alert(alert_id, lat, lon, disaster_type='flood', confidence=0.5):
+    return {
+        'id': alert_id,
+        'timestamp': datetime.utcnow().isoformat(),
+        'disaster_type': disaster_type,
+        'confidence_score': confidence,
+        'probability': confidence,
+        'locations': [{'name': 'Miami', 'lat': lat, 'lon': lon}],
+        'keywords': ['flooding']
+    }
+
+def test_nearby_reports_merge_into_one_incident():
+    clusterer = IncidentClusterer(radius_km=25)
+    now = datetime(2024, 1, 1, 12, 0)
+    
+    first, is_new = clusterer.add(make_alert('a', 25.76, -80.19), now)
+    assert is_new
+    
+    for i in range(49):
+        incident, is_new = clusterer.add(make_alert(f'b{i}', 25.78, -80.13), now + timedelta(minutes=i))
+        assert not is_new
+        assert incident is first
+    
+    assert first['report_count'] == 50
+    assert first['confidence_score'] > 0.99
+    assert len(clusterer.incidents) == 1
+
+def test_different_type_distance_or_time_opens_new_incident():
+    clusterer = IncidentClusterer(radius_km=25, window=timedelta(hours=1))
+    now = datetime(2024, 1, 1, 12, 0)
+    clusterer.add(make_alert('a', 25.76, -80.19), now)
+    
+    assert clusterer.add(make_alert('b', 25.76, -80.19, disaster_type='hurricane'), now)[1]
+    assert clusterer.add(make_alert('c', 29.76, -95.37), now)[1]
+    assert clusterer.add(make_alert('d', 25.76, -80.19), now + timedelta(hours=2))[1]
+    # Every earlier incident was closed by the time gap
+    assert set(clusterer.incidents) == {'d'}
+
+def test_neighbouring_cells_are_matched_at_high_latitude():
+    clusterer = IncidentClusterer(radius_km=25)
+    now = datetime(2024, 1, 1, 12, 0)
+    clusterer.add(make_alert('a', 64.84, -147.72), now)
+    # ~20 km east of the first report
+    incident, is_new = clusterer.add(make_alert('b', 64.84, -147.30), now)
+    assert not is_new and incident['id'] == 'a'
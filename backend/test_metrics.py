@@ -0,0 +1,94 @@
+import threading
+import time
+import pytest
+import metrics
+
+class LookupCache:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+def test_render_uses_prometheus_text_format():
+    registry = metrics.Registry()
+    requests = registry.counter('test_requests_total', 'Requests\nseen', ['source'])
+    requests.labels('twitter').inc(3)
+    requests.labels('re"dd\\it').inc()
+    registry.gauge('test_depth', 'Queue depth').set_function(lambda: 7)
+    
+    text = registry.render()
+    assert '# HELP test_requests_total Requests\\nseen\n' in text
+    assert '# TYPE test_requests_total counter\n' in text
+    assert 'test_requests_total{source="twitter"} 3\n' in text
+    assert 'test_requests_total{source="re\\"dd\\\\it"} 1\n' in text
+    assert '# TYPE test_depth gauge\ntest_depth 7\n' in text
+    assert registry.counter('test_requests_total', 'Requests') is requests
+
+def test_histogram_buckets_are_cumulative():
+    registry = metrics.Registry()
+    latency = registry.histogram('test_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value)
+    
+    text = registry.render()
+    assert 'test_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'test_seconds_bucket{le="1"} 3\n' in text
+    assert 'test_seconds_bucket{le="+Inf"} 4\n' in text
+    assert 'test_seconds_count 4\n' in text
+    assert 'test_seconds_sum 6.05\n' in text
+
+def test_const_labels_are_added_to_every_sample():
+    registry = metrics.Registry()
+    registry.counter('test_fetches_total', 'Fetches', ['source']).labels('twitter').inc()
+    registry.gauge('test_depth', 'Depth').set(2)
+    registry.histogram('test_seconds', 'Latency', buckets=(1,)).observe(0.5)
+    registry.set_const_labels(worker=1234)
+    
+    text = registry.render()
+    assert 'test_fetches_total{source="twitter",worker="1234"} 1\n' in text
+    assert 'test_depth{worker="1234"} 2\n' in text
+    assert 'test_seconds_bucket{worker="1234",le="1"} 1\n' in text
+    assert 'test_seconds_count{worker="1234"} 1\n' in text
+
+def test_metric_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        metrics._Metric('test_base', 'Base')
+
+def test_watch_cache_reads_counters_at_scrape_time(monkeypatch):
+    # main labels the shared registry with the worker pid when imported
+    monkeypatch.setattr(metrics.REGISTRY, 'const_labels', {})
+    cache = LookupCache()
+    metrics.watch_cache('test_lookup', cache)
+    cache.hits += 5
+    cache.misses += 2
+    
+    text = metrics.REGISTRY.render()
+    assert 'quickalert_cache_hits_total{cache="test_lookup"} 5\n' in text
+    assert 'quickalert_cache_misses_total{cache="test_lookup"} 2\n' in text
+    
+    del cache
+    assert 'cache="test_lookup"' not in metrics.REGISTRY.render()
+
+def test_profiler_samples_only_while_running():
+    profiler = metrics.SamplingProfiler(interval=0.001)
+    stop = threading.Event()
+    
+    def busy_worker():
+        while not stop.is_set():
+            sum(range(1000))
+    
+    worker = threading.Thread(target=busy_worker)
+    worker.start()
+    try:
+        assert profiler.start()
+        assert not profiler.start()
+        time.sleep(0.1)
+        assert profiler.stop()
+    finally:
+        stop.set()
+        worker.join()
+    
+    samples = profiler.samples
+    assert samples > 0 and not profiler.running
+    assert 'busy_worker' in profiler.folded()
+    time.sleep(0.01)
+    assert profiler.samples == samples
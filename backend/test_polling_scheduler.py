@@ -0,0 +1,78 @@
+import asyncio
+from polling_scheduler import PollingScheduler, TokenBucket, parse_rate_limit_headers
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+def test_parse_rate_limit_headers_per_source_format():
+    assert parse_rate_limit_headers(
+        {"x-rate-limit-limit": "180", "x-rate-limit-remaining": "3", "x-rate-limit-reset": "1900"}, now=1000
+    ) == (180, 3, 1900)
+    # Reddit reports seconds until reset and how many were used
+    assert parse_rate_limit_headers(
+        {"X-Ratelimit-Used": "90", "X-Ratelimit-Remaining": "10.0", "X-Ratelimit-Reset": "120"}, now=1000
+    ) == (100, 10, 1120)
+    assert parse_rate_limit_headers({"Retry-After": "30"}, now=1000) == (None, 0, 1030)
+    assert parse_rate_limit_headers({"Content-Type": "application/json"}) is None
+
+def test_exhausted_quota_parks_source_until_reset():
+    clock = FakeClock()
+    calls = []
+    
+    async def fetch():
+        calls.append(clock.now)
+        return []
+    
+    async def on_items(source, items):
+        pass
+    
+    scheduler = PollingScheduler(on_items, clock=clock)
+    scheduler.register("twitter", fetch, interval=10, min_interval=10, max_interval=10)
+    scheduler.observe_response("twitter", {"x-rate-limit-remaining": "0", "x-rate-limit-reset": "1600"}, 429)
+    
+    asyncio.run(scheduler.poll("twitter"))
+    assert calls == []
+    assert scheduler.sources["twitter"].next_run == 1600
+    
+    clock.now = 1600
+    asyncio.run(scheduler.poll("twitter"))
+    assert calls == [1600]
+
+def test_interval_adapts_to_new_items_and_errors():
+    clock = FakeClock()
+    batches = [[{"id": "a"}], [{"id": "a"}, {"id": "b"}], [{"id": "b"}], RuntimeError("boom")]
+    received = []
+    
+    async def fetch():
+        batch = batches.pop(0)
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+    
+    async def on_items(source, items):
+        received.append([item["id"] for item in items])
+    
+    scheduler = PollingScheduler(on_items, clock=clock)
+    scheduler.register("feed", fetch, interval=100, min_interval=25, max_interval=400)
+    poller = scheduler.sources["feed"]
+    
+    intervals = []
+    for _ in range(4):
+        asyncio.run(scheduler.poll("feed"))
+        intervals.append(poller.interval)
+    
+    assert intervals == [50, 25, 37.5, 75]
+    assert received == [["a"], ["a", "b"], ["b"]]
+    assert poller.new_items == 2 and poller.errors == 1
+    assert scheduler.status()["feed"]["last_error"] == "boom"
+
+def test_token_bucket_spreads_remaining_quota_over_window():
+    bucket = TokenBucket(capacity=10, rate=1, clock=lambda: 0.0)
+    bucket.sync(limit=100, remaining=2, reset_at=100.0, now=0.0)
+    assert bucket.try_acquire(0.0) and bucket.try_acquire(0.0)
+    assert not bucket.try_acquire(0.0)
+    assert bucket.next_available(0.0) == 50.0
@@ -0,0 +1,78 @@
+import random
+import time
+import pytest
+from alert_generator import AlertGenerator
+from surge_detector import SurgeDetector, WindowCounter, infer_disaster_type
+
+def test_window_counter_matches_recount():
+    rng = random.Random(5)
+    counter = WindowCounter(window_buckets=10, short_buckets=3, head=0)
+    events = []
+    bucket = 0
+    for _ in range(2000):
+        bucket += rng.choice([0, 0, 0, 1, 1, 2, 15])
+        counter.advance(bucket, alpha=0.1)
+        late = bucket - rng.choice([0, 0, 1, 4, 12])
+        if counter.add(late):
+            events.append(late)
+        assert counter.total == sum(1 for e in events if bucket - 10 < e <= bucket)
+        assert counter.short_total == sum(1 for e in events if bucket - 3 < e <= bucket)
+
+def test_spike_over_steady_baseline_raises_one_surge():
+    detector = SurgeDetector(bucket_seconds=60, short_buckets=5, threshold=4.0, min_count=5)
+    surges = []
+    detector.add_listener(surges.append)
+    
+    # Two hours of roughly one flood report per five minutes, then a burst
+    for minute in range(0, 120, 5):
+        detector.observe("flood", 29.76, -95.36, minute * 60)
+    assert surges == []
+    
+    for i in range(12):
+        detector.observe("flood", 29.76, -95.36, 120 * 60 + i * 10)
+    assert len(surges) == 1
+    assert surges[0]["disaster_type"] == "flood" and surges[0]["recent_count"] >= 5
+    
+    # Same burst elsewhere and for another type are separate cells
+    assert detector.observe("wildfire", 29.76, -95.36, 120 * 60) is None
+    counts = detector.window_counts(now=121 * 60)
+    assert counts[0]["disaster_type"] == "flood" and counts[0]["surging"]
+    assert [c["disaster_type"] for c in detector.window_counts(disaster_type="wildfire", now=121 * 60)] == ["wildfire"]
+
+def test_feed_alerts_are_typed_from_text():
+    assert infer_disaster_type("Multiple reports of flooding in downtown Miami") == "flood"
+    assert infer_disaster_type("4.2 magnitude earthquake near San Francisco") == "earthquake"
+    assert infer_disaster_type("Traffic update for the bay bridge") is None
+    
+    detector = SurgeDetector(clock=lambda: 0.0)
+    detector.observe_alert({
+        "text": "Fast-moving wildfire near Phoenix", "created_at": "2024-01-01T00:00:00+00:00",
+        "coordinates": {"lat": 33.45, "lon": -112.07}
+    })
+    (count,) = detector.window_counts()
+    assert (count["disaster_type"], count["window_count"]) == ("wildfire", 1)
+
+@pytest.mark.parametrize("zone", ["Asia/Tokyo", "America/New_York"])
+def test_generated_alerts_land_in_current_window_off_utc(monkeypatch, zone):
+    monkeypatch.setenv("TZ", zone)
+    time.tzset()
+    try:
+        generator = AlertGenerator()
+        generator.generate_alerts([{
+            "disaster_type": "flood",
+            "severity": "severe",
+            "confidence_score": 0.9,
+            "probabilities": {"disaster": 0.9},
+            "locations": [{"name": "Miami", "lat": 25.76, "lon": -80.19}],
+            "keywords": ["flood"],
+            "entities": {},
+        }])
+        
+        now = time.time()
+        (count,) = generator.surges.window_counts(now=now)
+        assert count["window_count"] == 1
+        # Not pinned ahead of real time either
+        assert generator.surges._latest_bucket <= now // generator.surges.bucket_seconds
+    finally:
+        monkeypatch.undo()
+        time.tzset()
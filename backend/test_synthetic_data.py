@@ -0,0 +1,38 @@
+from sample_data import SampleDataProvider
+from surge_detector import SurgeDetector, infer_disaster_type
+from synthetic_data import METROS, SyntheticFeed
+
+def test_same_seed_same_posts_in_time_order():
+    first = [post.to_wire() for post in SyntheticFeed(seed=5).posts(5000)]
+    again = [post.to_wire() for post in SyntheticFeed(seed=5).posts(5000)]
+    other = [post.to_wire() for post in SyntheticFeed(seed=6).posts(5000)]
+    assert first == again
+    assert first != other
+    assert [post["created_at"] for post in first] == sorted(post["created_at"] for post in first)
+    # A longer run starts with the same posts
+    assert [post.to_wire() for post in SyntheticFeed(seed=5).posts(100)] == first[:100]
+    
+    samples = SampleDataProvider(seed=1).get_random_alerts()
+    assert [a["engagement"] for a in samples] == [a["engagement"] for a in SampleDataProvider(seed=1).get_random_alerts()]
+
+def test_posts_stay_near_metros_and_name_their_hazard():
+    feed = SyntheticFeed(seed=2, chatter_fraction=0.0)
+    for post in feed.posts(3000):
+        assert infer_disaster_type(post["text"]) is not None
+        if "coordinates" in post:
+            lat, lon = post["coordinates"]["lat"], post["coordinates"]["lon"]
+            assert min(abs(lat - m[1]) + abs(lon - m[2]) for m in METROS) < 4
+
+def test_incident_bursts_show_up_as_surges():
+    feed = SyntheticFeed(seed=3)
+    surges = SurgeDetector().observe_many(feed.posts(duration=6 * 3600))
+    assert surges
+    near_incident = [
+        surge for surge in surges
+        if any(
+            incident.disaster_type == surge["disaster_type"]
+            and abs(incident.lat - surge["lat"]) + abs(incident.lon - surge["lon"]) < 1.0
+            for incident in feed.incidents
+        )
+    ]
+    assert len(near_incident) >= 0.75 * len(surges)
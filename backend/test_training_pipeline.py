@@ -0,0 +1,85 @@
+import json
+import numpy as np
+from training_pipeline import TokenizationCache, build_streaming_dataset, iter_examples
+
+class WordTokenizer:
+    """One id per known word, like a Hugging Face tokenizer call"""
+
+    def __init__(self, words, name_or_path="test-words"):
+        self.name_or_path = name_or_path
+        self.vocab = {word: index for index, word in enumerate(words, start=2)}
+        self.calls = 0
+
+    def get_vocab(self):
+        return dict(self.vocab)
+
+    def __call__(self, text, truncation=True, max_length=128):
+        self.calls += 1
+        ids = [self.vocab.get(word, 1) for word in text.split()]
+        return {"input_ids": ids[:max_length]}
+
+WORDS = ["flood", "fire", "storm", "warning", "near", "river", "the", "coast"]
+
+def write_jsonl(path, examples):
+    with open(path, "w", encoding="utf-8") as f:
+        for text, label in examples:
+            f.write(json.dumps({"text": text, "label": label}) + "\n")
+            f.write("\n")
+
+def test_iter_examples_reads_jsonl_and_csv(tmp_path):
+    jsonl = tmp_path / "train.jsonl"
+    write_jsonl(jsonl, [("flood warning", 1), ("nice day", 0)])
+    assert list(iter_examples(str(jsonl))) == [("flood warning", 1), ("nice day", 0)]
+    
+    csv_path = tmp_path / "train.csv"
+    csv_path.write_text('text,label\n"fire, near the coast",1\nnice day,0\n', encoding="utf-8")
+    assert list(iter_examples(str(csv_path))) == [("fire, near the coast", 1), ("nice day", 0)]
+
+def test_cache_hits_after_flush_and_misses_for_another_tokenizer(tmp_path):
+    path = str(tmp_path / "tokens.db")
+    tokenizer = WordTokenizer(WORDS)
+    cache = TokenizationCache(path, tokenizer)
+    
+    ids = cache.encode("flood near the river")
+    cache.flush()
+    assert np.array_equal(cache.encode("flood near the river"), ids)
+    assert (cache.hits, cache.misses, tokenizer.calls) == (1, 1, 1)
+    
+    # Truncation length is part of the key
+    cache.max_length = 2
+    assert len(cache.encode("flood near the river")) == 2
+    assert cache.misses == 2
+    cache.close()
+    
+    # Same file, different vocabulary: must tokenize again, not reuse ids
+    other = WordTokenizer(list(reversed(WORDS)))
+    reopened = TokenizationCache(path, other)
+    other_ids = reopened.encode("flood near the river")
+    assert (reopened.hits, reopened.misses) == (0, 1)
+    assert not np.array_equal(other_ids, ids)
+    reopened.close()
+    
+    # Same tokenizer again reads the cached ids
+    again = TokenizationCache(path, WordTokenizer(WORDS))
+    assert np.array_equal(again.encode("flood near the river"), ids)
+    assert (again.hits, again.misses) == (1, 0)
+    again.close()
+
+def test_streaming_dataset_buckets_by_length_and_pads_per_batch(tmp_path):
+    path = str(tmp_path / "train.jsonl")
+    short = ["flood warning near the coast", "fire near the river"]
+    long = [" ".join(WORDS * 2), " ".join(WORDS + WORDS[:3])]
+    write_jsonl(path, [(short[0], 1), (long[0], 1), (short[1], 1), (long[1], 0)])
+    cache = TokenizationCache(":memory:", WordTokenizer(WORDS))
+    
+    dataset = build_streaming_dataset(path, cache, batch_size=2, bucket_boundaries=[8], shuffle_buffer=0)
+    batches = [(features["input_ids"].numpy(), features["attention_mask"].numpy()) for features, _ in dataset]
+    
+    # Each bucket is padded to its own longest text, not to a global length
+    assert sorted(ids.shape for ids, _ in batches) == [(2, 5), (2, 16)]
+    assert sorted(mask.sum(axis=1).tolist() for _, mask in batches) == [[5, 4], [16, 11]]
+    assert (cache.hits, cache.misses) == (0, 4)
+    
+    # The generator flushes at the end of an epoch, so the next one only hits
+    list(dataset)
+    assert (cache.hits, cache.misses) == (4, 4)
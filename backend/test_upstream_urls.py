@@ -0,0 +1,42 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import requests
+import tweepy
+from upstream_urls import nominatim_options, rebase_session, upstream_url
+
+class EchoPath(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = ('{"data": [], "meta": {"result_count": 0}, "path": "%s"}' % self.path).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_rebased_session_sends_hard_coded_urls_to_override(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoPath)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        monkeypatch.setenv("TWITTER_API_BASE_URL", f"http://127.0.0.1:{server.server_port}/")
+        client = tweepy.Client(bearer_token="token", return_type=dict)
+        seen = []
+        client.session.hooks["response"].append(lambda response, *args, **kwargs: seen.append(response.url))
+        assert rebase_session(client.session, "twitter")
+
+        response = client.search_recent_tweets(query="flood")
+        assert response["path"].startswith("/2/tweets/search/recent?")
+        # Session hooks still see every response
+        assert seen and seen[0].startswith(f"http://127.0.0.1:{server.server_port}/2/tweets")
+    finally:
+        server.shutdown()
+
+def test_defaults_leave_sessions_and_geocoder_alone(monkeypatch):
+    monkeypatch.delenv("TWITTER_API_BASE_URL", raising=False)
+    monkeypatch.setenv("NOMINATIM_BASE_URL", "http://localhost:9100")
+    session = requests.Session()
+    assert not rebase_session(session, "twitter")
+    assert upstream_url("twitter") == "https://api.twitter.com"
+    assert nominatim_options() == {"domain": "localhost:9100", "scheme": "http"}
@@ -0,0 +1,200 @@
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+import metrics
+
+DEFAULT_BUCKET_BOUNDARIES = [16, 32, 48, 64, 96]
+
+
+def default_token_cache_path() -> str:
+    """Tokenization cache kept between training runs, outside the source tree"""
+    return os.getenv('TOKEN_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'quickalert-token-cache.db'))
+
+
+def iter_examples(path: str) -> Iterator[Tuple[str, int]]:
+    """
+    Lazily read (text, label) training examples from disk
+
+    Supports JSON Lines files with ``text``/``label`` fields and CSV files
+    with a ``text,label`` header. Only one line is held in memory at a time.
+
+    Args:
+        path: Path to a .jsonl or .csv file
+
+    Yields:
+        Tuples of (text, label)
+    """
+    with open(path, encoding='utf-8', newline='') as f:
+        if path.endswith('.csv'):
+            for row in csv.DictReader(f):
+                yield row['text'], int(row['label'])
+        else:
+            for line in f:
+                if line.strip():
+                    example = json.loads(line)
+                    yield example['text'], int(example['label'])
+
+
+def tokenizer_fingerprint(tokenizer) -> str:
+    """
+    Identity of a tokenizer for cache keys
+
+    Hashes the tokenizer class, its ``name_or_path`` and its vocabulary, so
+    a different or retrained vocabulary never reads another one's ids.
+
+    Args:
+        tokenizer: Hugging Face tokenizer
+
+    Returns:
+        Hex digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{type(tokenizer).__name__}\0{getattr(tokenizer, 'name_or_path', '')}".encode('utf-8'))
+    vocab = tokenizer.get_vocab() if hasattr(tokenizer, 'get_vocab') else {}
+    for token, index in sorted(vocab.items(), key=lambda item: item[1]):
+        digest.update(f"\0{index}\0{token}".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TokenizationCache:
+    """
+    On-disk cache of token ids keyed by text hash
+
+    Tokenizing millions of tweets dominates the first epoch; the cache lets
+    later epochs and later runs skip the tokenizer entirely. The cache file
+    is shared between runs, so keys include the tokenizer's fingerprint.
+    """
+
+    def __init__(self, path: str, tokenizer, max_length: int = 128, flush_every: int = 1000):
+        """
+        Args:
+            path: SQLite file holding the cache (":memory:" for none)
+            tokenizer: Hugging Face tokenizer used on cache misses
+            max_length: Truncation length, part of the cache key with the
+                tokenizer fingerprint
+            flush_every: Number of new entries buffered before a write
+        """
+        self.tokenizer = tokenizer
+        self.fingerprint = tokenizer_fingerprint(tokenizer)
+        self.max_length = max_length
+        self.flush_every = flush_every
+        self.hits = 0
+        self.misses = 0
+        self._pending: List[Tuple[bytes, bytes]] = []
+        metrics.watch_cache('tokenization', self)
+
+        # tf.data runs the generator on its own thread
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tokens (key BLOB PRIMARY KEY, ids BLOB NOT NULL)"
+        )
+
+    def _key(self, text: str) -> bytes:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.fingerprint}\0{self.max_length}\0{text}".encode('utf-8'))
+        return digest.digest()
+
+    def encode(self, text: str) -> np.ndarray:
+        """
+        Return unpadded token ids for a text, tokenizing on a cache miss
+
+        Args:
+            text: Text to encode
+
+        Returns:
+            int32 array of token ids
+        """
+        key = self._key(text)
+        row = self.conn.execute("SELECT ids FROM tokens WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self.hits += 1
+            return np.frombuffer(row[0], dtype=np.int32)
+
+        self.misses += 1
+        ids = np.asarray(
+            self.tokenizer(text, truncation=True, max_length=self.max_length)['input_ids'],
+            dtype=np.int32
+        )
+        self._pending.append((key, ids.tobytes()))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return ids
+
+    def flush(self):
+        """Write buffered cache entries to disk"""
+        if self._pending:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tokens (key, ids) VALUES (?, ?)",
+                    self._pending
+                )
+            self._pending = []
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def build_streaming_dataset(path: str,
+                            cache: TokenizationCache,
+                            batch_size: int = 16,
+                            bucket_boundaries: Optional[List[int]] = None,
+                            shuffle_buffer: int = 10000,
+                            pad_token_id: int = 0) -> tf.data.Dataset:
+    """
+    Build a length-bucketed, dynamically padded training dataset from disk
+
+    Examples are streamed through the tokenization cache, grouped into
+    buckets of similar length and padded only to the longest sequence in
+    their batch. Memory use is bounded by the shuffle buffer and the
+    per-bucket batch, not by the corpus size.
+
+    Args:
+        path: Training file readable by iter_examples
+        cache: Tokenization cache used to encode texts
+        batch_size: Examples per batch in every bucket
+        bucket_boundaries: Sequence length bucket edges
+        shuffle_buffer: Number of examples held for shuffling
+        pad_token_id: Token id used for padding
+
+    Returns:
+        Dataset yielding (features, labels) batches for model.fit
+    """
+    boundaries = bucket_boundaries or DEFAULT_BUCKET_BOUNDARIES
+
+    def generate():
+        for text, label in iter_examples(path):
+            yield cache.encode(text), label
+        cache.flush()
+
+    dataset = tf.data.Dataset.from_generator(
+        generate,
+        output_signature=(
+            tf.TensorSpec(shape=(None,), dtype=tf.int32),
+            tf.TensorSpec(shape=(), dtype=tf.int32)
+        )
+    )
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer)
+
+    dataset = dataset.bucket_by_sequence_length(
+        element_length_func=lambda ids, label: tf.shape(ids)[0],
+        bucket_boundaries=boundaries,
+        bucket_batch_sizes=[batch_size] * (len(boundaries) + 1),
+        padding_values=(pad_token_id, 0),
+        pad_to_bucket_boundary=False
+    )
+
+    def to_features(ids, labels) -> Tuple[Dict[str, tf.Tensor], tf.Tensor]:
+        mask = tf.cast(tf.not_equal(ids, pad_token_id), tf.int32)
+        return {'input_ids': ids, 'attention_mask': mask}, labels
+
+    return dataset.map(to_features, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
@@ -0,0 +1,77 @@
+import logging
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Public base URL of each upstream API and the environment variable that
+# overrides it, e.g. to point the backend at local stub servers
+UPSTREAMS = {
+    'twitter': ('TWITTER_API_BASE_URL', 'https://api.twitter.com'),
+    'reddit': ('REDDIT_BASE_URL', 'https://www.reddit.com'),
+    'reddit_oauth': ('REDDIT_OAUTH_BASE_URL', 'https://oauth.reddit.com'),
+    'nws': ('NWS_API_BASE_URL', 'https://api.weather.gov'),
+    'nominatim': ('NOMINATIM_BASE_URL', 'https://nominatim.openstreetmap.org'),
+}
+
+
+def upstream_url(name: str) -> str:
+    """Base URL of an upstream API, without a trailing slash"""
+    variable, default = UPSTREAMS[name]
+    return (os.getenv(variable) or default).rstrip('/')
+
+
+def upstream_overridden(name: str) -> bool:
+    """Whether the base URL of an upstream API was changed from the public one"""
+    return upstream_url(name) != UPSTREAMS[name][1]
+
+
+class RebaseAdapter(HTTPAdapter):
+    """
+    Transport adapter that sends requests for one base URL to another
+
+    For clients that hard-code their API host (tweepy builds every URL from
+    ``https://api.twitter.com``): mounted on the client's session under the
+    original base URL, it rewrites the prefix of each request just before
+    it goes out, so hooks and retries on the session keep working.
+    """
+
+    def __init__(self, original: str, replacement: str, **kwargs):
+        super().__init__(**kwargs)
+        self.original = original.rstrip('/')
+        self.replacement = replacement.rstrip('/')
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(self.original):
+            request.url = self.replacement + request.url[len(self.original):]
+        return super().send(request, **kwargs)
+
+
+def rebase_session(session: requests.Session, name: str) -> bool:
+    """
+    Route a session's requests for an upstream API to its configured base URL
+
+    Args:
+        session: Session of the API client
+        name: Upstream name from ``UPSTREAMS``
+
+    Returns:
+        True if the base URL is overridden and the adapter was mounted
+    """
+    if not upstream_overridden(name):
+        return False
+    original = UPSTREAMS[name][1]
+    replacement = upstream_url(name)
+    session.mount(original, RebaseAdapter(original, replacement))
+    logger.info(f"Routing {name} API requests to {replacement}")
+    return True
+
+
+def nominatim_options() -> Dict[str, Optional[str]]:
+    """``domain`` and ``scheme`` arguments for geopy's Nominatim geocoder"""
+    parts = urlsplit(upstream_url('nominatim'))
+    return {'domain': parts.netloc + parts.path, 'scheme': parts.scheme}